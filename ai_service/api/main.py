@@ -2,10 +2,15 @@
 Main FastAPI application for AI Service
 """
 
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from ai_service.api.routers.generate_rout import router
+from ai_service.src.llm.registry import warm_up, aclose_llm_clients, get_router, LLM_WARMUP
+from ai_service.src.utils.metrics import render_metrics
+from ai_service.src.utils.course_cache import course_cache
 import logging
 import os
 from dotenv import load_dotenv
@@ -18,12 +23,30 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Lifespan: прогрев LLM-клиентов на старте, закрытие пулов соединений (LLM, Redis) на остановке
+    """
+    if LLM_WARMUP:
+        try:
+            await asyncio.to_thread(warm_up)
+            logger.info("LLM clients warmed up")
+        except Exception as e:
+            logger.warning(f"LLM warm-up failed, clients will be built on first request: {e}")
+    yield
+    await aclose_llm_clients()
+    await course_cache.aclose()
+
+
 app = FastAPI(
     title="Fill AI - AI Service",
     description="AI Service API for generating courses using AI agents",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -63,10 +86,20 @@ async def root():
 async def health_check():
     return {
         "status": "healthy",
-        "service": "ai-service"
+        "service": "ai-service",
+        "llm_providers": get_router().snapshot()
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    rendered = render_metrics()
+    if rendered is None:
+        return JSONResponse(status_code=503, content={"error": "prometheus_client is not installed"})
+    body, content_type = rendered
+    return Response(content=body, media_type=content_type)
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -2,20 +2,42 @@
 Router for course generation endpoints
 """
 
-from fastapi import APIRouter, HTTPException, status
-from ai_service.src.agents.agent_gen import generate_c
+from fastapi import APIRouter, Header, HTTPException, status
+from fastapi.responses import StreamingResponse
+from ai_service.src.agents.agent_gen import agenerate_c, astream_c
+from ai_service.src.utils.course_cache import course_cache
+from ai_service.src.utils.single_flight import SingleFlight, normalize_query
+from ai_service.src.utils.metrics import collect_timings
+from ai_service.src.utils.retry_policy import BUDGET_HEADER, deadline_scope, parse_budget
 from ai_service.api.schemas.generate_sch import (
     CourseGenerateRequest,
     CourseGenerateResponse,
     ErrorResponse
 )
+import json
 import logging
-from typing import Dict, Any
+from typing import AsyncIterator, Dict, Any, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/generate_main", tags=["Course Generation"])
 
+# Одинаковые одновременные запросы выполняют граф агентов один раз
+_single_flight = SingleFlight()
+
+
+async def _generate_with_timings(query: str, budget: Optional[float]) -> Tuple[Any, Dict[str, Any]]:
+    """
+    Прогоняет граф и возвращает состояние вместе с метриками этапов
+    (время, токены, стоимость) этого прогона
+
+    budget - сколько секунд вызывающая сторона готова ждать; повторы
+    LLM-вызовов внутри графа не выходят за этот срок
+    """
+    with collect_timings() as timings, deadline_scope(budget):
+        state = await agenerate_c(query)
+    return state, timings.to_dict()
+
 
 def _convert_state_to_response(state: Any) -> Dict[str, Any]:
     """
@@ -86,13 +108,21 @@ def _convert_state_to_response(state: Any) -> Dict[str, Any]:
     **Note**: Генерация может занять 30-60 секунд в зависимости от сложности темы.
     """
 )
-async def generate_course(request: CourseGenerateRequest):
+async def generate_course(
+    request: CourseGenerateRequest,
+    request_budget: Optional[str] = Header(None, alias=BUDGET_HEADER)
+):
     try:
         logger.info(f"Starting course generation for query: {request.query}")
         
-        result = generate_c(request.query)
+        budget = parse_budget(request_budget)
+        result, timings = await _single_flight.do(
+            normalize_query(request.query),
+            lambda: _generate_with_timings(request.query, budget)
+        )
         
         response_data = _convert_state_to_response(result)
+        response_data["timings"] = timings
         
         if not response_data.get("query"):
             response_data["query"] = request.query
@@ -115,6 +145,56 @@ async def generate_course(request: CourseGenerateRequest):
         )
 
 
+def _format_sse(event: str, data: Any) -> str:
+    """
+    Одно событие в формате Server-Sent Events
+    """
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def _stream_generation(query: str, budget: Optional[float]) -> AsyncIterator[str]:
+    with collect_timings() as timings, deadline_scope(budget):
+        async for event, data in astream_c(query):
+            if event == "done":
+                data = _convert_state_to_response(data)
+                data["timings"] = timings.to_dict()
+                if not data.get("query"):
+                    data["query"] = query
+                data = CourseGenerateResponse(**data).model_dump()
+            yield _format_sse(event, data)
+
+
+@router.post(
+    "/generate/stream",
+    summary="Generate a course or chat with streamed progress",
+    description="""
+    То же, что /generate, но отдает результат по мере готовности (text/event-stream).
+    
+    События: coordinator, summary_token, summary, tests, videos,
+    chat_token (для чата), done (полный ответ как у /generate), error.
+    """
+)
+async def generate_course_stream(
+    request: CourseGenerateRequest,
+    request_budget: Optional[str] = Header(None, alias=BUDGET_HEADER)
+):
+    logger.info(f"Starting streamed generation for query: {request.query}")
+    return StreamingResponse(
+        _stream_generation(request.query, parse_budget(request_budget)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get(
+    "/cache/stats",
+    summary="Course cache statistics",
+    description="Hit/miss counters and size of the generated course cache"
+)
+async def cache_stats():
+    return course_cache.metrics()
+
+
 @router.get(
     "/health",
     summary="Health check for generation service",
@@ -125,6 +205,7 @@ async def generation_health_check():
         "status": "healthy",
         "service": "course-generation",
         "endpoints": {
-            "generate": "/api/v1/generate_main/generate"
+            "generate": "/api/v1/generate_main/generate",
+            "generate_stream": "/api/v1/generate_main/generate/stream"
         }
     }
@@ -2,7 +2,7 @@
 Pydantic schemas for course generation API
 """
 
-from typing import List, Optional, Dict
+from typing import Any, List, Optional, Dict
 from pydantic import BaseModel, Field, field_validator
 
 
@@ -38,6 +38,10 @@ class CourseGenerateResponse(BaseModel):
         description="List of YouTube video URLs"
     )
     chat_response: Optional[str] = Field(None, description="Chat response (if intent is chat)")
+    timings: Optional[Dict[str, Any]] = Field(
+        None,
+        description="Per-stage wall/queue/LLM time, tokens, estimated cost and retries of this run"
+    )
 
     class Config:
         json_schema_extra = {
@@ -0,0 +1,135 @@
+"""
+Бенчмарк координатора: точность и задержка rule-based классификатора против LLM
+
+Размеченный набор - benchmarks/intent_queries.jsonl ({"query": ..., "intent": ...},
+для части запросов еще "group"). Решение правил верно, если совпали intent и,
+когда группа размечена, группа: неоднозначная группа должна уходить в LLM.
+
+    python -m ai_service.benchmarks.intent_benchmark
+    python -m ai_service.benchmarks.intent_benchmark --llm          # + реальные вызовы LLM
+    LLM_PROVIDER=stub python -m ai_service.benchmarks.intent_benchmark --llm   # офлайн, проверка обвязки
+    python -m ai_service.benchmarks.intent_benchmark --threshold 0.7 --verbose
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from pathlib import Path
+from ai_service.src.utils.intent_classifier import classify_intent, INTENT_RULES_THRESHOLD
+
+DATASET_PATH = Path(__file__).parent / "intent_queries.jsonl"
+
+
+def load_dataset(path: Path = DATASET_PATH):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _percentile(values, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def bench_rules(dataset, threshold: float, repeats: int):
+    """
+    Решения классификатора и задержка на запрос (лучшее из repeats прогонов, мкс)
+    """
+    results = []
+    for item in dataset:
+        best = None
+        for _ in range(repeats):
+            start = time.perf_counter_ns()
+            decision = classify_intent(item["query"])
+            elapsed = (time.perf_counter_ns() - start) / 1000
+            best = elapsed if best is None else min(best, elapsed)
+        results.append({
+            "query": item["query"],
+            "expected": item["intent"],
+            "intent": decision.intent,
+            "correct": decision.intent == item["intent"] and (
+                "group" not in item or decision.group == item["group"]
+            ),
+            "confidence": decision.confidence,
+            "covered": decision.confidence >= threshold,
+            "latency_us": best,
+        })
+    return results
+
+
+async def bench_llm(dataset):
+    """
+    Решения LLM-координатора и задержка на запрос (мс)
+    """
+    from ai_service.src.tools.agent_gen_tools.coordinator import _coordinate_with_llm
+    from ai_service.src.utils.states import State
+
+    results = []
+    for item in dataset:
+        state = State(query=item["query"])
+        start = time.perf_counter()
+        try:
+            await _coordinate_with_llm(state, classify_intent(item["query"]))
+        except Exception as e:
+            print(f"LLM error on {item['query']!r}: {e}")
+            state.intent = None
+        results.append({"intent": state.intent, "latency_ms": (time.perf_counter() - start) * 1000})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Coordinator intent benchmark")
+    parser.add_argument("--threshold", type=float, default=INTENT_RULES_THRESHOLD)
+    parser.add_argument("--repeats", type=int, default=200)
+    parser.add_argument("--llm", action="store_true", help="also call the LLM coordinator for every query")
+    parser.add_argument("--verbose", action="store_true", help="print every misclassified or uncovered query")
+    args = parser.parse_args()
+
+    dataset = load_dataset()
+    rules = bench_rules(dataset, args.threshold, args.repeats)
+    covered = [r for r in rules if r["covered"]]
+    latencies = [r["latency_us"] for r in rules]
+
+    print(f"Queries: {len(dataset)}, threshold: {args.threshold}")
+    print(
+        f"Rules: coverage {len(covered) / len(rules):.1%}, "
+        f"accuracy on covered {sum(r['correct'] for r in covered) / max(1, len(covered)):.1%}, "
+        f"best-guess accuracy on all {sum(r['correct'] for r in rules) / len(rules):.1%}"
+    )
+    print(
+        f"Rules latency: mean {statistics.mean(latencies):.1f}us, "
+        f"p50 {_percentile(latencies, 0.5):.1f}us, p95 {_percentile(latencies, 0.95):.1f}us"
+    )
+
+    if args.verbose:
+        for r in rules:
+            if not r["covered"] or not r["correct"]:
+                mark = "LLM " if not r["covered"] else "MISS"
+                print(f"  {mark} {r['confidence']:.2f} {r['intent']:<17} (expected {r['expected']}) {r['query']}")
+
+    if not args.llm:
+        return
+
+    llm = asyncio.run(bench_llm(dataset))
+    llm_latencies = [r["latency_ms"] for r in llm]
+    llm_correct = [r["intent"] == item["intent"] for r, item in zip(llm, dataset)]
+    tiered_correct = [
+        rule["correct"] if rule["covered"] else correct
+        for rule, correct in zip(rules, llm_correct)
+    ]
+    tiered_latencies = [
+        rule["latency_us"] / 1000 if rule["covered"] else rule["latency_us"] / 1000 + r["latency_ms"]
+        for rule, r in zip(rules, llm)
+    ]
+    print(
+        f"LLM only: accuracy {sum(llm_correct) / len(llm):.1%}, mean {statistics.mean(llm_latencies):.0f}ms, "
+        f"p95 {_percentile(llm_latencies, 0.95):.0f}ms"
+    )
+    print(
+        f"Tiered: accuracy {sum(tiered_correct) / len(rules):.1%}, mean {statistics.mean(tiered_latencies):.0f}ms, "
+        f"p95 {_percentile(tiered_latencies, 0.95):.0f}ms, LLM calls {len(rules) - len(covered)}/{len(rules)}"
+    )
+
+
+if __name__ == "__main__":
+    main()
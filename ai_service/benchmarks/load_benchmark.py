@@ -0,0 +1,83 @@
+"""
+Нагрузочный тест /generate: масштабирование по числу одновременных запросов
+
+Один экземпляр приложения (без uvicorn, через ASGI-транспорт httpx) получает
+пачки из 1, 5, 20, 50 одновременных запросов с разными темами (single-flight
+и кэш курсов их не объединяют). Граф полностью асинхронный, поэтому время
+пачки должно оставаться близким к времени одного запроса, а пропускная
+способность - расти почти линейно.
+
+По умолчанию LLM - stub-провайдер с задержкой из model_config.yaml, поиск
+YouTube заменен паузой --video-latency: тест меряет сам сервис, а не сеть.
+
+    python -m ai_service.benchmarks.load_benchmark
+    python -m ai_service.benchmarks.load_benchmark --levels 1 10 100 --video-latency 0.5
+    LLM_PROVIDER=openrouter python -m ai_service.benchmarks.load_benchmark --levels 1 5 --youtube   # реальные вызовы
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+import uuid
+
+os.environ.setdefault("LLM_PROVIDER", "stub")
+os.environ.setdefault("COURSE_CACHE_ENABLED", "false")
+
+import httpx  # noqa: E402
+from ai_service.api.main import app  # noqa: E402
+from ai_service.src.tools.agent_gen_tools import videos  # noqa: E402
+
+GENERATE_URL = "/api/v1/generate_main/generate"
+
+
+def _fake_video_search(latency: float):
+    async def search(smart_query: str) -> list:
+        await asyncio.sleep(latency)
+        return [f"https://www.youtube.com/watch?v={uuid.uuid4().hex[:11]}"]
+    return search
+
+
+async def _burst(client: httpx.AsyncClient, concurrency: int):
+    run_id = uuid.uuid4().hex[:6]
+
+    async def one(i: int) -> float:
+        start = time.perf_counter()
+        response = await client.post(GENERATE_URL, json={"query": f"Курс по теме Нагрузка {run_id} {i}"})
+        response.raise_for_status()
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(one(i) for i in range(concurrency)))
+    return time.perf_counter() - start, latencies
+
+
+async def main(levels, video_latency: float, youtube: bool):
+    if not youtube:
+        videos._search_videos = _fake_video_search(video_latency)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://ai-service", timeout=600) as client:
+        await _burst(client, 1)  # прогрев: сборка цепочек, импорты
+
+        baseline = None
+        print(f"{'concurrency':>11} {'wall, s':>8} {'p50, s':>7} {'p95, s':>7} {'req/s':>7} {'scaling':>8}")
+        for concurrency in levels:
+            wall, latencies = await _burst(client, concurrency)
+            ordered = sorted(latencies)
+            p95 = ordered[int(0.95 * (len(ordered) - 1))]
+            if baseline is None:
+                baseline = wall / concurrency
+            # Во сколько раз быстрее последовательного выполнения того же числа запросов
+            scaling = baseline * concurrency / wall
+            print(f"{concurrency:>11} {wall:>8.2f} {statistics.median(latencies):>7.2f} {p95:>7.2f} "
+                  f"{concurrency / wall:>7.1f} {scaling:>7.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Нагрузочный тест /generate")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 5, 20, 50], help="число одновременных запросов")
+    parser.add_argument("--video-latency", type=float, default=0.3, help="задержка заглушки поиска YouTube, с")
+    parser.add_argument("--youtube", action="store_true", help="реальный поиск YouTube (ограничен 1 запрос/с)")
+    args = parser.parse_args()
+    asyncio.run(main(args.levels, args.video_latency, args.youtube))
@@ -0,0 +1,98 @@
+"""
+Время импорта ai_service.api.main и задержка первого запроса
+
+Импорт меряется в отдельных процессах (холодный старт интерпретатора),
+первый запрос - через TestClient: прогрев LLM-клиентов в lifespan, сборка
+цепочек при первом использовании и повторное (кэшированное) обращение.
+
+    python -m ai_service.benchmarks.startup_benchmark
+    python -m ai_service.benchmarks.startup_benchmark --query "Present Simple"   # + реальный /generate
+    LLM_PROVIDER=stub python -m ai_service.benchmarks.startup_benchmark --query "Present Simple"   # офлайн
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+IMPORT_SNIPPET = (
+    "import time; start = time.perf_counter(); import ai_service.api.main; "
+    "print(time.perf_counter() - start)"
+)
+
+
+def measure_import(runs: int):
+    timings = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-c", IMPORT_SNIPPET], capture_output=True, text=True, check=True
+        )
+        timings.append(float(result.stdout.strip().splitlines()[-1]))
+    return timings
+
+
+def measure_chains():
+    """
+    Первая сборка всех цепочек пайплайна против обращения к кэшу реестра
+    """
+    from langchain_core.output_parsers import StrOutputParser
+    from ai_service.src.llm.registry import get_chain
+    from ai_service.src.prompt_engineering.gen_templates import (
+        prompt_summary, prompt_tests, prompt_coordinator, prompt_youtube, prompt_chat,
+    )
+
+    specs = [
+        ("coordinator", prompt_coordinator, {}),
+        ("summary", prompt_summary, {"tags": ["summary"]}),
+        ("tests", prompt_tests, {"profile": "tests"}),
+        ("youtube", prompt_youtube, {"profile": "tests"}),
+        ("chat", prompt_chat, {"tags": ["chat"]}),
+    ]
+    parser = StrOutputParser()
+    results = []
+    for attempt in ("first", "cached"):
+        start = time.perf_counter()
+        for name, prompt, kwargs in specs:
+            get_chain(name, prompt, parser, **kwargs)
+        results.append((attempt, time.perf_counter() - start))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AI service startup benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--query", help="also time two real /generate requests with this query")
+    args = parser.parse_args()
+
+    timings = measure_import(args.runs)
+    print(
+        f"Import ai_service.api.main: median {statistics.median(timings) * 1000:.0f}ms, "
+        f"min {min(timings) * 1000:.0f}ms ({args.runs} runs)"
+    )
+
+    from fastapi.testclient import TestClient
+    from ai_service.api.main import app
+
+    start = time.perf_counter()
+    with TestClient(app) as client:
+        print(f"Startup (lifespan, LLM warm-up): {(time.perf_counter() - start) * 1000:.0f}ms")
+        for attempt, elapsed in measure_chains():
+            print(f"Pipeline chains, {attempt}: {elapsed * 1000:.2f}ms")
+
+        for attempt in ("first", "second"):
+            start = time.perf_counter()
+            client.get("/health")
+            print(f"GET /health, {attempt}: {(time.perf_counter() - start) * 1000:.1f}ms")
+
+        if args.query:
+            for attempt in ("first", "second"):
+                start = time.perf_counter()
+                response = client.post("/api/v1/generate_main/generate", json={"query": args.query})
+                print(
+                    f"POST /generate, {attempt}: {(time.perf_counter() - start) * 1000:.0f}ms "
+                    f"(status {response.status_code})"
+                )
+
+
+if __name__ == "__main__":
+    main()
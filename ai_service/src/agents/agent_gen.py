@@ -1,7 +1,9 @@
 """
 Главный workflow с координатором и маршрутизацией между агентами
 """
+import asyncio
 import logging
+from typing import Any, AsyncIterator, Tuple
 from langgraph.graph import StateGraph, START, END
 from ai_service.src.tools.agent_gen_tools.coordinator import coordinator_tool
 from ai_service.src.agents.course_generation_agent import course_generation_agent
@@ -48,20 +50,67 @@ workflow.add_edge("Chat", END)
 agent = workflow.compile()
 
 
-def generate_c(query: str) -> State:
+async def agenerate_c(query: str) -> State:
     """
     Главная функция для генерации курса или чата
+    Все узлы графа асинхронные, поэтому вызов не блокирует event loop
     """
     try:
         initial_state = State(query=query)
-        result = agent.invoke(initial_state)
+        result = await agent.ainvoke(initial_state)
         return result
     except Exception as e:
-        logger.error(f"Error in generate_c: {e}", exc_info=True)
+        logger.error(f"Error in agenerate_c: {e}", exc_info=True)
         error_state = State(query=query)
         error_state.chat_response = f"Произошла ошибка: {str(e)}"
         return error_state
 
+
+# Тег цепочки -> имя события с токенами
+STREAM_TOKEN_EVENTS = {
+    "summary": "summary_token",
+    "chat": "chat_token",
+}
+
+
+async def astream_c(query: str) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Потоковая версия agenerate_c: отдает пары (event, data) по мере работы графа
+
+    События:
+    - coordinator: решение координатора (intent, topic, group)
+    - summary_token / chat_token: токены конспекта или ответа чата
+    - summary, tests, videos: готовый результат этапа
+    - done: итоговый State
+    - error: ошибка выполнения графа
+    """
+    try:
+        async for event in agent.astream_events(State(query=query), version="v2"):
+            kind = event["event"]
+            if kind == "on_custom_event":
+                yield event["name"], event["data"]
+            elif kind == "on_chat_model_stream":
+                content = getattr(event["data"].get("chunk"), "content", None)
+                if not content:
+                    continue
+                for tag, name in STREAM_TOKEN_EVENTS.items():
+                    if tag in event.get("tags", []):
+                        yield name, content
+                        break
+            elif kind == "on_chain_end" and not event.get("parent_ids"):
+                yield "done", event["data"].get("output")
+    except Exception as e:
+        logger.error(f"Error in astream_c: {e}", exc_info=True)
+        yield "error", {"message": f"Произошла ошибка: {str(e)}"}
+
+
+def generate_c(query: str) -> State:
+    """
+    Синхронная обертка над agenerate_c для скриптов и CLI
+    Не вызывать из работающего event loop - используйте agenerate_c
+    """
+    return asyncio.run(agenerate_c(query))
+
 if __name__ == "__main__":
     print("Проверка!")
     query = input("Введите тему: ")
@@ -5,32 +5,35 @@ import logging
 from langchain_core.output_parsers import StrOutputParser
 from ai_service.src.prompt_engineering.gen_templates import prompt_chat
 from ai_service.src.utils.states import State
-from ai_service.src.llm.openrouter import llm_s
+from ai_service.src.llm.registry import get_chain
+from ai_service.src.utils.metrics import track_stage
 
 logger = logging.getLogger(__name__)
 
 output = StrOutputParser()
-chain = prompt_chat | llm_s | output
 
 
-def chat_agent(state: State) -> State:
+async def chat_agent(state: State) -> State:
     """
     Чат агент обрабатывает обычные вопросы и беседы
     """
-    try:
-        query = state.query
-        response = chain.invoke({"query": query})
+    with track_stage("chat"):
+        try:
+            query = state.query
+            # Тег нужен потоковому endpoint: по нему отбираются токены ответа
+            chain = get_chain("chat", prompt_chat, output, tags=["chat"])
+            response = await chain.ainvoke({"query": query})
         
-        if hasattr(response, "content"):
-            response = response.content
-        response = str(response).strip()
+            if hasattr(response, "content"):
+                response = response.content
+            response = str(response).strip()
         
-        state.chat_response = response
-        logger.info(f"Chat agent generated response for query: {query[:50]}...")
+            state.chat_response = response
+            logger.info(f"Chat agent generated response for query: {query[:50]}...")
         
-    except Exception as e:
-        logger.error(f"Error in chat_agent: {e}", exc_info=True)
-        state.chat_response = f"Извините, произошла ошибка при обработке вашего запроса: {str(e)}"
+        except Exception as e:
+            logger.error(f"Error in chat_agent: {e}", exc_info=True)
+            state.chat_response = f"Извините, произошла ошибка при обработке вашего запроса: {str(e)}"
     
-    return state
+        return state
 
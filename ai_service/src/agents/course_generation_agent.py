@@ -1,42 +1,94 @@
 """
 Агент генерации курсов - создает конспект, тесты и видео
 """
+import asyncio
 import logging
 from ai_service.src.tools.agent_gen_tools.summary import summary_tool
 from ai_service.src.tools.agent_gen_tools.test import gentest_tool
 from ai_service.src.tools.agent_gen_tools.videos import video_tool
 from ai_service.src.utils.states import State
+from ai_service.src.utils.course_cache import course_cache
+from ai_service.src.utils.events import emit_stage
 
 logger = logging.getLogger(__name__)
 
+# Этапы не зависят друг от друга: каждый читает только тему и пишет свое поле
+STAGES = (
+    ("summary", summary_tool),
+    ("tests", gentest_tool),
+    ("videos", video_tool),
+)
 
-def course_generation_agent(state: State) -> State:
+
+def _stage_fallback(field: str, error: Exception):
+    """
+    Значение поля State, если этап упал целиком
+    """
+    if field == "summary":
+        return f"Ошибка при генерации конспекта: {str(error)}"
+    return []
+
+
+def _is_cacheable(state: State) -> bool:
+    """
+    В кэш попадают только полноценные курсы, без fallback-значений
     """
-    Агент генерации курсов последовательно создает:
+    summary = state.summary or ""
+    if not summary or summary.startswith("Ошибка") or "не удалось сгенерировать" in summary:
+        return False
+    return bool(state.tests)
+
+
+async def _run_stage(field: str, tool, state: State) -> State:
+    """
+    Выполняет этап и сразу сообщает его результат потоковому клиенту
+    """
+    partial = await tool(state)
+    await emit_stage(field, getattr(partial, field))
+    return partial
+
+
+async def course_generation_agent(state: State) -> State:
+    """
+    Агент генерации курсов параллельно создает:
     1. Конспект (summary)
     2. Тесты (tests)
     3. Видео (videos)
+
+    Каждый инструмент работает со своей копией State, результаты сливаются
+    обратно, поэтому время генерации определяется самым медленным этапом.
+    Перед генерацией проверяется кэш по нормализованной теме и группе.
     """
     try:
-        original_query = state.query
-        if state.topic:
-            state.query = state.topic
-        
-        logger.info(f"Starting course generation for topic: {state.topic or state.query}")
-        
-        state = summary_tool(state)
-        logger.info("Summary generated")
-        
-        state = gentest_tool(state)
-        logger.info("Tests generated")
-        
-        state = video_tool(state)
-        logger.info("Videos found")
-        
-        state.query = original_query
-        
+        topic = state.topic or state.query
+
+        cached = await course_cache.get(topic, state.group)
+        if cached is not None:
+            for field, _ in STAGES:
+                setattr(state, field, cached.get(field))
+                await emit_stage(field, getattr(state, field))
+            return state
+
+        logger.info(f"Starting course generation for topic: {topic}")
+
+        results = await asyncio.gather(
+            *(_run_stage(field, tool, state.model_copy(update={"query": topic})) for field, tool in STAGES),
+            return_exceptions=True
+        )
+
+        for (field, _), partial in zip(STAGES, results):
+            if isinstance(partial, Exception):
+                logger.error(f"Stage '{field}' failed: {partial}", exc_info=partial)
+                setattr(state, field, _stage_fallback(field, partial))
+            else:
+                setattr(state, field, getattr(partial, field))
+                logger.info(f"Stage '{field}' completed")
+
+        if _is_cacheable(state):
+            await course_cache.set(topic, state.group, state.model_dump())
+
         logger.info("Course generation completed successfully")
-        
+
     except Exception as e:
         logger.error(f"Error in course_generation_agent: {e}", exc_info=True)
         if not state.summary:
@@ -45,6 +97,5 @@ def course_generation_agent(state: State) -> State:
             state.tests = []
         if not state.videos:
             state.videos = []
-    
-    return state
 
+    return state
@@ -1,29 +1,21 @@
-import os
-from dotenv import load_dotenv
-import yaml
-from langchain_openai import OpenAI
+"""
+OpenAI LLM
 
-config_path = os.path.normpath("C:/Users/User/Desktop/projects/SuzyMiniCourse/ai_service/config/model_config.yaml")
+Клиенты строятся лениво через registry: `from ai_service.src.llm.openai import llm_s`
+создает клиент при первом обращении к атрибуту, а не при импорте модуля.
+"""
+from ai_service.src.llm.registry import get_llm
 
-def load_configs(path=config_path):
-    load_dotenv()
-    with open(path, 'r') as f:
-        raw = f.read()
-    resolved = os.path.expandvars(raw)
-    return yaml.safe_load(resolved)
+PROVIDER = "openai"
 
-config = load_configs()
 
-llm_s = OpenAI(
-    model=config['openai']['model'],
-    temperature=config['openai']['temperature'],
-    max_tokens=config['openai']['max_tokens'],
-    api_key=os.getenv('OPENAI_API_KEY', config['openai']['api_key'])
-)
+def create_openai_llm(model_name, max_tokens, temperature):
+    return get_llm(PROVIDER, model=model_name, max_tokens=max_tokens, temperature=temperature)
 
-llm_t = OpenAI(
-    model=config['openai_tests']['model'],
-    temperature=config['openai_tests']['temperature'],
-    max_tokens=config['openai_tests']['max_tokens'],
-    api_key=os.getenv('OPENAI_API_KEY', config['openai_tests']['api_key'])
-)
+
+def __getattr__(name):
+    if name == "llm_s":
+        return get_llm(PROVIDER)
+    if name == "llm_t":
+        return get_llm(PROVIDER, profile="tests")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
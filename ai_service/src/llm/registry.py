@@ -0,0 +1,250 @@
+"""
+Реестр LLM-провайдеров
+
+LLM-клиенты и цепочки строятся лениво, при первом использовании, и
+кэшируются по (provider, model, max_tokens, temperature). Все клиенты
+OpenAI-совместимых провайдеров (OpenRouter, OpenAI, Together) ходят через
+один общий пул HTTP-соединений, поэтому llm_s и llm_t переиспользуют
+keep-alive соединения вместо отдельного пула на каждую модель.
+
+Провайдер по умолчанию - "router": вызов уходит в провайдеров из секции
+routing model_config.yaml с failover и хеджированием (см. router.py).
+LLM_PROVIDER=stub переключает весь пайплайн на локальную stub-модель.
+"""
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence, Tuple
+import httpx
+import yaml
+from dotenv import load_dotenv
+from langchain_core.runnables import Runnable
+from ai_service.src.llm.router import ROUTER, LLMRouter, RoutedLLM
+from ai_service.src.utils.metrics import LLMMetricsCallback
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+CONFIG_PATH = Path(__file__).parent.parent.parent / "config" / "model_config.yaml"
+
+DEFAULT_PROVIDER = os.getenv("LLM_PROVIDER", ROUTER)
+LLM_HTTP_MAX_CONNECTIONS = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "100"))
+LLM_HTTP_MAX_KEEPALIVE = int(os.getenv("LLM_HTTP_MAX_KEEPALIVE", "20"))
+LLM_HTTP_KEEPALIVE_EXPIRY = float(os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY", "30"))
+LLM_HTTP_TIMEOUT = float(os.getenv("LLM_HTTP_TIMEOUT", "120"))
+LLM_WARMUP = os.getenv("LLM_WARMUP", "true").lower() == "true"
+
+# provider -> (секция model_config.yaml, переменная окружения с ключом, base_url)
+PROVIDERS: Dict[str, Tuple[str, Optional[str], Optional[str]]] = {
+    "openrouter": ("openrouter", "OPENROUTER_API_KEY", "https://openrouter.ai/api/v1"),
+    "openai": ("openai", "OPENAI_API_KEY", None),
+    "together": ("together", "TOGETHER_API_KEY", "https://api.together.xyz/v1"),
+    "stub": ("stub", None, None),
+}
+
+# Профили параметров поверх секции провайдера
+PROFILES: Dict[str, Dict[str, Any]] = {
+    "default": {},
+    # Тесты и поисковые запросы: длинный JSON, меньше креативности
+    "tests": {"max_tokens": 2000, "temperature": 0.4},
+}
+
+_lock = threading.RLock()
+_config: Optional[Dict] = None
+_llms: Dict[Tuple, Any] = {}
+_chains: Dict[Tuple, Runnable] = {}
+_http_client: Optional[httpx.Client] = None
+_http_async_client: Optional[httpx.AsyncClient] = None
+_router: Optional[LLMRouter] = None
+
+
+def load_model_config(path: Optional[Path] = None) -> Dict:
+    """
+    model_config.yaml с подставленными переменными окружения (читается один раз)
+    """
+    global _config
+    if path is not None:
+        return _read_config(Path(path))
+    if _config is None:
+        _config = _read_config(CONFIG_PATH)
+    return _config
+
+
+def _read_config(path: Path) -> Dict:
+    if not path.exists():
+        raise FileNotFoundError(f"Config file not found: {path}")
+    with open(path, "r", encoding="utf-8") as f:
+        raw = f.read()
+    return yaml.safe_load(os.path.expandvars(raw))
+
+
+def _http_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=LLM_HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=LLM_HTTP_MAX_KEEPALIVE,
+        keepalive_expiry=LLM_HTTP_KEEPALIVE_EXPIRY,
+    )
+
+
+def get_http_clients() -> Tuple[httpx.Client, httpx.AsyncClient]:
+    """
+    Общие HTTP-клиенты (sync для .invoke, async для .ainvoke) всех LLM
+    """
+    global _http_client, _http_async_client
+    with _lock:
+        if _http_client is None:
+            _http_client = httpx.Client(limits=_http_limits(), timeout=LLM_HTTP_TIMEOUT)
+        if _http_async_client is None:
+            _http_async_client = httpx.AsyncClient(limits=_http_limits(), timeout=LLM_HTTP_TIMEOUT)
+        return _http_client, _http_async_client
+
+
+def get_router() -> LLMRouter:
+    """
+    Общий роутер провайдеров (секция routing в model_config.yaml)
+    """
+    global _router
+    with _lock:
+        if _router is None:
+            routing = load_model_config().get("routing") or {}
+            _router = LLMRouter.from_config(routing, default_provider="openrouter")
+            unknown = [provider for provider in _router.providers if provider not in PROVIDERS]
+            if unknown:
+                raise ValueError(f"Unknown LLM providers in routing config: {unknown}")
+        return _router
+
+
+def _llm_key(provider: Optional[str], profile: str, overrides: Dict[str, Any]) -> Tuple:
+    """
+    (provider, model, max_tokens, temperature) с учетом секции конфига, профиля и явных параметров
+    Для роутера модель своя у каждого провайдера: (router, profile, max_tokens, temperature)
+    """
+    provider = provider or DEFAULT_PROVIDER
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown LLM profile: {profile}")
+    if provider == ROUTER:
+        return ROUTER, profile, overrides.get("max_tokens"), overrides.get("temperature")
+    if provider not in PROVIDERS:
+        raise ValueError(f"Unknown LLM provider: {provider}")
+    section = load_model_config().get(PROVIDERS[provider][0]) or {}
+    params = {
+        "model": section.get("model", provider),
+        "max_tokens": section.get("max_tokens"),
+        "temperature": section.get("temperature"),
+    }
+    params.update(PROFILES[profile])
+    params.update({key: value for key, value in overrides.items() if value is not None})
+    return provider, params["model"], params["max_tokens"], params["temperature"]
+
+
+def _build_router_llm(profile: str, max_tokens: Optional[int], temperature: Optional[float]) -> RoutedLLM:
+    router = get_router()
+    llms = {
+        provider: get_llm(provider, profile, max_tokens=max_tokens, temperature=temperature)
+        for provider in router.providers
+    }
+    return RoutedLLM(router, llms)
+
+
+def _build_llm(provider: str, model: str, max_tokens: int, temperature: float):
+    section_name, api_key_env, base_url = PROVIDERS[provider]
+    section = load_model_config().get(section_name) or {}
+    metrics_callback = LLMMetricsCallback(
+        provider,
+        price_prompt_per_1m=float(section.get("price_prompt_per_1m", 0)),
+        price_completion_per_1m=float(section.get("price_completion_per_1m", 0)),
+    )
+    if provider == "stub":
+        from ai_service.src.llm.stub import StubChatModel
+
+        return StubChatModel(
+            model_name=model, latency=float(section.get("latency", 0)), callbacks=[metrics_callback]
+        )
+
+    from langchain_openai import ChatOpenAI
+
+    http_client, http_async_client = get_http_clients()
+    logger.info(f"Building LLM client: provider={provider}, model={model}")
+    return ChatOpenAI(
+        model=model,
+        openai_api_key=os.getenv(api_key_env, section.get("api_key")),
+        openai_api_base=base_url,
+        max_tokens=max_tokens,
+        temperature=temperature,
+        timeout=LLM_HTTP_TIMEOUT,
+        # Повторы делает retry_policy с учетом вида ошибки и бюджета запроса
+        max_retries=0,
+        http_client=http_client,
+        http_async_client=http_async_client,
+        # usage в потоковом режиме (astream_events) - для учета токенов
+        stream_usage=True,
+        callbacks=[metrics_callback],
+    )
+
+
+def get_llm(provider: Optional[str] = None, profile: str = "default",
+            model: Optional[str] = None, max_tokens: Optional[int] = None,
+            temperature: Optional[float] = None):
+    """
+    LLM-клиент провайдера; один экземпляр на (provider, model, max_tokens, temperature)
+    """
+    key = _llm_key(provider, profile, {"model": model, "max_tokens": max_tokens, "temperature": temperature})
+    llm = _llms.get(key)
+    if llm is None:
+        with _lock:
+            llm = _llms.get(key)
+            if llm is None:
+                llm = _build_router_llm(*key[1:]) if key[0] == ROUTER else _build_llm(*key)
+                _llms[key] = llm
+    return llm
+
+
+def get_chain(name: str, prompt: Runnable, parser: Optional[Runnable] = None,
+              tags: Optional[Sequence[str]] = None, provider: Optional[str] = None,
+              profile: str = "default", **params) -> Runnable:
+    """
+    Цепочка prompt | llm | parser, собранная один раз
+
+    Args:
+        name: Имя цепочки; вместе с параметрами LLM образует ключ кэша
+        prompt: Шаблон промпта
+        parser: Парсер ответа (опционально)
+        tags: Теги для callbacks/astream_events (например, "summary")
+        provider, profile, params: Параметры LLM, см. get_llm
+    """
+    key = (name,) + _llm_key(provider, profile, params)
+    chain = _chains.get(key)
+    if chain is None:
+        chain = prompt | get_llm(provider, profile, **params)
+        if parser is not None:
+            chain = chain | parser
+        # Имя цепочки в metadata - этап для метрик LLM-вызовов вне track_stage
+        chain = chain.with_config(tags=list(tags or []), metadata={"llm_chain": name})
+        _chains[key] = chain
+    return chain
+
+
+def warm_up(profiles: Sequence[str] = ("default", "tests")):
+    """
+    Заранее строит клиенты провайдера по умолчанию, чтобы первый запрос
+    не платил за импорт langchain_openai и создание клиентов
+    """
+    for profile in profiles:
+        get_llm(profile=profile)
+
+
+async def aclose_llm_clients():
+    """
+    Закрывает общий пул соединений и сбрасывает кэш клиентов и цепочек
+    """
+    global _http_client, _http_async_client
+    _chains.clear()
+    _llms.clear()
+    if _http_async_client is not None:
+        await _http_async_client.aclose()
+        _http_async_client = None
+    if _http_client is not None:
+        _http_client.close()
+        _http_client = None
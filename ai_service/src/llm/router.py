@@ -0,0 +1,234 @@
+"""
+Маршрутизация LLM-вызовов между провайдерами
+
+LLMRouter хранит скользящую статистику по каждому провайдеру (p50/p95
+задержки и доля ошибок) и задает порядок попыток: провайдеры в порядке
+приоритета из model_config.yaml, "нездоровые" (доля ошибок выше порога) -
+в конце. RoutedLLM - Runnable поверх клиентов провайдеров:
+
+- failover: ошибка провайдера -> вызов следующего по порядку
+- hedging: если ответ не пришел за hedge_after секунд (или за p95 основного
+  провайдера при hedge_after: auto), параллельно запускается следующий
+  провайдер, побеждает первый ответ, проигравший вызов отменяется
+
+Потоковые запуски (astream_events/astream_log) не хеджируются: основной
+вызов уже отдал клиенту часть токенов, и победа "тихого" хеджа заменила бы
+их другим текстом. Для них остается только failover.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional, Union
+from langchain_core.runnables import Runnable, RunnableConfig
+from langchain_core.runnables.config import ensure_config
+
+logger = logging.getLogger(__name__)
+
+ROUTER = "router"
+
+
+def _percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class LLMFailoverError(RuntimeError):
+    """Ни один провайдер не ответил; последняя ошибка провайдера - в __cause__"""
+
+
+class ProviderStats:
+    """Скользящее окно последних вызовов провайдера (не старше ttl секунд)"""
+
+    __slots__ = ("calls", "ttl")
+
+    def __init__(self, window: int, ttl: float):
+        # (monotonic time, latency, ok)
+        self.calls: deque = deque(maxlen=window)
+        self.ttl = ttl
+
+    def record(self, latency: float, ok: bool):
+        self.calls.append((time.monotonic(), latency, ok))
+
+    def _recent(self):
+        horizon = time.monotonic() - self.ttl
+        return [call for call in self.calls if call[0] >= horizon]
+
+    def snapshot(self) -> Dict[str, Any]:
+        recent = self._recent()
+        latencies = [latency for _, latency, ok in recent if ok]
+        errors = sum(1 for _, _, ok in recent if not ok)
+        return {
+            "calls": len(recent),
+            "p50": _percentile(latencies, 0.5),
+            "p95": _percentile(latencies, 0.95),
+            "error_rate": errors / len(recent) if recent else 0.0,
+            "successes": len(latencies),
+        }
+
+
+class LLMRouter:
+    """Порядок провайдеров и задержка хеджирования по статистике вызовов"""
+
+    def __init__(self, providers: List[str], hedge_after: Union[float, str, None] = None,
+                 window: int = 100, ttl: float = 300, min_samples: int = 10,
+                 max_error_rate: float = 0.5):
+        if not providers:
+            raise ValueError("LLM router needs at least one provider")
+        self.providers = list(providers)
+        self.hedge_after = hedge_after
+        self.min_samples = min_samples
+        self.max_error_rate = max_error_rate
+        self.stats = {provider: ProviderStats(window, ttl) for provider in self.providers}
+
+    @classmethod
+    def from_config(cls, routing: Dict[str, Any], default_provider: str) -> "LLMRouter":
+        return cls(
+            providers=routing.get("providers") or [default_provider],
+            hedge_after=routing.get("hedge_after"),
+            window=int(routing.get("stats_window", 100)),
+            ttl=float(routing.get("stats_ttl", 300)),
+            min_samples=int(routing.get("min_samples", 10)),
+            max_error_rate=float(routing.get("max_error_rate", 0.5)),
+        )
+
+    def is_healthy(self, provider: str) -> bool:
+        snapshot = self.stats[provider].snapshot()
+        return snapshot["calls"] < self.min_samples or snapshot["error_rate"] <= self.max_error_rate
+
+    def order(self) -> List[str]:
+        """
+        Порядок попыток: здоровые по приоритету, затем нездоровые по доле ошибок
+        """
+        healthy = [provider for provider in self.providers if self.is_healthy(provider)]
+        unhealthy = sorted(
+            (provider for provider in self.providers if provider not in healthy),
+            key=lambda provider: self.stats[provider].snapshot()["error_rate"]
+        )
+        return healthy + unhealthy
+
+    def hedge_delay(self, provider: str) -> Optional[float]:
+        """
+        Через сколько секунд без ответа запускать запасной вызов (None - не хеджировать)
+        """
+        if not self.hedge_after:
+            return None
+        if self.hedge_after == "auto":
+            snapshot = self.stats[provider].snapshot()
+            if snapshot["successes"] < self.min_samples:
+                return None
+            return snapshot["p95"]
+        return float(self.hedge_after)
+
+    def record(self, provider: str, latency: float, ok: bool):
+        self.stats[provider].record(latency, ok)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            provider: {**self.stats[provider].snapshot(), "healthy": self.is_healthy(provider)}
+            for provider in self.providers
+        }
+
+
+class RoutedLLM(Runnable):
+    """LLM, который выбирает провайдера на каждый вызов через LLMRouter"""
+
+    def __init__(self, router: LLMRouter, llms: Dict[str, Runnable]):
+        self.router = router
+        self.llms = llms
+
+    def _order(self) -> List[str]:
+        order = [provider for provider in self.router.order() if provider in self.llms]
+        if not order:
+            raise LLMFailoverError("No LLM providers available for routing")
+        return order
+
+    @staticmethod
+    def _is_streaming(config: RunnableConfig) -> bool:
+        # Обработчики astream_events/astream_log реализуют tap_output_aiter
+        callbacks = config.get("callbacks")
+        handlers = getattr(callbacks, "handlers", callbacks) or []
+        return any(hasattr(handler, "tap_output_aiter") for handler in handlers)
+
+    @staticmethod
+    def _provider_config(config: RunnableConfig, provider: str, quiet: bool = False) -> RunnableConfig:
+        # Провайдер виден callbacks в metadata; "тихий" хедж-вызов не пишет токены в поток
+        provider_config = {**config, "metadata": {**config.get("metadata", {}), "llm_provider": provider}}
+        if quiet:
+            # [] а не None: None ensure_config заменит callbacks родительской цепочки
+            provider_config["callbacks"] = []
+        return provider_config
+
+    def invoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        config = ensure_config(config)
+        last_error: Optional[BaseException] = None
+        for provider in self._order():
+            start = time.monotonic()
+            try:
+                result = self.llms[provider].invoke(input, self._provider_config(config, provider), **kwargs)
+            except Exception as e:
+                self.router.record(provider, time.monotonic() - start, ok=False)
+                logger.warning(f"LLM provider {provider} failed, failing over: {e}")
+                last_error = e
+                continue
+            self.router.record(provider, time.monotonic() - start, ok=True)
+            return result
+        raise LLMFailoverError(f"All LLM providers failed: {last_error}") from last_error
+
+    async def _acall(self, provider: str, input: Any, config: RunnableConfig, **kwargs: Any) -> Any:
+        start = time.monotonic()
+        try:
+            result = await self.llms[provider].ainvoke(input, config, **kwargs)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.router.record(provider, time.monotonic() - start, ok=False)
+            raise
+        self.router.record(provider, time.monotonic() - start, ok=True)
+        return result
+
+    async def ainvoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        config = ensure_config(config)
+        queue = self._order()
+        tasks: Dict[asyncio.Task, str] = {}
+        last_error: Optional[BaseException] = None
+        # Токены основного вызова уже ушли клиенту - хедж их не заменит
+        hedged = self._is_streaming(config)
+
+        def launch(quiet: bool = False):
+            provider = queue.pop(0)
+            task = asyncio.create_task(
+                self._acall(provider, input, self._provider_config(config, provider, quiet), **kwargs)
+            )
+            tasks[task] = provider
+
+        launch()
+        try:
+            while tasks:
+                delay = None
+                if queue and not hedged and len(tasks) == 1:
+                    delay = self.router.hedge_delay(next(iter(tasks.values())))
+                done, _ = await asyncio.wait(tasks, timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    hedged = True
+                    logger.info(f"LLM call exceeded {delay:.2f}s, hedging with {queue[0]}")
+                    launch(quiet=True)
+                    continue
+
+                for task in done:
+                    provider = tasks.pop(task)
+                    error = task.exception()
+                    if error is None:
+                        return task.result()
+                    logger.warning(f"LLM provider {provider} failed: {error}")
+                    last_error = error
+
+                if not tasks and queue:
+                    logger.info(f"Failing over to LLM provider {queue[0]}")
+                    launch()
+            raise LLMFailoverError(f"All LLM providers failed: {last_error}") from last_error
+        finally:
+            for task in tasks:
+                task.cancel()
@@ -0,0 +1,126 @@
+"""
+Локальный stub-провайдер LLM для тестов и бенчмарков
+
+Отвечает детерминированно и без сети, распознавая промпт по содержимому:
+координатор получает JSON с намерением, тесты - валидный JSON с вопросами,
+конспект, поисковый запрос YouTube и чат - короткий текст по теме.
+Задержка ответа настраивается, чтобы проверять роутер и хеджирование.
+"""
+import asyncio
+import json
+import re
+import time
+from typing import Any, AsyncIterator, Iterator, List, Optional
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+_TOPIC_RE = re.compile(r'теме "([^"]+)"')
+_COORDINATOR_QUERY_RE = re.compile(r'ПОЛЬЗОВАТЕЛЬСКИЙ ЗАПРОС:\s*"([^"]*)"')
+_CHAT_QUERY_RE = re.compile(r'Пользователь спрашивает: "([^"]*)"')
+
+
+def _prompt_text(messages: List[BaseMessage]) -> str:
+    return "\n".join(str(message.content) for message in messages)
+
+
+def _topic(prompt: str) -> str:
+    match = _TOPIC_RE.search(prompt) or _COORDINATOR_QUERY_RE.search(prompt) or _CHAT_QUERY_RE.search(prompt)
+    return match.group(1) if match else "тема"
+
+
+def stub_response(prompt: str) -> str:
+    """
+    Ответ stub-модели на промпт пайплайна
+    """
+    topic = _topic(prompt)
+    if "координатор" in prompt:
+        return json.dumps({"intent": "course_generation", "topic": topic, "group": None}, ensure_ascii=False)
+    if '"questions"' in prompt:
+        questions = [
+            {
+                "text": f"Вопрос {i} по теме «{topic}»: какое утверждение верно?",
+                "options": [f"Утверждение {letter}" for letter in "ABCD"],
+                "correct_answer": f"Утверждение {'ABCD'[i % 4]}",
+            }
+            for i in range(1, 6)
+        ]
+        return "```json\n" + json.dumps({"title": f"Тест: {topic}", "questions": questions}, ensure_ascii=False) + "\n```"
+    if "YouTube" in prompt:
+        return f"{topic} урок для начинающих"
+    if "конспект" in prompt:
+        return (
+            f"# {topic}\n\n"
+            f"- Определение: {topic} - ключевое понятие темы.\n"
+            f"- Основные идеи: от общего к частному, с примерами.\n"
+            f"- Пример: типичная задача по теме «{topic}» и ее разбор.\n"
+        )
+    return f"Это тестовый ответ stub-модели на вопрос «{topic}»."
+
+
+class StubChatModel(BaseChatModel):
+    """Детерминированная chat-модель без сети"""
+
+    model_name: str = "stub"
+    latency: float = 0.0  # секунд на ответ
+    fail: bool = False  # всегда падать - для проверки failover
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub"
+
+    def _respond(self, messages: List[BaseMessage]) -> str:
+        if self.fail:
+            raise RuntimeError("Stub LLM failure")
+        return stub_response(_prompt_text(messages))
+
+    @staticmethod
+    def _usage(messages: List[BaseMessage], content: str) -> dict:
+        # Токены приблизительно по словам - чтобы метрики работали и офлайн
+        prompt_tokens = len(_prompt_text(messages).split())
+        completion_tokens = len(content.split())
+        return {
+            "input_tokens": prompt_tokens,
+            "output_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+
+    def _result(self, messages: List[BaseMessage]) -> ChatResult:
+        content = self._respond(messages)
+        message = AIMessage(content=content, usage_metadata=self._usage(messages, content))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _chunks(self, messages: List[BaseMessage]) -> Iterator[ChatGenerationChunk]:
+        content = self._respond(messages)
+        for token in re.split(r"(?<=\s)", content):
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+        # usage последним пустым чанком - как OpenAI при stream_usage
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=self._usage(messages, content)))
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        time.sleep(self.latency)
+        return self._result(messages)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Optional[AsyncCallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        return self._result(messages)
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        time.sleep(self.latency)
+        for chunk in self._chunks(messages):
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+                       **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        await asyncio.sleep(self.latency)
+        for chunk in self._chunks(messages):
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
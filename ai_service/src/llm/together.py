@@ -1,22 +1,21 @@
-import os
-import yaml
-from langchain_together import Together
+"""
+Together LLM
 
-config_path = os.path.normpath("C:/Users/User/Desktop/projects/SuzyMiniCourse/ai_service/config/model_config.yaml")
+Клиенты строятся лениво через registry: `from ai_service.src.llm.together import llm_s`
+создает клиент при первом обращении к атрибуту, а не при импорте модуля.
+"""
+from ai_service.src.llm.registry import get_llm
 
-with open(config_path, 'r', encoding='utf-8') as f:
-    config = yaml.safe_load(f)
+PROVIDER = "together"
 
-llm_s = Together(
-    model=config['together']['model'],
-    together_api_key=os.getenv('TOGETHER_API_KEY', config['together']['api_key']),
-    max_tokens=config['together']['max_tokens'],
-    temperature=config['together']['temperature']
-)
 
-llm_t = Together(
-    model=config['together']['model'],
-    together_api_key=os.getenv('TOGETHER_API_KEY', config['together']['api_key']),
-    max_tokens=2000,
-    temperature=0.4
-)
\ No newline at end of file
+def create_together_llm(model_name, max_tokens, temperature):
+    return get_llm(PROVIDER, model=model_name, max_tokens=max_tokens, temperature=temperature)
+
+
+def __getattr__(name):
+    if name == "llm_s":
+        return get_llm(PROVIDER)
+    if name == "llm_t":
+        return get_llm(PROVIDER, profile="tests")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -6,54 +6,86 @@ import logging
 from langchain_core.output_parsers import StrOutputParser
 from ai_service.src.prompt_engineering.gen_templates import prompt_coordinator
 from ai_service.src.utils.states import State
-from ai_service.src.llm.openrouter import llm_s
+from ai_service.src.utils.events import emit_stage
+from ai_service.src.utils.intent_classifier import (
+    IntentDecision,
+    classify_intent,
+    INTENT_RULES_ENABLED,
+    INTENT_RULES_THRESHOLD,
+)
+from ai_service.src.llm.registry import get_chain
+from ai_service.src.utils.metrics import track_stage
 
 logger = logging.getLogger(__name__)
 
 output = StrOutputParser()
-chain = prompt_coordinator | llm_s | output
 
 
-def coordinator_tool(state: State) -> State:
+async def _coordinate_with_llm(state: State, decision: IntentDecision) -> str:
+    """
+    Решение LLM-координатора; при невалидном JSON - лучшая догадка классификатора
+    Возвращает источник решения: "llm" или "rules"
+    """
+    query = state.query
+    chain = get_chain("coordinator", prompt_coordinator, output)
+    response = await chain.ainvoke({"query": query})
+    
+    try:
+        response_clean = response.strip()
+        if response_clean.startswith("```json"):
+            response_clean = response_clean[7:]
+        if response_clean.startswith("```"):
+            response_clean = response_clean[3:]
+        if response_clean.endswith("```"):
+            response_clean = response_clean[:-3]
+        response_clean = response_clean.strip()
+        
+        coord_data = json.loads(response_clean)
+        
+        state.intent = coord_data.get("intent", "chat")
+        state.topic = coord_data.get("topic")
+        state.group = coord_data.get("group")
+        
+        logger.info(f"Coordinator determined: intent={state.intent}, topic={state.topic}, group={state.group}")
+        return "llm"
+        
+    except json.JSONDecodeError as e:
+        logger.warning(f"Failed to parse coordinator response as JSON: {e}. Response: {response}")
+        state.intent = decision.intent
+        if decision.intent == "course_generation":
+            state.topic = decision.topic or query
+            state.group = decision.group
+        return "rules"
+
+
+async def coordinator_tool(state: State) -> State:
     """
     Координатор определяет:
     1. Намерение (intent): "course_generation" или "chat"
     2. Тему курса (topic): если intent="course_generation"
     3. Группу (group): тематическая группа для графа
+
+    Очевидные запросы решает rule-based классификатор за микросекунды,
+    в LLM уходят только неоднозначные
     """
-    try:
-        query = state.query
-        response = chain.invoke({"query": query})
-        
+    with track_stage("coordinator"):
+        source = "rules"
         try:
-            response_clean = response.strip()
-            if response_clean.startswith("```json"):
-                response_clean = response_clean[7:]
-            if response_clean.startswith("```"):
-                response_clean = response_clean[3:]
-            if response_clean.endswith("```"):
-                response_clean = response_clean[:-3]
-            response_clean = response_clean.strip()
-            
-            coord_data = json.loads(response_clean)
-            
-            state.intent = coord_data.get("intent", "chat")
-            state.topic = coord_data.get("topic")
-            state.group = coord_data.get("group")
-            
-            logger.info(f"Coordinator determined: intent={state.intent}, topic={state.topic}, group={state.group}")
-            
-        except json.JSONDecodeError as e:
-            logger.warning(f"Failed to parse coordinator response as JSON: {e}. Response: {response}")
-            query_lower = query.lower()
-            if any(word in query_lower for word in ["курс", "тест", "конспект", "видео", "создай", "сделай", "нужен"]):
-                state.intent = "course_generation"
-                state.topic = query
+            decision = classify_intent(state.query)
+            if INTENT_RULES_ENABLED and decision.confidence >= INTENT_RULES_THRESHOLD:
+                state.intent = decision.intent
+                state.topic = decision.topic
+                state.group = decision.group
+                logger.info(
+                    f"Coordinator rules determined: intent={state.intent}, topic={state.topic}, "
+                    f"group={state.group}, confidence={decision.confidence:.2f}"
+                )
             else:
-                state.intent = "chat"
+                source = await _coordinate_with_llm(state, decision)
         
-    except Exception as e:
-        logger.error(f"Error in coordinator_tool: {e}", exc_info=True)
-        state.intent = "chat"
+        except Exception as e:
+            logger.error(f"Error in coordinator_tool: {e}", exc_info=True)
+            state.intent = "chat"
     
-    return state
\ No newline at end of file
+        await emit_stage("coordinator", {"intent": state.intent, "topic": state.topic, "group": state.group, "source": source})
+        return state
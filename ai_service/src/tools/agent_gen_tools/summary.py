@@ -3,31 +3,28 @@
 """
 import logging
 from langchain_core.output_parsers import StrOutputParser
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 from ai_service.src.prompt_engineering.gen_templates import prompt_summary
 from ai_service.src.utils.states import State
-from ai_service.src.llm.openrouter import llm_s
+from ai_service.src.llm.registry import get_chain
+from ai_service.src.utils.metrics import track_stage
+from ai_service.src.utils.retry_policy import retryable
 
 logger = logging.getLogger(__name__)
 
 output = StrOutputParser()
-chain = prompt_summary | llm_s | output
 
 MIN_SUMMARY_LENGTH = 50
 MAX_SUMMARY_LENGTH = 5000
 
 
-@retry(
-    stop=stop_after_attempt(3),
-    wait=wait_exponential(multiplier=1, min=4, max=10),
-    retry=retry_if_exception_type((Exception,)),
-    reraise=True
-)
-def _generate_summary_with_retry(query: str) -> str:
+@retryable("summary")
+async def _generate_summary_with_retry(query: str) -> str:
     """
-    Генерирует конспект с retry логикой
+    Генерирует конспект; повторы - по виду ошибки и в пределах бюджета запроса
     """
-    response = chain.invoke({"query": query})
+    # Тег нужен потоковому endpoint: по нему отбираются токены конспекта
+    chain = get_chain("summary", prompt_summary, output, tags=["summary"])
+    response = await chain.ainvoke({"query": query})
     
     if hasattr(response, "content"):
         response = response.content
@@ -56,32 +53,33 @@ def _validate_summary(summary: str) -> tuple[bool, str]:
     return True, summary
 
 
-def summary_tool(state: State) -> State:
+async def summary_tool(state: State) -> State:
     """
     Генерирует конспект по теме курса с retry и валидацией
     """
-    try:
-        query = state.query
-        if not query or not query.strip():
-            logger.error("Empty query provided")
-            state.summary = "Ошибка: пустой запрос"
-            return state
+    with track_stage("summary"):
+        try:
+            query = state.query
+            if not query or not query.strip():
+                logger.error("Empty query provided")
+                state.summary = "Ошибка: пустой запрос"
+                return state
         
-        response = _generate_summary_with_retry(query)
+            response = await _generate_summary_with_retry(query)
         
-        is_valid, validated_summary = _validate_summary(response)
-        if not is_valid:
-            logger.error(f"Invalid summary generated for query: {query}")
-            state.summary = f"Конспект по теме '{query}'. К сожалению, не удалось сгенерировать полный конспект."
-        else:
-            state.summary = validated_summary
-            logger.info(f"Summary generated successfully for topic: {query} (length: {len(validated_summary)})")
+            is_valid, validated_summary = _validate_summary(response)
+            if not is_valid:
+                logger.error(f"Invalid summary generated for query: {query}")
+                state.summary = f"Конспект по теме '{query}'. К сожалению, не удалось сгенерировать полный конспект."
+            else:
+                state.summary = validated_summary
+                logger.info(f"Summary generated successfully for topic: {query} (length: {len(validated_summary)})")
         
-    except Exception as e:
-        logger.error(f"Error in summary_tool after retries: {e}", exc_info=True)
-        state.summary = f"Ошибка при генерации конспекта: {str(e)}"
+        except Exception as e:
+            logger.error(f"Error in summary_tool after retries: {e}", exc_info=True)
+            state.summary = f"Ошибка при генерации конспекта: {str(e)}"
     
-    return state
+        return state
 
 # if __name__ == "__main__":
 #     responce = chain.invoke({"query": "Present Simple"})
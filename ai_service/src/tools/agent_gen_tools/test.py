@@ -1,13 +1,18 @@
 """
 Модуль для генерации тестов на определенную тему
 """
+import json
 import logging
+import re
 from typing import List, Dict, Any
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 from ai_service.src.prompt_engineering.gen_templates import prompt_tests
 from ai_service.src.utils.states import State
-from ai_service.src.llm.openrouter import llm_t
+from ai_service.src.llm.registry import get_chain
+from ai_service.src.utils.metrics import track_stage
+from ai_service.src.utils.retry_policy import retryable
 from langchain_classic.output_parsers import StructuredOutputParser, ResponseSchema
+from langchain_core.exceptions import OutputParserException
+from langchain_core.output_parsers import StrOutputParser
 
 logger = logging.getLogger(__name__)
 
@@ -25,31 +30,44 @@ schema = [
 parser = StructuredOutputParser.from_response_schemas(schema)
 format_instructions = parser.get_format_instructions()
 
-chain = prompt_tests | llm_t | parser
-
 MIN_QUESTIONS = 3
 MAX_QUESTIONS = 15
 MIN_OPTIONS = 2
 MAX_OPTIONS = 6
 
+_JSON_OBJECT_RE = re.compile(r"\{.*\}", re.DOTALL)
+
 
-@retry(
-    stop=stop_after_attempt(3),
-    wait=wait_exponential(multiplier=1, min=4, max=10),
-    retry=retry_if_exception_type((Exception,)),
-    reraise=True
-)
-def _generate_tests_with_retry(query: str) -> dict:
+def _parse_tests(raw_response: str) -> dict:
     """
-    Генерирует тесты с retry логикой
+    Разбирает ответ модели; если он не в формате parser (нет ```json и т.п.),
+    пробует достать JSON-объект из текста, прежде чем генерировать заново
     """
-    raw_response = chain.invoke({"query": query})
-
-    if not isinstance(raw_response, str):
-        raw_response = getattr(raw_response, "content", str(raw_response))
-
-    response_obj: dict = parser.parse(raw_response)
-    return response_obj
+    try:
+        return parser.parse(raw_response)
+    except OutputParserException as e:
+        match = _JSON_OBJECT_RE.search(raw_response)
+        if match is None:
+            raise
+        try:
+            response_obj = json.loads(match.group(0))
+        except json.JSONDecodeError:
+            raise e
+        if not isinstance(response_obj, dict):
+            raise e
+        logger.info("Recovered tests JSON from malformed model output")
+        return response_obj
+
+
+@retryable("tests")
+async def _generate_tests_with_retry(query: str) -> dict:
+    """
+    Генерирует тесты; повторы - по виду ошибки и в пределах бюджета запроса
+    """
+    # Разбор вне цепочки: невалидный ответ сначала чинится, а не генерируется заново
+    chain = get_chain("tests", prompt_tests, StrOutputParser(), profile="tests")
+    raw_response = await chain.ainvoke({"query": query})
+    return _parse_tests(raw_response)
 
 
 def _validate_question(question: Dict[str, Any]) -> bool:
@@ -96,41 +114,43 @@ def _validate_tests(tests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     return validated_tests[:MAX_QUESTIONS]
 
 
-def gentest_tool(state: State) -> State:
+async def gentest_tool(state: State) -> State:
     """
     Генерирует тестовые вопросы по теме курса с retry и валидацией
     """
-    try:
-        query = state.query
-        if not query or not query.strip():
-            logger.error("Empty query provided")
-            state.tests = []
-            return state
+    with track_stage("tests"):
+        try:
+            query = state.query
+            if not query or not query.strip():
+                logger.error("Empty query provided")
+                state.tests = []
+                return state
         
-        response_obj = _generate_tests_with_retry(query)
+            response_obj = await _generate_tests_with_retry(query)
         
-        questions = response_obj.get("questions", [])
+            questions = response_obj.get("questions", [])
         
-        validated_questions = _validate_tests(questions)
+            validated_questions = _validate_tests(questions)
         
-        if len(validated_questions) < MIN_QUESTIONS:
-            logger.error(f"Not enough valid questions generated: {len(validated_questions)}")
-            state.tests = validated_questions  # Возвращаем то, что есть
-        else:
-            state.tests = validated_questions
-            logger.info(f"Generated {len(validated_questions)} valid test questions for topic: {query}")
+            if len(validated_questions) < MIN_QUESTIONS:
+                logger.error(f"Not enough valid questions generated: {len(validated_questions)}")
+                state.tests = validated_questions  # Возвращаем то, что есть
+            else:
+                state.tests = validated_questions
+                logger.info(f"Generated {len(validated_questions)} valid test questions for topic: {query}")
         
-    except Exception as e:
-        logger.error(f"Error in gentest_tool after retries: {e}", exc_info=True)
-        state.tests = []
+        except Exception as e:
+            logger.error(f"Error in gentest_tool after retries: {e}", exc_info=True)
+            state.tests = []
 
-    return state
+        return state
 
 ##TODO: переделать на langchain_core.output_parsers
 
 if __name__ == "__main__":
+    import asyncio
     test_state = State(query="Present Simple")
-    result = gentest_tool(test_state)
+    result = asyncio.run(gentest_tool(test_state))
     print(f"=== {getattr(result, 'title', 'Без названия')} ===\n")
     if result.tests:
         for i, q in enumerate(result.tests, start=1):
@@ -0,0 +1,259 @@
+"""
+Кэш сгенерированных курсов с Redis backend и in-memory fallback
+
+Ключ - нормализованная тема координатора + тематическая группа.
+Два уровня поиска:
+1. Точный: sha256 от нормализованных (group, topic)
+2. Семантический (опционально): косинусная близость символьных триграмм
+   темы среди уже закэшированных тем той же группы
+
+Redis - асинхронный клиент: get/set вызываются из узлов графа и не должны
+блокировать event loop. Если Redis недоступен, кэш на REDIS_RETRY_AFTER
+секунд переключается на память, чтобы не ждать таймаут на каждом запросе.
+"""
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Dict, Optional, Tuple
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+try:
+    import redis.asyncio as aioredis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+    logger.warning("Redis not available, using in-memory course cache")
+
+CACHE_ENABLED = os.getenv("COURSE_CACHE_ENABLED", "true").lower() == "true"
+CACHE_TTL = int(os.getenv("COURSE_CACHE_TTL", "86400"))
+CACHE_MAX_ENTRIES = int(os.getenv("COURSE_CACHE_MAX_ENTRIES", "500"))
+SEMANTIC_ENABLED = os.getenv("COURSE_CACHE_SEMANTIC", "false").lower() == "true"
+SEMANTIC_THRESHOLD = float(os.getenv("COURSE_CACHE_SEMANTIC_THRESHOLD", "0.85"))
+REDIS_RETRY_AFTER = float(os.getenv("COURSE_CACHE_REDIS_RETRY_AFTER", "30"))
+
+KEY_PREFIX = "course_cache:"
+CACHED_FIELDS = ("summary", "tests", "videos")
+
+_PUNCTUATION_RE = re.compile(r"[^\w\s]+")
+_SPACES_RE = re.compile(r"\s+")
+
+
+def normalize_topic(text: Optional[str]) -> str:
+    """
+    Приводит тему к каноническому виду: регистр, ё/е, пунктуация, пробелы
+    """
+    if not text:
+        return ""
+    text = text.lower().replace("ё", "е")
+    text = _PUNCTUATION_RE.sub(" ", text)
+    return _SPACES_RE.sub(" ", text).strip()
+
+
+def make_cache_key(topic: str, group: Optional[str]) -> str:
+    """
+    Точный ключ кэша для пары (topic, group)
+    """
+    raw = f"{normalize_topic(group)}|{normalize_topic(topic)}"
+    return KEY_PREFIX + hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _embed(text: str) -> Tuple[Counter, float]:
+    """
+    Вектор символьных триграмм и его норма
+    """
+    padded = f" {normalize_topic(text)} "
+    vector = Counter(padded[i:i + 3] for i in range(len(padded) - 2))
+    norm = math.sqrt(sum(v * v for v in vector.values()))
+    return vector, norm
+
+
+def _cosine(a: Tuple[Counter, float], b: Tuple[Counter, float]) -> float:
+    (va, na), (vb, nb) = a, b
+    if not na or not nb:
+        return 0.0
+    if len(va) > len(vb):
+        va, vb = vb, va
+    dot = sum(count * vb.get(gram, 0) for gram, count in va.items())
+    return dot / (na * nb)
+
+
+class CourseCache:
+    """Кэш результатов генерации с TTL/LRU вытеснением и метриками"""
+
+    def __init__(self):
+        self.redis_client: Optional["aioredis.Redis"] = None
+        self.use_redis = False
+        # monotonic time, до которого Redis считается недоступным
+        self._redis_down_until = 0.0
+
+        # key -> (expires_at, payload); порядок = LRU
+        self._memory: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        # group -> {key: вектор темы}; индекс для семантического уровня
+        self._semantic_index: Dict[str, "OrderedDict[str, Tuple[Counter, float]]"] = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "semantic_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+        if REDIS_AVAILABLE:
+            # Соединения создаются лениво в event loop при первом запросе
+            self.redis_client = aioredis.Redis(
+                host=os.getenv("REDIS_HOST", "localhost"),
+                port=int(os.getenv("REDIS_PORT", "6379")),
+                db=int(os.getenv("REDIS_DB", "0")),
+                decode_responses=True,
+                socket_connect_timeout=2,
+                socket_timeout=2
+            )
+            self.use_redis = True
+
+    def _redis_ready(self) -> bool:
+        return self.use_redis and self.redis_client is not None and time.monotonic() >= self._redis_down_until
+
+    def _redis_failed(self, action: str, error: Exception):
+        self._redis_down_until = time.monotonic() + REDIS_RETRY_AFTER
+        logger.error(f"Redis error {action} course cache, using memory for {REDIS_RETRY_AFTER:.0f}s: {error}")
+
+    async def get(self, topic: Optional[str], group: Optional[str]) -> Optional[Dict]:
+        """
+        Ищет курс сначала по точному ключу, затем (если включено) по близкой теме
+        """
+        if not CACHE_ENABLED or not normalize_topic(topic):
+            return None
+
+        key = make_cache_key(topic, group)
+        payload = await self._read(key)
+        if payload is not None:
+            self._count("hits")
+            logger.info(f"Course cache hit for topic: {topic}")
+            return payload
+
+        if SEMANTIC_ENABLED:
+            similar_key, score = self._find_similar(topic, group)
+            if similar_key:
+                payload = await self._read(similar_key)
+                if payload is not None:
+                    self._count("semantic_hits")
+                    logger.info(f"Course cache semantic hit for topic: {topic} (score: {score:.2f})")
+                    return payload
+                self._forget(similar_key, group)
+
+        self._count("misses")
+        return None
+
+    async def set(self, topic: Optional[str], group: Optional[str], payload: Dict):
+        """
+        Сохраняет результат генерации (только поля CACHED_FIELDS)
+        """
+        if not CACHE_ENABLED or not normalize_topic(topic):
+            return
+
+        key = make_cache_key(topic, group)
+        data = {field: payload.get(field) for field in CACHED_FIELDS}
+        await self._write(key, data)
+        self._count("stores")
+
+        if SEMANTIC_ENABLED:
+            with self._lock:
+                index = self._semantic_index.setdefault(normalize_topic(group), OrderedDict())
+                index[key] = _embed(topic)
+                index.move_to_end(key)
+                while len(index) > CACHE_MAX_ENTRIES:
+                    index.popitem(last=False)
+
+    async def aclose(self):
+        """
+        Закрывает пул соединений Redis (на остановке сервиса)
+        """
+        if self.redis_client is not None:
+            await self.redis_client.aclose()
+
+    def metrics(self) -> Dict:
+        """
+        Счетчики попаданий/промахов и размер кэша
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            memory_size = len(self._memory)
+        lookups = stats["hits"] + stats["semantic_hits"] + stats["misses"]
+        stats["hit_ratio"] = round((stats["hits"] + stats["semantic_hits"]) / lookups, 4) if lookups else 0.0
+        stats["backend"] = "redis" if self._redis_ready() else "memory"
+        stats["memory_entries"] = memory_size
+        stats["semantic_enabled"] = SEMANTIC_ENABLED
+        return stats
+
+    def _count(self, name: str, value: int = 1):
+        with self._lock:
+            self._stats[name] += value
+
+    async def _read(self, key: str) -> Optional[Dict]:
+        if self._redis_ready():
+            try:
+                raw = await self.redis_client.get(key)
+                return json.loads(raw) if raw else None
+            except Exception as e:
+                self._redis_failed("reading", e)
+        return self._read_memory(key)
+
+    async def _write(self, key: str, data: Dict):
+        if self._redis_ready():
+            try:
+                # LRU на стороне Redis обеспечивается maxmemory-policy allkeys-lru
+                await self.redis_client.setex(key, CACHE_TTL, json.dumps(data, ensure_ascii=False))
+                return
+            except Exception as e:
+                self._redis_failed("writing", e)
+        self._write_memory(key, data)
+
+    def _read_memory(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            expires_at, data = entry
+            if expires_at < time.time():
+                del self._memory[key]
+                return None
+            self._memory.move_to_end(key)
+            return data
+
+    def _write_memory(self, key: str, data: Dict):
+        with self._lock:
+            self._memory[key] = (time.time() + CACHE_TTL, data)
+            self._memory.move_to_end(key)
+            while len(self._memory) > CACHE_MAX_ENTRIES:
+                self._memory.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def _find_similar(self, topic: str, group: Optional[str]) -> Tuple[Optional[str], float]:
+        query_vector = _embed(topic)
+        best_key, best_score = None, 0.0
+        with self._lock:
+            index = self._semantic_index.get(normalize_topic(group))
+            if not index:
+                return None, 0.0
+            for key, vector in index.items():
+                score = _cosine(query_vector, vector)
+                if score > best_score:
+                    best_key, best_score = key, score
+        if best_score >= SEMANTIC_THRESHOLD:
+            return best_key, best_score
+        return None, best_score
+
+    def _forget(self, key: str, group: Optional[str]):
+        with self._lock:
+            index = self._semantic_index.get(normalize_topic(group))
+            if index:
+                index.pop(key, None)
+
+
+# Global cache instance
+course_cache = CourseCache()
@@ -0,0 +1,19 @@
+"""
+Промежуточные события графа агентов для потоковой генерации
+"""
+import logging
+from typing import Any
+from langchain_core.callbacks import adispatch_custom_event
+
+logger = logging.getLogger(__name__)
+
+
+async def emit_stage(name: str, data: Any):
+    """
+    Публикует завершение этапа как custom event (виден в agent.astream_events)
+    Вне графа (скрипты, ручной вызов инструмента) событие просто пропускается
+    """
+    try:
+        await adispatch_custom_event(name, data)
+    except RuntimeError:
+        logger.debug(f"Stage event '{name}' dropped: no parent run")
@@ -0,0 +1,241 @@
+"""
+Быстрый rule-based классификатор намерения для координатора
+
+Очевидные запросы ("привет", "сделай курс по X", "Present Simple")
+решаются эвристиками за микросекунды, без LLM. Каждое решение получает
+уверенность; запросы с уверенностью ниже INTENT_RULES_THRESHOLD
+(вопросы, длинные сообщения, неизвестные темы, темы в косвенном падеже)
+уходят в LLM-координатор.
+"""
+import os
+import re
+from typing import List, NamedTuple, Optional, Tuple
+from dotenv import load_dotenv
+
+load_dotenv()
+
+INTENT_RULES_ENABLED = os.getenv("INTENT_RULES_ENABLED", "true").lower() == "true"
+INTENT_RULES_THRESHOLD = float(os.getenv("INTENT_RULES_THRESHOLD", "0.8"))
+
+# Максимальная длина "голой" темы без глаголов и вопросов
+MAX_TOPIC_WORDS = 6
+# Потолок уверенности для темы в косвенном падеже ("по математике", "про котиков"):
+# ниже порога, чтобы LLM вернул тему в именительном падеже
+INFLECTED_TOPIC_CONFIDENCE = 0.6
+# Потолок уверенности, когда тема подходит под несколько групп ("Функции в Python"):
+# группу выбирает LLM, иначе в граф попадет первая по порядку
+AMBIGUOUS_GROUP_CONFIDENCE = 0.6
+
+
+class IntentDecision(NamedTuple):
+    intent: str  # "course_generation" или "chat" - лучшая догадка даже при низкой уверенности
+    topic: Optional[str]
+    group: Optional[str]
+    confidence: float
+
+
+_SMALLTALK_RE = re.compile(
+    r"^(?:привет\w*|здравствуй\w*|здаров\w*|добр\w+ (?:утро|день|вечер|ночи)|доброе утро|хай|"
+    r"hi|hello|hey|спасибо|благодарю|thanks|thank you|пока|до свидания|bye|"
+    r"как дела|как ты|как поживаешь|кто ты|что ты умеешь|что умеешь|ты кто|"
+    r"ок|окей|ok|okay|ага|да|нет|понятно|круто|отлично|класс)"
+    r"(?:\s+(?:привет\w*|как дела|как ты|бот|друг|там|тебе|большое|очень|еще раз))*$"
+)
+
+_COURSE_NOUN = (
+    r"(?:мини-?)?(?:курс\w*|тест\w*|конспект\w*|видео\w*|урок\w*|материал\w*|"
+    r"викторин\w*|упражнени\w*|courses?|quiz\w*|tests?|lessons?|videos?)"
+)
+_COURSE_VERB = (
+    r"(?:создай\w*|сделай\w*|сгенерируй\w*|составь\w*|подготовь\w*|сформируй\w*|"
+    r"дай\w*|покажи\w*|подбери\w*|найди\w*|хочу|нужн\w*|нужен|надо|научи\w*|"
+    r"create|make|generate|give|build|i need|i want)"
+)
+_COURSE_NOUN_RE = re.compile(rf"\b{_COURSE_NOUN}\b")
+_COURSE_VERB_RE = re.compile(rf"^(?:пожалуйста\s+|please\s+)?(?:мне\s+)?{_COURSE_VERB}\b")
+
+_TOPIC_PREPOSITION = (
+    r"(?:(?:по|о|об|про|на)\s+(?:теме|тему)|по|о|об|про|about|on|for)"
+)
+# "... курс и тесты по теме X" -> "X"
+_TOPIC_AFTER_NOUN_RE = re.compile(
+    rf"\b{_COURSE_NOUN}\s+({_TOPIC_PREPOSITION})\s+(.+)$", re.IGNORECASE
+)
+# Предлоги, после которых тема стоит в косвенном падеже ("по теме X", "на тему X" - нет)
+_CASE_GOVERNING_PREPOSITIONS = {"по", "о", "об", "про"}
+# Русское существительное курса прямо перед темой: "конспект истории" - родительный падеж
+_COURSE_NOUN_BEFORE_TOPIC_RE = re.compile(r"[а-яё]\s*$", re.IGNORECASE)
+_CYRILLIC_START_RE = re.compile(r"^[\W\d_]*[а-яё]", re.IGNORECASE)
+# "сделай мне конспект X" -> "X"
+_TOPIC_PREFIX_RE = re.compile(
+    rf"^(?:(?:пожалуйста|please)[\s,]+)?(?:(?:мне|me)\s+)?(?:{_COURSE_VERB}[\s,]+)?"
+    rf"(?:(?:мне|me|a|an|the)\s+)?(?:(?:{_COURSE_NOUN}|и|and)\b[\s,]*)*",
+    re.IGNORECASE
+)
+
+_QUESTION_RE = re.compile(
+    r"^(?:что|чем|почему|зачем|как|когда|кто|где|куда|какой|какая|какие|сколько|можно ли|"
+    r"объясни|расскажи|what|why|how|when|who|where|which|can|could|is|are|do|does)\b"
+)
+
+# Глаголы и местоимения, которых не бывает в "голой" теме курса
+_CONVERSATIONAL_RE = re.compile(
+    r"\b(?:я|ты|мне|меня|тебя|мы|вы|мой|твой|был\w*|буд\w+|могу|можешь|хочешь|думаю|"
+    r"знаешь|помоги\w*|скажи|i|you|my|your|me)\b"
+)
+
+# Тематические группы для графа знаний: группа -> начала слов/фраз
+GROUP_KEYWORDS = {
+    "English": (
+        "english", "английск", "present simple", "present continuous", "present perfect",
+        "past simple", "past continuous", "past perfect", "future simple", "future perfect",
+        "conditionals", "irregular verbs", "phrasal verbs", "modal verbs", "passive voice",
+        "reported speech", "articles", "артикл", "неправильные глаголы", "времена английского",
+    ),
+    "Math": (
+        "математ", "алгебр", "геометр", "уравнени", "неравенств", "интеграл", "производн",
+        "дроб", "логарифм", "тригонометр", "матриц", "теория вероятност", "комбинаторик",
+        "теорема пифагора", "функци", "math", "algebra", "geometry", "calculus", "derivative",
+        "integral", "equation", "probability",
+    ),
+    "Physics": (
+        "физик", "механик", "кинематик", "динамик", "законы ньютона", "закон ньютона",
+        "электричеств", "магнетизм", "оптик", "термодинамик", "квантов", "гравитац",
+        "physics", "newton", "thermodynamics",
+    ),
+    "Chemistry": (
+        "хими", "молекул", "химическ", "кислот", "щелоч", "валентност", "таблица менделеева",
+        "органическ", "окислительно", "chemistry", "molecule",
+    ),
+    "Biology": (
+        "биолог", "клетк", "строение клетки", "фотосинтез", "днк", "рнк", "генетик", "эволюци",
+        "митоз", "мейоз", "анатоми", "экосистем", "biology", "photosynthesis", "cell", "dna",
+        "genetics", "evolution",
+    ),
+    "History": (
+        "истори", "войн", "революци", "импери", "древн", "средневеков", "history",
+    ),
+    "Programming": (
+        "python", "javascript", "typescript", "java", "golang", "rust", "c++", "sql", "html",
+        "css", "react", "django", "fastapi", "docker", "git", "numpy", "pandas", "программирован", "алгоритм",
+        "структуры данных", "ооп", "рекурси", "programming", "algorithms", "data structures",
+    ),
+    "Machine Learning": (
+        "машинн", "машинное обучение", "нейросет", "нейронн", "глубокое обучение",
+        "линейная регрессия", "логистическая регрессия", "градиентный спуск", "кластеризац",
+        "machine learning", "deep learning", "neural network", "linear regression",
+        "logistic regression", "gradient descent",
+    ),
+    "Geography": ("географ", "материк", "климат", "океан", "geography"),
+    "Literature": ("литератур", "пушкин", "толст", "достоевск", "роман", "поэзи", "literature"),
+    "Economics": ("экономик", "инфляци", "маркетинг", "финанс", "бухгалтер", "economics"),
+}
+
+_GROUP_RES = [
+    (group, re.compile(r"(?<!\w)(?:" + "|".join(re.escape(k) for k in keywords) + ")"))
+    for group, keywords in GROUP_KEYWORDS.items()
+]
+
+_PUNCTUATION_RE = re.compile(r"[^\w\s+#-]+")
+_SPACES_RE = re.compile(r"\s+")
+
+
+def _normalize(query: str) -> str:
+    text = query.lower().replace("ё", "е")
+    text = _PUNCTUATION_RE.sub(" ", text)
+    return _SPACES_RE.sub(" ", text).strip()
+
+
+def detect_groups(text: str) -> List[str]:
+    """
+    Все тематические группы, ключевые слова которых встречаются в тексте
+    """
+    normalized = _normalize(text)
+    return [group for group, pattern in _GROUP_RES if pattern.search(normalized)]
+
+
+def detect_group(text: str) -> Optional[str]:
+    """
+    Тематическая группа по ключевым словам (None, если группа не распознана
+    или подходят несколько групп)
+    """
+    groups = detect_groups(text)
+    return groups[0] if len(groups) == 1 else None
+
+
+def _split_topic(query: str) -> Tuple[str, bool]:
+    """
+    Тема запроса и признак того, что она, вероятно, стоит в косвенном падеже
+    """
+    query = query.strip()
+    match = _TOPIC_AFTER_NOUN_RE.search(query)
+    if match:
+        topic = match.group(2)
+        inflected = match.group(1).lower() in _CASE_GOVERNING_PREPOSITIONS
+    else:
+        prefix = _TOPIC_PREFIX_RE.match(query)
+        topic = query[prefix.end():]
+        # "Курс: история России" - после двоеточия именительный падеж
+        inflected = (bool(_COURSE_NOUN_BEFORE_TOPIC_RE.search(prefix.group(0)))
+                     and topic[:1].isalpha())
+    topic = topic.strip(" \t\n.,!?:;\"'«»")
+    # Латиница ("по Python", "про Docker") не склоняется
+    inflected = inflected and bool(_CYRILLIC_START_RE.match(topic))
+    return (topic[:1].upper() + topic[1:] if topic else topic), inflected
+
+
+def extract_topic(query: str) -> str:
+    """
+    Тема без "сделай курс по ..." и завершающей пунктуации
+    """
+    return _split_topic(query)[0]
+
+
+def classify_intent(query: str) -> IntentDecision:
+    """
+    Классифицирует запрос эвристиками
+
+    Returns:
+        IntentDecision; решению можно доверять, если confidence >= INTENT_RULES_THRESHOLD
+    """
+    text = _normalize(query)
+    if not text:
+        return IntentDecision("chat", None, None, 0.99)
+
+    if _SMALLTALK_RE.match(text):
+        return IntentDecision("chat", None, None, 0.97)
+
+    words = text.split()
+    has_course_noun = bool(_COURSE_NOUN_RE.search(text))
+    has_course_verb = bool(_COURSE_VERB_RE.match(text))
+    is_question = query.rstrip().endswith("?") or bool(_QUESTION_RE.match(text))
+
+    if has_course_noun:
+        topic, inflected = _split_topic(query)
+        if not topic or _COURSE_NOUN_RE.search(_normalize(topic)):
+            # "сделай курс" без темы или тема не выделилась - пусть уточняет LLM
+            return IntentDecision("course_generation", topic or None, None, 0.5)
+        groups = detect_groups(topic)
+        group = groups[0] if len(groups) == 1 else None
+        confidence = 0.95 if has_course_verb else 0.9
+        if is_question:
+            # "какие тесты бывают?" - скорее вопрос о тестах, чем заказ курса
+            confidence -= 0.25
+        if inflected:
+            # "курс по математике" -> тема "Математике": падеж нормализует LLM
+            confidence = min(confidence, INFLECTED_TOPIC_CONFIDENCE)
+        if len(groups) > 1:
+            confidence = min(confidence, AMBIGUOUS_GROUP_CONFIDENCE)
+        return IntentDecision("course_generation", topic, group, confidence)
+
+    if is_question or len(words) > MAX_TOPIC_WORDS or _CONVERSATIONAL_RE.search(text):
+        # Вопросы и свободный текст: "Что такое Python?" - чат, "Расскажи о ML" - курс
+        return IntentDecision("chat", None, None, 0.5)
+
+    # Короткая "голая" тема - так тему присылает backend
+    topic = query.strip().strip(".!,;:")
+    groups = detect_groups(topic)
+    if len(groups) > 1:
+        return IntentDecision("course_generation", topic, None, AMBIGUOUS_GROUP_CONFIDENCE)
+    group = groups[0] if groups else None
+    return IntentDecision("course_generation", topic, group, 0.9 if group else 0.7)
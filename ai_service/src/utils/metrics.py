@@ -0,0 +1,266 @@
+"""
+Инструментация графа генерации: время этапов, токены, стоимость, ретраи
+
+- track_stage("summary") оборачивает инструмент/агента: время этапа и
+  время до первого LLM-вызова (queue_time)
+- LLMMetricsCallback передается в каждый LLM-клиент (registry) и считает
+  задержку, токены, стоимость и ошибки вызовов, приписывая их текущему этапу
+- collect_timings() собирает все это по одному запросу для ответа API
+
+Метрики также публикуются в Prometheus (если установлен prometheus_client).
+"""
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional
+from uuid import UUID
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+logger = logging.getLogger(__name__)
+
+try:
+    from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
+    PROMETHEUS_AVAILABLE = True
+except ImportError:
+    PROMETHEUS_AVAILABLE = False
+    logger.warning("prometheus_client not available, /metrics is disabled")
+
+if PROMETHEUS_AVAILABLE:
+    _DURATION_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+    STAGE_DURATION = Histogram(
+        "ai_stage_duration_seconds", "Wall time of a generation graph stage", ["stage"],
+        buckets=_DURATION_BUCKETS
+    )
+    STAGE_QUEUE = Histogram(
+        "ai_stage_queue_seconds", "Time from stage start to its first LLM call", ["stage"],
+        buckets=_DURATION_BUCKETS
+    )
+    STAGE_RETRIES = Counter("ai_stage_retries_total", "Retries inside a stage", ["stage"])
+    LLM_DURATION = Histogram(
+        "ai_llm_request_duration_seconds", "LLM call latency", ["stage", "provider"],
+        buckets=_DURATION_BUCKETS
+    )
+    LLM_TOKENS = Counter("ai_llm_tokens_total", "LLM tokens", ["stage", "provider", "kind"])
+    LLM_COST = Counter("ai_llm_cost_usd_total", "Estimated LLM spend in USD", ["stage", "provider"])
+    LLM_ERRORS = Counter("ai_llm_errors_total", "Failed or cancelled LLM calls", ["stage", "provider"])
+
+
+class StageTimings:
+    """Счетчики одного этапа в рамках запроса"""
+
+    __slots__ = ("started_at", "wall_time", "queue_time", "llm_time", "llm_calls",
+                 "llm_errors", "prompt_tokens", "completion_tokens", "cost_usd", "retries", "providers")
+
+    def __init__(self):
+        self.started_at: Optional[float] = None
+        self.wall_time = 0.0
+        self.queue_time: Optional[float] = None
+        self.llm_time = 0.0
+        self.llm_calls = 0
+        self.llm_errors = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cost_usd = 0.0
+        self.retries = 0
+        self.providers = set()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "wall_time": round(self.wall_time, 4),
+            "queue_time": round(self.queue_time or 0.0, 4),
+            "llm_time": round(self.llm_time, 4),
+            "llm_calls": self.llm_calls,
+            "llm_errors": self.llm_errors,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cost_usd": round(self.cost_usd, 6),
+            "retries": self.retries,
+            "providers": sorted(self.providers),
+        }
+
+
+class RequestTimings:
+    """Все этапы одного запроса к графу"""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.total: Optional[float] = None
+        self.stages: Dict[str, StageTimings] = {}
+
+    def stage(self, name: str) -> StageTimings:
+        stage = self.stages.get(name)
+        if stage is None:
+            stage = self.stages[name] = StageTimings()
+        return stage
+
+    def to_dict(self) -> Dict[str, Any]:
+        total = self.total if self.total is not None else time.perf_counter() - self.started_at
+        stages = {name: stage.to_dict() for name, stage in self.stages.items()}
+        return {
+            "total": round(total, 4),
+            "prompt_tokens": sum(stage["prompt_tokens"] for stage in stages.values()),
+            "completion_tokens": sum(stage["completion_tokens"] for stage in stages.values()),
+            "cost_usd": round(sum(stage["cost_usd"] for stage in stages.values()), 6),
+            "stages": stages,
+        }
+
+
+_request_timings: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+_current_stage: ContextVar[Optional[str]] = ContextVar("current_stage", default=None)
+
+
+@contextmanager
+def collect_timings() -> Iterator[RequestTimings]:
+    """
+    Собирает метрики всех этапов, выполненных внутри блока (включая дочерние задачи)
+    """
+    timings = RequestTimings()
+    token = _request_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        timings.total = time.perf_counter() - timings.started_at
+        try:
+            _request_timings.reset(token)
+        except ValueError:
+            # Потоковый генератор может закрываться уже в другом контексте
+            _request_timings.set(None)
+
+
+@contextmanager
+def track_stage(name: str) -> Iterator[None]:
+    """
+    Замеряет этап графа; LLM-вызовы внутри блока приписываются этому этапу
+    """
+    stage = _stage_timings(name)
+    started_at = time.perf_counter()
+    if stage is not None:
+        stage.started_at = started_at
+    token = _current_stage.set(name)
+    try:
+        yield
+    finally:
+        _current_stage.reset(token)
+        elapsed = time.perf_counter() - started_at
+        if stage is not None:
+            stage.wall_time += elapsed
+        if PROMETHEUS_AVAILABLE:
+            STAGE_DURATION.labels(stage=name).observe(elapsed)
+
+
+def record_retry():
+    """
+    Отмечает повторную попытку в текущем этапе
+    """
+    name = _current_stage.get() or "unknown"
+    stage = _stage_timings(name)
+    if stage is not None:
+        stage.retries += 1
+    if PROMETHEUS_AVAILABLE:
+        STAGE_RETRIES.labels(stage=name).inc()
+
+
+def _stage_timings(name: str) -> Optional[StageTimings]:
+    timings = _request_timings.get()
+    return timings.stage(name) if timings is not None else None
+
+
+def _token_usage(response: LLMResult):
+    """
+    (prompt, completion) токены: usage_metadata сообщения или llm_output провайдера
+    """
+    prompt_tokens = completion_tokens = 0
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage:
+                prompt_tokens += usage.get("input_tokens", 0)
+                completion_tokens += usage.get("output_tokens", 0)
+    if not prompt_tokens and not completion_tokens:
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        prompt_tokens = usage.get("prompt_tokens", 0) or 0
+        completion_tokens = usage.get("completion_tokens", 0) or 0
+    return prompt_tokens, completion_tokens
+
+
+class LLMMetricsCallback(BaseCallbackHandler):
+    """
+    Callback LLM-клиента одного провайдера: задержка, токены, стоимость, ошибки
+
+    Цены - USD за 1M токенов (price_prompt_per_1m / price_completion_per_1m
+    в секции провайдера model_config.yaml).
+    """
+
+    # Вызывается прямо в event loop, чтобы видеть contextvars запроса и этапа
+    run_inline = True
+
+    def __init__(self, provider: str, price_prompt_per_1m: float = 0.0, price_completion_per_1m: float = 0.0):
+        self.provider = provider
+        self.price_prompt = price_prompt_per_1m / 1_000_000
+        self.price_completion = price_completion_per_1m / 1_000_000
+        # run_id -> (start time, stage)
+        self._runs: Dict[UUID, tuple] = {}
+
+    def _start(self, run_id: UUID, metadata: Optional[Dict[str, Any]]):
+        name = _current_stage.get() or (metadata or {}).get("llm_chain") or "unknown"
+        now = time.perf_counter()
+        self._runs[run_id] = (now, name)
+        stage = _stage_timings(name)
+        if stage is not None and stage.queue_time is None and stage.started_at is not None:
+            stage.queue_time = now - stage.started_at
+            if PROMETHEUS_AVAILABLE:
+                STAGE_QUEUE.labels(stage=name).observe(stage.queue_time)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, metadata=None, **kwargs: Any):
+        self._start(run_id, metadata)
+
+    def on_llm_start(self, serialized, prompts, *, run_id: UUID, metadata=None, **kwargs: Any):
+        self._start(run_id, metadata)
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any):
+        started = self._runs.pop(run_id, None)
+        if started is None:
+            return
+        start, name = started
+        latency = time.perf_counter() - start
+        prompt_tokens, completion_tokens = _token_usage(response)
+        cost = prompt_tokens * self.price_prompt + completion_tokens * self.price_completion
+
+        stage = _stage_timings(name)
+        if stage is not None:
+            stage.llm_time += latency
+            stage.llm_calls += 1
+            stage.prompt_tokens += prompt_tokens
+            stage.completion_tokens += completion_tokens
+            stage.cost_usd += cost
+            stage.providers.add(self.provider)
+
+        if PROMETHEUS_AVAILABLE:
+            LLM_DURATION.labels(stage=name, provider=self.provider).observe(latency)
+            LLM_TOKENS.labels(stage=name, provider=self.provider, kind="prompt").inc(prompt_tokens)
+            LLM_TOKENS.labels(stage=name, provider=self.provider, kind="completion").inc(completion_tokens)
+            LLM_COST.labels(stage=name, provider=self.provider).inc(cost)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        started = self._runs.pop(run_id, None)
+        if started is None:
+            return
+        start, name = started
+        stage = _stage_timings(name)
+        if stage is not None:
+            stage.llm_time += time.perf_counter() - start
+            stage.llm_errors += 1
+            stage.providers.add(self.provider)
+        if PROMETHEUS_AVAILABLE:
+            LLM_ERRORS.labels(stage=name, provider=self.provider).inc()
+
+
+def render_metrics():
+    """
+    (body, content type) для endpoint /metrics; None, если Prometheus недоступен
+    """
+    if not PROMETHEUS_AVAILABLE:
+        return None
+    return generate_latest(), CONTENT_TYPE_LATEST
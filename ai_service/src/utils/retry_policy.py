@@ -0,0 +1,242 @@
+"""
+Политика повторов LLM-вызовов с учетом типа ошибки и бюджета запроса
+
+- classify_error раскладывает ошибку по видам: timeout, rate_limit (429),
+  server (5xx и отказ всех провайдеров роутера), connection, parse (невалидный
+  ответ модели), fatal (прочие 4xx и неизвестные ошибки - скорее всего баг)
+- RetryPolicy задает число попыток для каждого вида и backoff с jitter;
+  для 429 учитывается Retry-After провайдера
+- deadline_scope хранит дедлайн запроса в contextvar: backend передает
+  оставшийся бюджет в заголовке X-Request-Budget, и повторы прекращаются,
+  когда вызывающая сторона уже перестала бы ждать ответа
+"""
+import asyncio
+import functools
+import json
+import logging
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional, TypeVar
+import httpx
+from langchain_core.exceptions import OutputParserException
+from ai_service.src.llm.router import LLMFailoverError
+from ai_service.src.utils.metrics import record_retry
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Заголовок с бюджетом запроса в секундах (относительный - не зависит от расхождения часов)
+BUDGET_HEADER = "X-Request-Budget"
+# Запас на сериализацию ответа и сеть до backend
+BUDGET_SAFETY_MARGIN = 2.0
+
+TIMEOUT = "timeout"
+RATE_LIMIT = "rate_limit"
+SERVER = "server"
+CONNECTION = "connection"
+PARSE = "parse"
+FATAL = "fatal"
+
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+@contextmanager
+def deadline_scope(budget: Optional[float]) -> Iterator[None]:
+    """
+    Ограничивает повторы внутри блока бюджетом в секундах (None - без ограничения)
+
+    Вложенный scope не может продлить дедлайн внешнего.
+    """
+    deadline = _deadline.get()
+    if budget is not None:
+        own = time.monotonic() + max(0.0, budget - BUDGET_SAFETY_MARGIN)
+        deadline = own if deadline is None else min(deadline, own)
+    token = _deadline.set(deadline)
+    try:
+        yield
+    finally:
+        try:
+            _deadline.reset(token)
+        except ValueError:
+            # Потоковый генератор может закрываться уже в другом контексте
+            _deadline.set(None)
+
+
+def parse_budget(value: Optional[str]) -> Optional[float]:
+    """
+    Значение заголовка X-Request-Budget -> секунды (None, если заголовка нет или он некорректен)
+    """
+    if not value:
+        return None
+    try:
+        budget = float(value)
+    except ValueError:
+        logger.warning(f"Invalid {BUDGET_HEADER} header: {value!r}")
+        return None
+    return budget if budget > 0 else None
+
+
+def remaining_budget() -> Optional[float]:
+    """
+    Сколько секунд осталось до дедлайна запроса (None - дедлайна нет)
+    """
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+    # openai.APIStatusError хранит status_code, httpx.HTTPStatusError - response
+    status = getattr(error, "status_code", None)
+    if status is None:
+        response = getattr(error, "response", None)
+        status = getattr(response, "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def _known_kind(error: BaseException) -> Optional[str]:
+    if isinstance(error, (OutputParserException, json.JSONDecodeError)):
+        return PARSE
+    if isinstance(error, (asyncio.TimeoutError, httpx.TimeoutException)) or "Timeout" in type(error).__name__:
+        return TIMEOUT
+    status = _status_code(error)
+    if status == 429:
+        return RATE_LIMIT
+    if status is not None:
+        return SERVER if status >= 500 else FATAL
+    if isinstance(error, httpx.TransportError) or type(error).__name__ == "APIConnectionError":
+        return CONNECTION
+    return None
+
+
+def classify_error(error: BaseException) -> str:
+    """
+    Вид ошибки для выбора политики повтора
+    """
+    if isinstance(error, LLMFailoverError):
+        # Отказали все провайдеры: вид по последней ошибке, если она известна
+        cause = error.__cause__
+        return (_known_kind(cause) if cause is not None else None) or SERVER
+    # Неизвестные ошибки (KeyError, TypeError в коде цепочки) повторять бессмысленно
+    return _known_kind(error) or FATAL
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """
+    Пауза из заголовков Retry-After / retry-after-ms ответа провайдера, в секундах
+    """
+    if isinstance(error, LLMFailoverError) and error.__cause__ is not None:
+        error = error.__cause__
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    """
+    Сколько раз и с какой паузой повторять вызов в зависимости от вида ошибки
+
+    Пауза - "full jitter": случайная в [0, min(max_delay, base_delay * 2^attempt)],
+    чтобы параллельные генерации не повторяли запросы синхронно.
+    """
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 0.5, max_delay: float = 8.0,
+                 retries: Optional[Dict[str, int]] = None):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        # Максимум повторов по видам ошибок (не больше max_attempts - 1)
+        self.retries = {
+            TIMEOUT: 1,
+            RATE_LIMIT: 2,
+            SERVER: 2,
+            CONNECTION: 2,
+            PARSE: 1,
+            FATAL: 0,
+            **(retries or {}),
+        }
+
+    def should_retry(self, kind: str, attempt: int, kind_retries: int) -> bool:
+        return attempt < self.max_attempts and kind_retries < self.retries.get(kind, 0)
+
+    def delay(self, kind: str, attempt: int, error: BaseException) -> float:
+        if kind == PARSE:
+            # Ответ пришел, просто невалидный - повторяем сразу
+            return 0.0
+        backoff = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        if kind == RATE_LIMIT:
+            hint = retry_after(error)
+            if hint is not None:
+                return hint + random.uniform(0, self.base_delay)
+        return backoff
+
+
+DEFAULT_POLICY = RetryPolicy()
+
+
+async def call_with_retry(func: Callable[[], Awaitable[T]], name: str,
+                          policy: RetryPolicy = DEFAULT_POLICY) -> T:
+    """
+    Вызывает func с повторами по policy, не выходя за дедлайн запроса
+
+    Каждая попытка ограничена оставшимся бюджетом; если бюджета не хватает
+    на паузу перед следующей попыткой, поднимается последняя ошибка.
+    """
+    attempt = 0
+    kind_retries: Dict[str, int] = {}
+    while True:
+        attempt += 1
+        budget = remaining_budget()
+        try:
+            if budget is None:
+                return await func()
+            if budget <= 0:
+                raise asyncio.TimeoutError(f"{name}: request budget exhausted")
+            return await asyncio.wait_for(func(), timeout=budget)
+        except Exception as e:
+            kind = classify_error(e)
+            if not policy.should_retry(kind, attempt, kind_retries.get(kind, 0)):
+                raise
+            delay = policy.delay(kind, attempt, e)
+            budget = remaining_budget()
+            if budget is not None and delay >= budget:
+                logger.warning(f"{name}: not retrying {kind} error, {delay:.1f}s backoff exceeds remaining budget {budget:.1f}s")
+                raise
+            kind_retries[kind] = kind_retries.get(kind, 0) + 1
+            logger.warning(f"{name}: {kind} error on attempt {attempt}, retrying in {delay:.1f}s: {e}")
+            record_retry()
+            await asyncio.sleep(delay)
+
+
+def retryable(name: str, policy: RetryPolicy = DEFAULT_POLICY):
+    """
+    Декоратор для async-функции: call_with_retry с теми же аргументами
+    """
+    def decorator(func: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> T:
+            return await call_with_retry(lambda: func(*args, **kwargs), name, policy)
+        return wrapper
+    return decorator
@@ -0,0 +1,53 @@
+"""
+Single-flight: одновременные одинаковые запросы ждут один общий вызов
+
+Копия backend_service/src/services/single_flight.py: сервисы собираются из отдельных
+Docker-контекстов и не делят код. Изменения вносить в оба файла.
+"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_query(query: str) -> str:
+    """
+    Ключ для объединения запросов: регистр и пробелы не важны
+    """
+    return " ".join(query.lower().split())
+
+
+class SingleFlight:
+    """Объединяет конкурентные вызовы с одинаковым ключом в одну задачу"""
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    async def do(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Выполняет factory() один раз на ключ, остальные вызывающие ждут результат
+
+        Общая задача защищена shield: отмена одного ожидающего (например, по
+        таймауту) не отменяет вызов для остальных.
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done, key=key: self._forget(key, done))
+        else:
+            logger.info(f"Joining in-flight request for key: {key[:50]}")
+        return await asyncio.shield(task)
+
+    @property
+    def inflight(self) -> int:
+        return len(self._inflight)
+
+    def _forget(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Забираем исключение, чтобы не было "Task exception was never retrieved",
+        # если все ожидающие уже отменены
+        if not task.cancelled():
+            task.exception()
@@ -1,8 +1,8 @@
-from ai_service.src.agents.agent_gen import generate_c
+from ai_service.src.agents.agent_gen import agenerate_c
 
-def main_workflow(query: str):
+async def main_workflow(query: str):
     try:
-        result = generate_c(query)
+        result = await agenerate_c(query)
         return {
             "success": True,
             "data": {
@@ -11,7 +11,7 @@ sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
 # Import Base and models
 from backend_service.src.database.postgres_db import Base
-from backend_service.src.models import User, Course, CourseTest, CourseVideo, CourseCategory
+from backend_service.src.models import User, Course, CourseTest, CourseVideo, CourseCategory, GraphOutbox
 
 # this is the Alembic Config object
 config = context.config
@@ -0,0 +1,32 @@
+"""Add full-text search vector to courses
+
+Revision ID: 0001_course_search_vector
+Revises: 
+Create Date: 2026-10-18 00:00:00
+
+"""
+from alembic import op
+from backend_service.src.models.course import COURSE_SEARCH_VECTOR
+
+
+# revision identifiers, used by Alembic.
+revision = '0001_course_search_vector'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # IF NOT EXISTS: databases created with create_all already have the column
+    op.execute(
+        "ALTER TABLE courses ADD COLUMN IF NOT EXISTS search_vector tsvector "
+        f"GENERATED ALWAYS AS ({COURSE_SEARCH_VECTOR}) STORED"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_course_search ON courses USING gin (search_vector)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS idx_course_search")
+    op.execute("ALTER TABLE courses DROP COLUMN IF EXISTS search_vector")
@@ -0,0 +1,52 @@
+"""Add graph_outbox table for Neo4j sync
+
+Revision ID: 0002_graph_outbox
+Revises: 0001_course_search_vector
+Create Date: 2026-10-18 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002_graph_outbox'
+down_revision = '0001_course_search_vector'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # IF NOT EXISTS: databases created with create_all may already have the table
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS graph_outbox (
+            id SERIAL PRIMARY KEY,
+            operation VARCHAR NOT NULL,
+            course_id INTEGER,
+            payload JSON NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            last_error TEXT,
+            available_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT now()
+        )
+        """
+    )
+    # Tables created by create_all before course_id existed: add and backfill it
+    op.execute("ALTER TABLE graph_outbox ADD COLUMN IF NOT EXISTS course_id INTEGER")
+    op.execute(
+        "UPDATE graph_outbox SET course_id = (payload->>'course_id')::integer WHERE course_id IS NULL"
+    )
+    op.alter_column('graph_outbox', 'course_id', existing_type=sa.Integer(), nullable=False)
+
+    op.execute("CREATE INDEX IF NOT EXISTS ix_graph_outbox_id ON graph_outbox (id)")
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_graph_outbox_available ON graph_outbox (available_at, id)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_graph_outbox_course ON graph_outbox (course_id, id)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS graph_outbox")
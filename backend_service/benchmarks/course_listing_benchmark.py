@@ -0,0 +1,141 @@
+"""
+Query count of the course listing endpoints on a large dataset
+
+Seeds thousands of courses (each with tests, videos and a category) for a
+throwaway user and calls get_courses / get_my_courses with different page
+sizes, counting SQL statements via the engine's before_cursor_execute event.
+With eager loading the count per request must not depend on the page size
+(no N+1). Everything runs inside one transaction that is rolled back, so the
+database is left untouched.
+
+Needs the PostgreSQL database from DATABASE_URL with the schema applied:
+
+    python -m backend_service.benchmarks.course_listing_benchmark
+    python -m backend_service.benchmarks.course_listing_benchmark --courses 10000 --limits 10 50 100
+"""
+import argparse
+import asyncio
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Iterator, List
+from sqlalchemy import event, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend_service.src.database.postgres_db import engine
+from backend_service.src.models.user import User
+from backend_service.src.models.course import Course, CourseTest, CourseVideo, CourseCategory
+from backend_service.src.api.courses import get_courses, get_my_courses
+
+SEED_BATCH = 1000
+
+
+class QueryCounter:
+    """Counts statements executed on the engine while active"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+
+@contextmanager
+def count_queries() -> Iterator[QueryCounter]:
+    counter = QueryCounter()
+    event.listen(engine.sync_engine, "before_cursor_execute", counter)
+    try:
+        yield counter
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", counter)
+
+
+async def seed(db: AsyncSession, courses: int) -> User:
+    """
+    Throwaway user with `courses` completed courses and their children
+    """
+    marker = uuid.uuid4().hex[:12]
+    user = User(username=f"bench_{marker}", email=f"bench_{marker}@example.com", hashed_password="-")
+    db.add(user)
+    await db.flush()
+
+    for offset in range(0, courses, SEED_BATCH):
+        size = min(SEED_BATCH, courses - offset)
+        course_ids = (await db.scalars(
+            insert(Course).returning(Course.id),
+            [
+                {
+                    "title": f"Bench course {offset + i}",
+                    "topic": f"Bench topic {offset + i}",
+                    "summary": "Benchmark summary " * 5,
+                    "user_id": user.id,
+                    "status": "completed",
+                }
+                for i in range(size)
+            ]
+        )).all()
+        await db.execute(insert(CourseTest), [
+            {"course_id": course_id, "questions": [{"text": "Q?", "options": ["A", "B"], "correct_answer": "A"}]}
+            for course_id in course_ids
+        ])
+        await db.execute(insert(CourseVideo), [
+            {"course_id": course_id, "video_urls": ["https://www.youtube.com/watch?v=bench"]}
+            for course_id in course_ids
+        ])
+        await db.execute(insert(CourseCategory), [
+            {"course_id": course_id, "category_name": "Bench"} for course_id in course_ids
+        ])
+    await db.flush()
+    return user
+
+
+async def measure(db: AsyncSession, user: User, limits: List[int]) -> bool:
+    endpoints = {
+        "get_courses": lambda limit, cursor: get_courses(cursor=cursor, limit=limit, db=db),
+        "get_my_courses": lambda limit, cursor: get_my_courses(cursor=cursor, limit=limit, current_user=user, db=db),
+    }
+    ok = True
+    for name, call in endpoints.items():
+        counts = {}
+        for limit in limits:
+            # First page and the page after it (cursor path)
+            for page in ("first", "next"):
+                cursor = None
+                if page == "next":
+                    cursor = (await call(limit, None)).next_cursor
+                db.expunge_all()
+                start = time.perf_counter()
+                with count_queries() as counter:
+                    result = await call(limit, cursor)
+                elapsed = time.perf_counter() - start
+                counts[(limit, page)] = counter.count
+                print(f"{name:15} limit={limit:<4} {page:5} items={len(result.items):<4} "
+                      f"queries={counter.count:<3} {elapsed * 1000:7.1f} ms")
+        if len(set(counts.values())) != 1:
+            print(f"FAIL: {name} query count depends on page size: {counts}")
+            ok = False
+    return ok
+
+
+async def main(courses: int, limits: List[int]) -> bool:
+    async with engine.connect() as connection:
+        transaction = await connection.begin()
+        try:
+            # Session commits become savepoints; the outer transaction is always rolled back
+            db = AsyncSession(bind=connection, expire_on_commit=False,
+                              join_transaction_mode="create_savepoint")
+            start = time.perf_counter()
+            user = await seed(db, courses)
+            print(f"Seeded {courses} courses in {time.perf_counter() - start:.1f}s")
+            return await measure(db, user, limits)
+        finally:
+            await transaction.rollback()
+            await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Course listing query count benchmark")
+    parser.add_argument("--courses", type=int, default=5000, help="courses to seed")
+    parser.add_argument("--limits", type=int, nargs="+", default=[10, 100], help="page sizes to compare")
+    args = parser.parse_args()
+    sys.exit(0 if asyncio.run(main(args.courses, args.limits)) else 1)
@@ -0,0 +1,107 @@
+"""
+Per-request overhead of a fresh httpx.AsyncClient vs the shared pooled client
+
+"before" opens a new AsyncClient for every call (TCP setup, no keep-alive),
+as the service clients used to do; "after" goes through AIServiceClient with
+its lifecycle-managed connection pool. Both hit a minimal local HTTP/1.1
+keep-alive server, so the numbers show client overhead rather than the
+AI Service itself.
+
+    python -m backend_service.benchmarks.http_client_benchmark
+    python -m backend_service.benchmarks.http_client_benchmark --requests 2000 --concurrency 20
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Awaitable, Callable, List
+import httpx
+from backend_service.src.services.ai_service_client import AIServiceClient
+
+RESPONSE = (
+    b"HTTP/1.1 200 OK\r\n"
+    b"Content-Type: application/json\r\n"
+    b"Content-Length: 20\r\n"
+    b"\r\n"
+    b'{"status":"healthy"}'
+)
+
+
+async def _handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    # Request bodies are not expected: one GET per header block, connection kept alive
+    try:
+        while True:
+            head = await reader.readuntil(b"\r\n\r\n")
+            if not head:
+                break
+            writer.write(RESPONSE)
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionResetError):
+        pass
+    finally:
+        writer.close()
+
+
+async def _run(call: Callable[[], Awaitable[None]], requests: int, concurrency: int) -> List[float]:
+    latencies: List[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            await call()
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return latencies
+
+
+def _report(name: str, latencies: List[float], wall: float):
+    ordered = sorted(latencies)
+    p95 = ordered[int(0.95 * (len(ordered) - 1))]
+    print(f"{name:8} mean={statistics.mean(latencies) * 1000:6.2f} ms  p95={p95 * 1000:6.2f} ms  "
+          f"throughput={len(latencies) / wall:8.0f} req/s")
+
+
+async def main(requests: int, concurrency: int):
+    server = await asyncio.start_server(_handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    base_url = f"http://127.0.0.1:{port}"
+
+    async def fresh_client():
+        async with httpx.AsyncClient(base_url=base_url, timeout=5.0) as client:
+            response = await client.get("/health")
+            response.raise_for_status()
+
+    pooled = AIServiceClient(base_url)
+    await pooled.start()
+
+    async def pooled_client():
+        assert await pooled.health_check()
+
+    try:
+        # Warm-up: imports, first connections
+        await _run(fresh_client, 20, 1)
+        await _run(pooled_client, 20, 1)
+
+        results = {}
+        for name, call in (("before", fresh_client), ("after", pooled_client)):
+            start = time.perf_counter()
+            latencies = await _run(call, requests, concurrency)
+            wall = time.perf_counter() - start
+            _report(name, latencies, wall)
+            results[name] = statistics.mean(latencies)
+        print(f"per-request overhead saved: {(results['before'] - results['after']) * 1000:.2f} ms "
+              f"({results['before'] / results['after']:.1f}x)")
+    finally:
+        await pooled.close()
+        server.close()
+        await server.wait_closed()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fresh vs pooled httpx client overhead")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency))
@@ -1,27 +1,45 @@
 """
 Course API endpoints
 """
+import hashlib
+import json
 import logging
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from backend_service.src.database.postgres_db import get_db
+from datetime import datetime, timezone
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from typing import Any, AsyncIterator, Dict, List, Optional
+from backend_service.src.database.postgres_db import get_db, AsyncSessionLocal
 from backend_service.src.models.user import User
 from backend_service.src.models.course import Course, CourseTest, CourseVideo, CourseCategory
 from backend_service.src.schemas.course import (
     CourseGenerateRequest,
     CourseResponse,
     CourseCreate,
-    CourseGraphResponse
+    CourseGraphResponse,
+    CourseJobResponse,
+    CoursePage
 )
 from backend_service.src.api.users import get_current_user
-from backend_service.src.services.ai_service_client import AIServiceClient
-from backend_service.src.services.neo4j_service import Neo4jService
+from backend_service.src.api.pagination import encode_cursor, decode_cursor, datetime_to_key, key_to_datetime
+from backend_service.src.services.ai_service_client import ai_client
+from backend_service.src.services.neo4j_service import (
+    Neo4jService,
+    DEFAULT_GRAPH_DEPTH,
+    DEFAULT_GRAPH_LIMIT,
+    MAX_GRAPH_DEPTH,
+    parse_graph_cursor
+)
+from backend_service.src.services.job_queue import course_job_queue
+from backend_service.src.services.course_generation_task import validate_generated_content, is_generation_error
+from backend_service.src.services.graph_cache import graph_cache
+from backend_service.src.services.graph_outbox import graph_outbox, enqueue_course_upsert, enqueue_course_delete
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
-ai_client = AIServiceClient()
 neo4j_service = Neo4jService()
 
 
@@ -46,156 +64,211 @@ def extract_category_from_topic(topic: str) -> str:
     return "Uncategorized"
 
 
-@router.post("/generate", response_model=CourseResponse, status_code=status.HTTP_201_CREATED)
+async def _save_generated_course(db: AsyncSession, user_id: int, query: str, ai_response: Dict) -> CourseResponse:
+    """
+    Persist an AI Service response as a course and link it in the graph
+    """
+    # Check intent - if chat, don't create course
+    intent = ai_response.get("intent")
+    if intent == "chat":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="This request was identified as a chat query, not a course generation request"
+        )
+    
+    # Extract data with validation (shared with the background generation job)
+    summary, valid_tests, valid_videos = validate_generated_content(query, ai_response)
+    if is_generation_error(summary):
+        logger.error(f"AI Service returned an error summary for query: {query}")
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail="AI Service failed to generate the course"
+        )
+    
+    # Use topic and group from AI service if available
+    topic = ai_response.get("topic") or query
+    title = topic
+    group = ai_response.get("group")
+
+    # Create course
+    new_course = Course(
+        title=title,
+        topic=topic,
+        summary=summary,
+        user_id=user_id,
+        status="completed"
+    )
+    db.add(new_course)
+    await db.flush()
+    
+    # Add tests
+    if valid_tests:
+        course_test = CourseTest(
+            course_id=new_course.id,
+            questions=valid_tests
+        )
+        db.add(course_test)
+    
+    # Add videos
+    if valid_videos:
+        course_video = CourseVideo(
+            course_id=new_course.id,
+            video_urls=valid_videos
+        )
+        db.add(course_video)
+    
+    # Use group from coordinator if available, else fallback
+    category = group if group else extract_category_from_topic(topic)
+    course_category = CourseCategory(
+        course_id=new_course.id,
+        category_name=category
+    )
+    db.add(course_category)
+    
+    # Graph sync is committed with the course and applied by the outbox drainer
+    enqueue_course_upsert(db, new_course.id, title, topic, user_id=user_id, category=category)
+    
+    await db.commit()
+    await db.refresh(new_course)
+    graph_outbox.notify()
+    
+    return CourseResponse(
+        id=new_course.id,
+        title=new_course.title,
+        topic=new_course.topic,
+        summary=new_course.summary,
+        user_id=new_course.user_id,
+        created_at=new_course.created_at,
+        tests=valid_tests,
+        videos=valid_videos,
+        categories=[category],
+        status="completed"
+    )
+
+
+@router.post("/generate", response_model=CourseJobResponse, status_code=status.HTTP_202_ACCEPTED)
 async def generate_course(
     request: CourseGenerateRequest,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
-    Generate a course with improved error handling and timeout management
-    For MVP: Synchronous generation with proper error handling
-    Future: Can be converted to background tasks
+    Queue course generation and return immediately
+
+    Creates a course row in 'processing' status and a background job;
+    poll GET /courses/jobs/{job_id} for progress.
     """
+    logger.info(f"Queueing course generation for user {current_user.id}, query: {request.query}")
+    
+    new_course = Course(
+        title=request.query,
+        topic=request.query,
+        summary="",
+        user_id=current_user.id,
+        status="processing"
+    )
+    db.add(new_course)
+    await db.commit()
+    
     try:
-        logger.info(f"Starting course generation for user {current_user.id}, query: {request.query}")
-        
-        # Generate course content via AI Service with timeout
-        import asyncio
-        try:
-            ai_response = await asyncio.wait_for(
-                ai_client.generate_course(request.query),
-                timeout=300.0  # 5 minutes timeout
-            )
-        except asyncio.TimeoutError:
-            logger.error(f"Course generation timeout for query: {request.query}")
-            raise HTTPException(
-                status_code=status.HTTP_504_GATEWAY_TIMEOUT,
-                detail="Course generation timed out. Please try again with a simpler query."
-            )
-        
-        # Check intent - if chat, don't create course
-        intent = ai_response.get("intent")
-        if intent == "chat":
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="This request was identified as a chat query, not a course generation request"
-            )
-        
-        # Extract data with validation
-        summary = ai_response.get("summary", "")
-        tests_data = ai_response.get("tests", []) or []
-        videos_data = ai_response.get("videos", []) or []
-        
-        # Validate summary
-        if not summary or len(summary.strip()) < 50:
-            logger.warning(f"Summary too short or empty for query: {request.query}")
-            summary = f"Конспект по теме '{request.query}'. К сожалению, не удалось сгенерировать полный конспект."
-        
-        # Use topic and group from AI service if available
-        topic = ai_response.get("topic") or request.query
-        title = topic
-        group = ai_response.get("group")
-
-        # Create course
-        new_course = Course(
-            title=title,
-            topic=topic,
-            summary=summary,
-            user_id=current_user.id,
-            status="completed"
-        )
-        db.add(new_course)
-        db.flush() 
-        
-        # Add tests
-        if tests_data and isinstance(tests_data, list):
-            # Validate tests data
-            valid_tests = [t for t in tests_data if isinstance(t, dict) and t.get("text")]
-            if valid_tests:
-                course_test = CourseTest(
-                    course_id=new_course.id,
-                    questions=valid_tests
-                )
-                db.add(course_test)
-        
-        # Add videos
-        if videos_data:
-            if isinstance(videos_data, str):
-                videos_data = [videos_data]
-            
-            # Validate video URLs
-            valid_videos = [v for v in videos_data if isinstance(v, str) and v.startswith("http")]
-            if valid_videos:
-                course_video = CourseVideo(
-                    course_id=new_course.id,
-                    video_urls=valid_videos
-                )
-                db.add(course_video)
-        
-        # Use group from coordinator if available, else fallback
-        category = group if group else extract_category_from_topic(topic)
-        course_category = CourseCategory(
-            course_id=new_course.id,
-            category_name=category
+        job = await course_job_queue.enqueue(new_course.id, current_user.id, request.query)
+    except Exception as e:
+        logger.error(f"Failed to queue generation for course {new_course.id}: {e}", exc_info=True)
+        new_course.status = "failed"
+        await db.commit()
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Course generation queue is unavailable. Please try again later."
         )
-        db.add(course_category)
-        
-        db.commit()
-        db.refresh(new_course)
+    
+    course = await _get_course_with_relations(db, new_course.id)
+    return _job_to_response(job, _course_to_response(course))
 
-        # Update Neo4j (non-blocking)
-        try:
-            neo4j_service.create_course_node(
-                course_id=new_course.id,
-                title=title,
-                topic=topic,
-                category=category
-            )
-            
-            neo4j_service.create_category_relationship(
-                course_id=new_course.id,
-                category=category
-            )
-            
-            neo4j_service.create_user_course_relationship(
-                user_id=current_user.id,
-                course_id=new_course.id
-            )
-            logger.info(f"Course {new_course.id} added to Neo4j graph")
-        except Exception as e:
-            logger.error(f"Neo4j error for course {new_course.id}: {e}", exc_info=True)
-            # Don't interrupt execution, course is already created in PostgreSQL
-        
-        return CourseResponse(
-            id=new_course.id,
-            title=new_course.title,
-            topic=new_course.topic,
-            summary=new_course.summary,
-            user_id=new_course.user_id,
-            created_at=new_course.created_at,
-            tests=tests_data if tests_data else [],
-            videos=videos_data if isinstance(videos_data, list) else [videos_data] if videos_data else [],
-            categories=[category],
-            status="completed"
+
+@router.get("/jobs/{job_id}", response_model=CourseJobResponse)
+async def get_generation_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Poll the status of a course generation job
+    """
+    job = await course_job_queue.get(job_id)
+    if not job or job["user_id"] != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
         )
     
-    except HTTPException:
-        raise
+    course = await _get_course_with_relations(db, job["course_id"])
+    return _job_to_response(job, _course_to_response(course) if course else None)
+
+
+def _job_to_response(job: Dict, course: Optional[CourseResponse]) -> CourseJobResponse:
+    return CourseJobResponse(
+        job_id=job["id"],
+        course_id=job["course_id"],
+        status=job["status"],
+        stage=job.get("stage"),
+        attempts=job["attempts"],
+        max_attempts=job["max_attempts"],
+        error=job.get("error"),
+        created_at=datetime.fromtimestamp(job["created_at"], tz=timezone.utc),
+        updated_at=datetime.fromtimestamp(job["updated_at"], tz=timezone.utc),
+        course=course
+    )
+
+
+def _format_sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def _relay_generation(query: str, user_id: int) -> AsyncIterator[str]:
+    """
+    Relay AI Service events and persist the course once generation is done
+    """
+    try:
+        async for event, data in ai_client.stream_course(query):
+            yield _format_sse(event, data)
+            
+            if event == "done":
+                async with AsyncSessionLocal() as db:
+                    try:
+                        course = await _save_generated_course(db, user_id, query, data)
+                        yield _format_sse("course", course.model_dump(mode="json"))
+                    except HTTPException as e:
+                        yield _format_sse("error", {"message": e.detail, "status_code": e.status_code})
     except Exception as e:
-        db.rollback()
-        logger.error(f"Error generating course: {e}", exc_info=True)
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to generate course: {str(e)}"
-        )
+        logger.error(f"Error streaming course generation: {e}", exc_info=True)
+        yield _format_sse("error", {"message": f"Failed to generate course: {str(e)}"})
+
+
+@router.post("/generate/stream")
+async def generate_course_stream(
+    request: CourseGenerateRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Generate a course streaming progress as Server-Sent Events
+
+    Relays AI Service events (coordinator, summary_token, summary, tests,
+    videos, done) and finishes with a `course` event holding the saved
+    CourseResponse, or an `error` event.
+    """
+    logger.info(f"Starting streamed course generation for user {current_user.id}, query: {request.query}")
+    return StreamingResponse(
+        _relay_generation(request.query, current_user.id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 @router.post("", response_model=CourseResponse, status_code=status.HTTP_201_CREATED)
 async def create_course(
     course_data: CourseCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     new_course = Course(
         title=course_data.title,
@@ -205,7 +278,7 @@ async def create_course(
     )
     
     db.add(new_course)
-    db.flush()
+    await db.flush()
     
     if course_data.tests:
         course_test = CourseTest(
@@ -228,23 +301,12 @@ async def create_course(
         )
         db.add(course_category)
     
-    db.commit()
-    db.refresh(new_course)
+    category = course_data.categories[0] if course_data.categories else "Uncategorized"
+    enqueue_course_upsert(db, new_course.id, new_course.title, new_course.topic, user_id=current_user.id, category=category)
     
-    try:
-        category = course_data.categories[0] if course_data.categories else "Uncategorized"
-        neo4j_service.create_course_node(
-            course_id=new_course.id,
-            title=new_course.title,
-            topic=new_course.topic,
-            category=category
-        )
-        neo4j_service.create_user_course_relationship(
-            user_id=current_user.id,
-            course_id=new_course.id
-        )
-    except Exception as e:
-        print(f"Neo4j error: {e}")
+    await db.commit()
+    await db.refresh(new_course)
+    graph_outbox.notify()
     
     return CourseResponse(
         id=new_course.id,
@@ -259,23 +321,159 @@ async def create_course(
     )
 
 
-@router.get("/{course_id}", response_model=CourseResponse)
-async def get_course(
-    course_id: int,
-    db: Session = Depends(get_db)
+async def _stream_graph(
+    course_id: Optional[int],
+    depth: int,
+    limit: int,
+    cursor: Optional[str]
+) -> AsyncIterator[str]:
+    """
+    NDJSON lines: {"type": "node"|"edge", ...} and a final {"type": "page", "next_cursor": ...}
+    """
+    try:
+        async for kind, data in neo4j_service.iter_course_graph(course_id, depth, limit, cursor):
+            if kind == "page":
+                data = {"next_cursor": encode_cursor(data["next_cursor"]) if data["next_cursor"] else None}
+            yield json.dumps({"type": kind, **data}, ensure_ascii=False, default=str) + "\n"
+    except Exception as e:
+        logger.error(f"Error streaming graph: {e}", exc_info=True)
+        yield json.dumps({"type": "error", "message": "Failed to load graph"}) + "\n"
+
+
+def _graph_etag(version: int, *params: Any) -> str:
+    digest = hashlib.sha1(json.dumps(params, default=str).encode("utf-8")).hexdigest()[:12]
+    return f'"{version}-{digest}"'
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return "*" in tags or etag in tags
+
+
+async def _graph_response(
+    request: Request,
+    response: Response,
+    course_id: Optional[int],
+    depth: int,
+    limit: int,
+    cursor: Optional[str],
+    stream: bool,
+    since: Optional[int] = None
 ):
-    course = db.query(Course).filter(Course.id == course_id).first()
+    """
+    Serve a graph page from the versioned snapshot cache
+
+    Neo4j is only queried when the graph version has changed since the
+    snapshot was built; If-None-Match with the current ETag gets a 304.
+    """
+    node_cursor = decode_cursor(cursor, 1)[0] if cursor else None
+    if course_id is None:
+        try:
+            parse_graph_cursor(node_cursor)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid pagination cursor"
+            )
+    if stream:
+        return StreamingResponse(
+            _stream_graph(course_id, depth, limit, node_cursor),
+            media_type="application/x-ndjson"
+        )
     
-    if not course:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Course not found"
+    version = await graph_cache.current_version()
+    if version is None:
+        # Version unknown (Redis down): no ETag, delta or snapshot can be trusted
+        graph_data = await neo4j_service.get_course_graph(course_id, depth, limit, node_cursor)
+        next_cursor = graph_data["next_cursor"]
+        return CourseGraphResponse(
+            nodes=graph_data["nodes"],
+            edges=graph_data["edges"],
+            next_cursor=encode_cursor(next_cursor) if next_cursor else None
         )
     
-    course_test = db.query(CourseTest).filter(CourseTest.course_id == course_id).first()
-    course_video = db.query(CourseVideo).filter(CourseVideo.course_id == course_id).first()
-    course_categories = db.query(CourseCategory).filter(CourseCategory.course_id == course_id).all()
+    etag = _graph_etag(version, course_id, depth, limit, cursor, since)
+    if _etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
     
+    # Delta for clients that already hold the full graph at version `since`
+    if since is not None and course_id is None and cursor is None:
+        changes = await graph_cache.changes_since(since, version)
+        if changes is not None:
+            delta = {"nodes": [], "edges": []}
+            if changes.upserted:
+                delta = await neo4j_service.get_courses_neighbourhood(changes.upserted)
+            return CourseGraphResponse(
+                nodes=delta["nodes"],
+                edges=delta["edges"],
+                version=version,
+                since=since,
+                deleted=[f"course_{course_id}" for course_id in sorted(changes.deleted)]
+            )
+    
+    key = f"{course_id if course_id is not None else 'all'}:{depth}:{limit}:{cursor or ''}"
+    payload = await graph_cache.get_snapshot(key, version)
+    if payload is None:
+        graph_data = await neo4j_service.get_course_graph(course_id, depth, limit, node_cursor)
+        next_cursor = graph_data["next_cursor"]
+        payload = {
+            "nodes": graph_data["nodes"],
+            "edges": graph_data["edges"],
+            "next_cursor": encode_cursor(next_cursor) if next_cursor else None
+        }
+        await graph_cache.set_snapshot(key, version, payload)
+    
+    return CourseGraphResponse(**payload, version=version)
+
+
+# Graph routes are declared before /{course_id} so "/graph" isn't parsed as a course id
+@router.get("/graph", response_model=CourseGraphResponse)
+async def get_full_graph(
+    request: Request,
+    response: Response,
+    limit: int = Query(DEFAULT_GRAPH_LIMIT, ge=1, le=500),
+    cursor: Optional[str] = None,
+    since: Optional[int] = Query(None, ge=0),
+    stream: bool = False
+):
+    """
+    Knowledge graph page; with `since=<version>` returns only the nodes,
+    edges and deletions after that version (full graph if it is too old)
+    """
+    return await _graph_response(request, response, None, DEFAULT_GRAPH_DEPTH, limit, cursor, stream, since)
+
+
+@router.get("/graph/{course_id}", response_model=CourseGraphResponse)
+async def get_course_graph(
+    request: Request,
+    response: Response,
+    course_id: int,
+    depth: int = Query(DEFAULT_GRAPH_DEPTH, ge=1, le=MAX_GRAPH_DEPTH),
+    limit: int = Query(DEFAULT_GRAPH_LIMIT, ge=1, le=500),
+    cursor: Optional[str] = None,
+    stream: bool = False
+):
+    return await _graph_response(request, response, course_id, depth, limit, cursor, stream)
+
+
+# Eager-load course children in one extra query per relationship
+# instead of three queries per course
+COURSE_RELATIONS = (
+    selectinload(Course.tests),
+    selectinload(Course.videos),
+    selectinload(Course.categories),
+)
+
+
+def _course_to_response(course: Course) -> CourseResponse:
+    """
+    Serialize a course whose relationships were loaded with COURSE_RELATIONS
+    """
     return CourseResponse(
         id=course.id,
         title=course.title,
@@ -283,88 +481,143 @@ async def get_course(
         summary=course.summary,
         user_id=course.user_id,
         created_at=course.created_at,
-        tests=course_test.questions if course_test else [],
-        videos=course_video.video_urls if course_video else [],
-        categories=[cat.category_name for cat in course_categories]
+        tests=course.tests[0].questions if course.tests else [],
+        videos=course.videos[0].video_urls if course.videos else [],
+        categories=[cat.category_name for cat in course.categories],
+        status=course.status
     )
 
 
-@router.get("", response_model=List[CourseResponse])
-async def get_courses(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db)
+async def _get_course_with_relations(db: AsyncSession, course_id: int) -> Optional[Course]:
+    # AsyncSession can't lazy-load, so relationships are always loaded up front
+    return await db.scalar(select(Course).options(*COURSE_RELATIONS).where(Course.id == course_id))
+
+
+@router.get("/search", response_model=CoursePage)
+async def search_courses(
+    q: str = Query(..., min_length=2, max_length=200),
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_db)
 ):
-    courses = db.query(Course).offset(skip).limit(limit).all()
-    
-    result = []
-    for course in courses:
-        course_test = db.query(CourseTest).filter(CourseTest.course_id == course.id).first()
-        course_video = db.query(CourseVideo).filter(CourseVideo.course_id == course.id).first()
-        course_categories = db.query(CourseCategory).filter(CourseCategory.course_id == course.id).all()
-        
-        result.append(CourseResponse(
-            id=course.id,
-            title=course.title,
-            topic=course.topic,
-            summary=course.summary,
-            user_id=course.user_id,
-            created_at=course.created_at,
-            tests=course_test.questions if course_test else [],
-            videos=course_video.video_urls if course_video else [],
-            categories=[cat.category_name for cat in course_categories]
-        ))
-    
-    return result
-
-
-@router.get("/user/my-courses", response_model=List[CourseResponse])
-async def get_my_courses(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    """
+    Full-text search over title, topic and summary (Russian and English
+    stemming via the GIN-indexed search_vector), best matches first
+    """
+    tsquery = func.websearch_to_tsquery("russian", q).op("||")(func.websearch_to_tsquery("english", q))
+    rank = func.ts_rank_cd(Course.search_vector, tsquery)
+    query = (
+        select(Course, rank.label("rank"))
+        .options(*COURSE_RELATIONS)
+        .where(Course.search_vector.op("@@")(tsquery), Course.status == "completed")
+    )
+    
+    if cursor:
+        last_rank, last_id = decode_cursor(cursor, 2)
+        try:
+            last_rank, last_id = float(last_rank), int(last_id)
+        except (TypeError, ValueError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid pagination cursor"
+            )
+        query = query.where(tuple_(rank, Course.id) < (last_rank, last_id))
+    
+    result = await db.execute(query.order_by(rank.desc(), Course.id.desc()).limit(limit + 1))
+    rows = result.all()
+    
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last_course, last_rank = rows[-1]
+        next_cursor = encode_cursor(float(last_rank), last_course.id)
+    
+    return CoursePage(
+        items=[_course_to_response(course) for course, _ in rows],
+        next_cursor=next_cursor
+    )
+
+
+@router.get("/{course_id}", response_model=CourseResponse)
+async def get_course(
+    course_id: int,
+    db: AsyncSession = Depends(get_db)
 ):
-    courses = db.query(Course).filter(Course.user_id == current_user.id).all()
-    
-    result = []
-    for course in courses:
-        course_test = db.query(CourseTest).filter(CourseTest.course_id == course.id).first()
-        course_video = db.query(CourseVideo).filter(CourseVideo.course_id == course.id).first()
-        course_categories = db.query(CourseCategory).filter(CourseCategory.course_id == course.id).all()
-        
-        result.append(CourseResponse(
-            id=course.id,
-            title=course.title,
-            topic=course.topic,
-            summary=course.summary,
-            user_id=course.user_id,
-            created_at=course.created_at,
-            tests=course_test.questions if course_test else [],
-            videos=course_video.video_urls if course_video else [],
-            categories=[cat.category_name for cat in course_categories]
-        ))
-    
-    return result
+    course = await _get_course_with_relations(db, course_id)
+    
+    if not course:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Course not found"
+        )
+    
+    return _course_to_response(course)
 
 
-@router.get("/graph/{course_id}", response_model=CourseGraphResponse)
-async def get_course_graph(course_id: int):
-    graph_data = neo4j_service.get_course_graph(course_id=course_id)
-    return CourseGraphResponse(**graph_data)
+async def _paginate_courses(db: AsyncSession, query, cursor: Optional[str], limit: int) -> CoursePage:
+    """
+    Keyset pagination over (created_at, id), newest first
+    """
+    if cursor:
+        created_key, course_id = decode_cursor(cursor, 2)
+        try:
+            created_at = key_to_datetime(int(created_key))
+            course_id = int(course_id)
+        except (TypeError, ValueError, OverflowError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid pagination cursor"
+            )
+        query = query.where(tuple_(Course.created_at, Course.id) < (created_at, course_id))
+    
+    result = await db.scalars(
+        query.options(*COURSE_RELATIONS)
+        .order_by(Course.created_at.desc(), Course.id.desc())
+        .limit(limit + 1)
+    )
+    courses = result.all()
+    
+    next_cursor = None
+    if len(courses) > limit:
+        courses = courses[:limit]
+        last = courses[-1]
+        next_cursor = encode_cursor(datetime_to_key(last.created_at), last.id)
+    
+    return CoursePage(
+        items=[_course_to_response(course) for course in courses],
+        next_cursor=next_cursor
+    )
 
 
-@router.get("/graph", response_model=CourseGraphResponse)
-async def get_full_graph():
-    graph_data = neo4j_service.get_course_graph()
-    return CourseGraphResponse(**graph_data)
+@router.get("", response_model=CoursePage)
+async def get_courses(
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_db)
+):
+    return await _paginate_courses(db, select(Course), cursor, limit)
+
+
+@router.get("/user/my-courses", response_model=CoursePage)
+async def get_my_courses(
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    # Served by idx_user_created (user_id, created_at)
+    query = select(Course).where(Course.user_id == current_user.id)
+    return await _paginate_courses(db, query, cursor, limit)
 
 
 @router.delete("/{course_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_course(
     course_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    course = db.query(Course).filter(Course.id == course_id).first()
+    # Children are loaded up front so the delete cascade doesn't lazy-load them
+    course = await _get_course_with_relations(db, course_id)
     
     if not course:
         raise HTTPException(
@@ -378,13 +631,10 @@ async def delete_course(
             detail="Not authorized to delete this course"
         )
     
-    try:
-        neo4j_service.delete_course_node(course_id)
-    except Exception as e:
-        print(f"Neo4j error: {e}")
-    
-    db.delete(course)
-    db.commit()
+    enqueue_course_delete(db, course_id)
+    await db.delete(course)
+    await db.commit()
+    graph_outbox.notify()
     
     return None
 
@@ -2,20 +2,34 @@
 Rate limiting middleware for FastAPI
 """
 import logging
-from fastapi import Request, HTTPException, status
+import math
+from fastapi import Request, status
 from fastapi.responses import JSONResponse
-from backend_service.src.services.rate_limiter import rate_limiter
+from backend_service.src.services.rate_limiter import rate_limiter, RateLimitResult, SLIDING_WINDOW, GCRA
 
 logger = logging.getLogger(__name__)
 
 
+def _rate_limit_headers(result: RateLimitResult) -> dict:
+    headers = {
+        "X-RateLimit-Limit": str(result.limit),
+        "X-RateLimit-Remaining": str(result.remaining),
+        "X-RateLimit-Reset": str(math.ceil(result.reset_after)),
+    }
+    if not result.allowed:
+        headers["Retry-After"] = str(max(1, math.ceil(result.retry_after)))
+    return headers
+
+
 async def rate_limit_middleware(request: Request, call_next):
     """
     Middleware для rate limiting
     
     Лимиты:
-    - Генерация курсов: 3 запроса в минуту на пользователя
-    - Остальные endpoints: 60 запросов в минуту на IP
+    - Генерация курсов: 3 запроса в минуту на пользователя (точное скользящее окно)
+    - Остальные endpoints: 60 запросов в минуту на IP (GCRA, без всплесков на границе окна)
+    
+    Каждый ответ содержит X-RateLimit-Limit/Remaining/Reset, ответ 429 - еще и Retry-After
     """
     # Получаем идентификатор для rate limiting
     user_id = None
@@ -36,29 +50,27 @@ async def rate_limit_middleware(request: Request, call_next):
         # Генерация курсов - более строгий лимит
         limit = 3
         window = 60  # 1 минута
-        if not rate_limiter.is_allowed(f"{rate_key}:generate", limit, window):
-            logger.warning(f"Rate limit exceeded for {rate_key} on {path}")
-            return JSONResponse(
-                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                content={
-                    "error": "Rate limit exceeded",
-                    "message": f"Maximum {limit} course generations per minute allowed. Please wait."
-                }
-            )
+        result = await rate_limiter.check(f"{rate_key}:generate", limit, window, SLIDING_WINDOW)
+        message = f"Maximum {limit} course generations per minute allowed. Please wait."
     else:
         # Остальные endpoints - стандартный лимит
         limit = 60
         window = 60  # 1 минута
-        if not rate_limiter.is_allowed(f"{rate_key}:general", limit, window):
-            logger.warning(f"Rate limit exceeded for {rate_key} on {path}")
-            return JSONResponse(
-                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                content={
-                    "error": "Rate limit exceeded",
-                    "message": "Too many requests. Please try again later."
-                }
-            )
+        result = await rate_limiter.check(f"{rate_key}:general", limit, window, GCRA)
+        message = "Too many requests. Please try again later."
+    
+    headers = _rate_limit_headers(result)
+    if not result.allowed:
+        logger.warning(f"Rate limit exceeded for {rate_key} on {path}")
+        return JSONResponse(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            content={
+                "error": "Rate limit exceeded",
+                "message": message
+            },
+            headers=headers
+        )
     
     response = await call_next(request)
+    response.headers.update(headers)
     return response
-
@@ -1,7 +1,7 @@
 import logging
 from telegram import Update
 from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes
-from ai_service.src.agents.agent_gen import generate_c
+from ai_service.src.agents.agent_gen import agenerate_c
 import os
 from dotenv import load_dotenv
 
@@ -27,7 +27,7 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.message.reply_text(f"⏳ Генерирую курс по теме: *{query}*...", parse_mode="Markdown")
 
     try:
-        result = generate_c(query)
+        result = await agenerate_c(query)
 
         summary_text = f"📘 *Конспект:*\n{result.summary}"
         tests_text = f"🧩 *Тесты:*\n{result.tests}"
@@ -0,0 +1,43 @@
+"""
+Script to backfill the Neo4j knowledge graph from PostgreSQL
+Safe to re-run: graph writes are idempotent MERGEs
+"""
+
+import asyncio
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+from backend_service.src.database.postgres_db import engine, AsyncSessionLocal
+from backend_service.src.database.neo4j_db import close_neo4j_driver
+from backend_service.src.models import Course
+from backend_service.src.services.neo4j_service import Neo4jService, BULK_BATCH_SIZE
+
+
+async def load_courses():
+    async with AsyncSessionLocal() as db:
+        result = await db.scalars(
+            select(Course).options(selectinload(Course.categories)).order_by(Course.id)
+        )
+        return [
+            {
+                "course_id": course.id,
+                "title": course.title,
+                "topic": course.topic,
+                "user_id": course.user_id,
+                "category": course.categories[0].category_name if course.categories else None,
+            }
+            for course in result.all()
+        ]
+
+
+async def main():
+    courses = await load_courses()
+    await engine.dispose()
+    written = await Neo4jService().create_course_graphs(courses, BULK_BATCH_SIZE)
+    await close_neo4j_driver()
+    return written
+
+
+if __name__ == "__main__":
+    print("Backfilling knowledge graph...")
+    written = asyncio.run(main())
+    print(f"Knowledge graph backfilled: {written} courses")
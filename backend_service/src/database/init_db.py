@@ -3,11 +3,18 @@ Script to initialize database tables
 Run this once to create all tables
 """
 
+import asyncio
 from backend_service.src.database.postgres_db import engine, Base
-from backend_service.src.models import User, Course, CourseTest, CourseVideo, CourseCategory
+from backend_service.src.models import User, Course, CourseTest, CourseVideo, CourseCategory, GraphOutbox
+
+
+async def init_db():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    await engine.dispose()
+
 
 if __name__ == "__main__":
     print("Creating database tables...")
-    Base.metadata.create_all(bind=engine)
+    asyncio.run(init_db())
     print("Database tables created successfully!")
-
@@ -2,7 +2,8 @@
 Neo4j database connection for knowledge graph
 """
 import logging
-from neo4j import GraphDatabase
+from contextlib import asynccontextmanager
+from neo4j import AsyncGraphDatabase
 import os
 from dotenv import load_dotenv
 
@@ -14,22 +15,42 @@ NEO4J_URI = os.getenv("NEO4J_URI", "bolt://localhost:7687")
 NEO4J_USER = os.getenv("NEO4J_USER", "neo4j")
 NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD", "neo4j")
 
+# Connection pool settings
+NEO4J_MAX_POOL_SIZE = int(os.getenv("NEO4J_MAX_POOL_SIZE", "100"))
+NEO4J_CONNECTION_ACQUISITION_TIMEOUT = float(os.getenv("NEO4J_CONNECTION_ACQUISITION_TIMEOUT", "60"))
+NEO4J_CONNECTION_TIMEOUT = float(os.getenv("NEO4J_CONNECTION_TIMEOUT", "30"))
+NEO4J_MAX_CONNECTION_LIFETIME = float(os.getenv("NEO4J_MAX_CONNECTION_LIFETIME", "3600"))
+
 _driver = None
 
 
-def init_neo4j_driver():
+def _create_driver():
+    return AsyncGraphDatabase.driver(
+        NEO4J_URI,
+        auth=(NEO4J_USER, NEO4J_PASSWORD),
+        max_connection_pool_size=NEO4J_MAX_POOL_SIZE,
+        connection_acquisition_timeout=NEO4J_CONNECTION_ACQUISITION_TIMEOUT,
+        connection_timeout=NEO4J_CONNECTION_TIMEOUT,
+        max_connection_lifetime=NEO4J_MAX_CONNECTION_LIFETIME
+    )
+
+
+async def init_neo4j_driver():
     """
     Initialize Neo4j driver
     """
     global _driver
     if _driver is None:
         try:
-            _driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
+            _driver = _create_driver()
             # Verify connectivity
-            _driver.verify_connectivity()
-            logger.info("Neo4j driver initialized successfully")
+            await _driver.verify_connectivity()
+            logger.info(f"Neo4j driver initialized successfully (max_pool_size={NEO4J_MAX_POOL_SIZE})")
         except Exception as e:
             logger.error(f"Failed to initialize Neo4j driver: {e}")
+            if _driver is not None:
+                await _driver.close()
+                _driver = None
             raise
     return _driver
 
@@ -37,21 +58,24 @@ def init_neo4j_driver():
 def get_neo4j_driver():
     """
     Get Neo4j driver instance
+    
+    Created lazily without a connectivity check, so scripts and background
+    tasks can use it outside the FastAPI lifespan
     """
     global _driver
     if _driver is None:
-        return init_neo4j_driver()
+        _driver = _create_driver()
     return _driver
 
 
-def close_neo4j_driver():
+async def close_neo4j_driver():
     """
     Close Neo4j driver
     """
     global _driver
     if _driver is not None:
         try:
-            _driver.close()
+            await _driver.close()
             logger.info("Neo4j driver closed")
         except Exception as e:
             logger.error(f"Error closing Neo4j driver: {e}")
@@ -59,20 +83,17 @@ def close_neo4j_driver():
             _driver = None
 
 
-from contextlib import contextmanager
-
-@contextmanager
-def get_neo4j_session():
+@asynccontextmanager
+async def get_neo4j_session():
     """
     Get Neo4j session with proper cleanup
     Usage:
-        with get_neo4j_session() as session:
-            result = session.run("MATCH (n) RETURN n")
+        async with get_neo4j_session() as session:
+            result = await session.run("MATCH (n) RETURN n")
     """
     driver = get_neo4j_driver()
     session = driver.session()
     try:
         yield session
     finally:
-        session.close()
-
+        await session.close()
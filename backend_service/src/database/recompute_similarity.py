@@ -0,0 +1,23 @@
+"""
+Script to recompute course similarity (SIMILAR_TO edges) for all courses
+Run after a backfill or after changing the embedder settings
+"""
+
+import asyncio
+from backend_service.src.database.postgres_db import engine
+from backend_service.src.database.neo4j_db import close_neo4j_driver
+from backend_service.src.services.similarity import similarity_engine
+
+
+async def main():
+    try:
+        return await similarity_engine.rebuild()
+    finally:
+        await engine.dispose()
+        await close_neo4j_driver()
+
+
+if __name__ == "__main__":
+    print("Recomputing course similarity...")
+    courses = asyncio.run(main())
+    print(f"Similarity recomputed for {courses} courses")
@@ -0,0 +1,72 @@
+"""
+Redis connection (asyncio client with a shared connection pool)
+"""
+import logging
+import os
+from typing import Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+try:
+    import redis.asyncio as aioredis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+    logger.warning("Redis not available, Redis-backed features will use in-memory fallbacks")
+
+REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
+REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
+REDIS_DB = int(os.getenv("REDIS_DB", "0"))
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+
+_client = None
+
+
+async def init_redis_client():
+    """
+    Initialize the shared Redis client and verify connectivity
+    Returns None when Redis is not installed or not reachable
+    """
+    global _client
+    if _client is None and REDIS_AVAILABLE:
+        client = aioredis.Redis(
+            host=REDIS_HOST,
+            port=REDIS_PORT,
+            db=REDIS_DB,
+            decode_responses=True,
+            socket_connect_timeout=2,
+            max_connections=REDIS_MAX_CONNECTIONS
+        )
+        try:
+            await client.ping()
+            _client = client
+            logger.info("Redis client initialized successfully")
+        except Exception as e:
+            logger.warning(f"Redis connection failed: {e}")
+            await client.aclose()
+    return _client
+
+
+def get_redis_client() -> Optional["aioredis.Redis"]:
+    """
+    Get the shared Redis client (None if not initialized)
+    """
+    return _client
+
+
+async def close_redis_client():
+    """
+    Close the shared Redis client
+    """
+    global _client
+    if _client is not None:
+        try:
+            await _client.aclose()
+            logger.info("Redis client closed")
+        except Exception as e:
+            logger.error(f"Error closing Redis client: {e}")
+        finally:
+            _client = None
@@ -12,9 +12,15 @@ from starlette.exceptions import HTTPException as StarletteHTTPException
 from backend_service.src.api.routes import router
 from backend_service.src.database.postgres_db import engine, Base
 from backend_service.src.database.neo4j_db import close_neo4j_driver, init_neo4j_driver
+from backend_service.src.services.neo4j_service import Neo4jService
+from backend_service.src.database.redis_db import init_redis_client, close_redis_client
+from backend_service.src.services.ai_service_client import ai_client
+from backend_service.src.services.job_queue import course_job_queue
+from backend_service.src.services.graph_outbox import graph_outbox
+from backend_service.src.services.similarity import similarity_engine
 
 # Import models to register them with Base
-from backend_service.src.models import User, Course, CourseTest, CourseVideo, CourseCategory
+from backend_service.src.models import User, Course, CourseTest, CourseVideo, CourseCategory, GraphOutbox
 
 # Configure logging
 logging.basicConfig(
@@ -39,14 +45,28 @@ async def lifespan(app: FastAPI):
         # In development, create tables if they don't exist
         # In production, this should be disabled and migrations should be used
         if os.getenv("DEBUG", "false").lower() == "true":
-            Base.metadata.create_all(bind=engine)
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
             logger.info("Database tables created/verified (development mode)")
         else:
             logger.info("Using Alembic migrations for database schema (production mode)")
 
         # Initialize Neo4j driver
-        init_neo4j_driver()
+        await init_neo4j_driver()
         logger.info("Neo4j driver initialized")
+        # Indexes for graph paging and MERGE lookups
+        await Neo4jService().ensure_indexes()
+
+        # Shared pooled HTTP client for AI Service calls
+        await ai_client.start()
+
+        # Background course generation workers (Redis queue or in-process fallback)
+        await init_redis_client()
+        await course_job_queue.start()
+
+        # Vector index for SIMILAR_TO edges, then Neo4j sync from the transactional outbox
+        await similarity_engine.start()
+        await graph_outbox.start()
 
         logger.info("Backend Service started successfully")
     except Exception as e:
@@ -58,8 +78,14 @@ async def lifespan(app: FastAPI):
     # Shutdown
     logger.info("Shutting down Backend Service...")
     try:
-        close_neo4j_driver()
-        logger.info("Neo4j driver closed")
+        await graph_outbox.stop()
+        await similarity_engine.stop()
+        await course_job_queue.stop()
+        await close_redis_client()
+        await ai_client.close()
+        await close_neo4j_driver()
+        await engine.dispose()
+        logger.info("Database connection pool closed")
     except Exception as e:
         logger.error(f"Error during shutdown: {e}", exc_info=True)
 
@@ -177,8 +203,8 @@ async def readiness():
     try:
         from backend_service.src.database.postgres_db import engine
         from sqlalchemy import text
-        with engine.connect() as conn:
-            conn.execute(text("SELECT 1"))
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
         checks["database"] = True
     except Exception as e:
         errors.append(f"Database: {str(e)}")
@@ -189,7 +215,7 @@ async def readiness():
         from backend_service.src.database.neo4j_db import get_neo4j_driver
         driver = get_neo4j_driver()
         if driver:
-            driver.verify_connectivity()
+            await driver.verify_connectivity()
         checks["neo4j"] = True
     except Exception as e:
         errors.append(f"Neo4j: {str(e)}")
@@ -197,12 +223,7 @@ async def readiness():
     
     # Check AI Service
     try:
-        import httpx
-        ai_service_url = os.getenv("AI_SERVICE_URL", "http://localhost:8000")
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            response = await client.get(f"{ai_service_url}/health")
-            if response.status_code == 200:
-                checks["ai_service"] = True
+        checks["ai_service"] = await ai_client.health_check()
     except Exception as e:
         errors.append(f"AI Service: {str(e)}")
         logger.warning(f"AI Service health check failed: {e}")
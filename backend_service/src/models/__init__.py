@@ -1,5 +1,6 @@
 from .user import User
 from .course import Course, CourseTest, CourseVideo, CourseCategory
+from .graph_outbox import GraphOutbox
 
-__all__ = ["User", "Course", "CourseTest", "CourseVideo", "CourseCategory"]
+__all__ = ["User", "Course", "CourseTest", "CourseVideo", "CourseCategory", "GraphOutbox"]
 
@@ -2,18 +2,29 @@
 Course models for PostgreSQL
 """
 
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON, Index
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON, Index, Computed
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred, relationship
 from sqlalchemy.sql import func
 from backend_service.src.database.postgres_db import Base
 
 
+# Полнотекстовый поиск: русская и английская морфология, заголовок и тема весомее конспекта
+COURSE_SEARCH_VECTOR = (
+    "setweight(to_tsvector('russian', coalesce(title, '') || ' ' || coalesce(topic, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(title, '') || ' ' || coalesce(topic, '')), 'A') || "
+    "setweight(to_tsvector('russian', coalesce(summary, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(summary, '')), 'B')"
+)
+
+
 class Course(Base):
     __tablename__ = "courses"
     __table_args__ = (
         # Составные индексы для частых запросов
         Index('idx_user_created', 'user_id', 'created_at'),
         Index('idx_topic_created', 'topic', 'created_at'),
+        Index('idx_course_search', 'search_vector', postgresql_using='gin'),
     )
 
     id = Column(Integer, primary_key=True, index=True)
@@ -24,6 +35,8 @@ class Course(Base):
     status = Column(String, default="completed", index=True)  # completed, processing, failed
     created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Только для поиска в SQL, в объекты не загружается
+    search_vector = deferred(Column(TSVECTOR, Computed(COURSE_SEARCH_VECTOR, persisted=True)))
 
     creator = relationship("User", back_populates="courses")
     tests = relationship("CourseTest", back_populates="course", cascade="all, delete-orphan")
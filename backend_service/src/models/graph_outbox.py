@@ -0,0 +1,26 @@
+"""
+Outbox of pending Neo4j graph mutations
+"""
+
+from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, Index
+from sqlalchemy.sql import func
+from backend_service.src.database.postgres_db import Base
+
+
+class GraphOutbox(Base):
+    __tablename__ = "graph_outbox"
+    __table_args__ = (
+        # Выборка готовых к отправке записей дренером
+        Index('idx_graph_outbox_available', 'available_at', 'id'),
+        # Проверка "нет более ранней записи того же курса" при выборке
+        Index('idx_graph_outbox_course', 'course_id', 'id'),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    operation = Column(String, nullable=False)  # upsert_course, delete_course
+    course_id = Column(Integer, nullable=False)  # без FK: строка delete переживает сам курс
+    payload = Column(JSON, nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+    available_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
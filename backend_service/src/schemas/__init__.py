@@ -1,5 +1,5 @@
 from .user import UserCreate, UserResponse, UserLogin
-from .course import CourseCreate, CourseResponse, CourseGenerateRequest, CourseGraphResponse
+from .course import CourseCreate, CourseResponse, CourseGenerateRequest, CourseGraphResponse, CourseJobResponse, CoursePage
 
 __all__ = [
     "UserCreate",
@@ -9,5 +9,7 @@ __all__ = [
     "CourseResponse",
     "CourseGenerateRequest",
     "CourseGraphResponse",
+    "CourseJobResponse",
+    "CoursePage",
 ]
 
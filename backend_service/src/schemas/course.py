@@ -36,7 +36,28 @@ class CourseResponse(BaseModel):
         from_attributes = True
 
 
+class CoursePage(BaseModel):
+    items: List[CourseResponse]
+    next_cursor: Optional[str] = None  # pass as ?cursor= to get the next page
+
+
 class CourseGraphResponse(BaseModel):
     nodes: List[Dict]
     edges: List[Dict]
-
+    next_cursor: Optional[str] = None  # pass as ?cursor= to get the next page of nodes
+    version: Optional[int] = None  # graph version the payload reflects
+    since: Optional[int] = None  # set when nodes/edges are a delta since this version
+    deleted: List[str] = []  # node ids removed since `since`
+
+
+class CourseJobResponse(BaseModel):
+    job_id: str
+    course_id: int
+    status: str  # queued, processing, retrying, completed, failed
+    stage: Optional[str] = None  # generating, saving
+    attempts: int = 0
+    max_attempts: int
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+    course: Optional[CourseResponse] = None
@@ -1,5 +1,5 @@
-from .ai_service_client import AIServiceClient
+from .ai_service_client import AIServiceClient, ai_client
 from .neo4j_service import Neo4jService
 
-__all__ = ["AIServiceClient", "Neo4jService"]
+__all__ = ["AIServiceClient", "ai_client", "Neo4jService"]
 
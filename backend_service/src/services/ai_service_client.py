@@ -2,33 +2,131 @@
 Client for calling AI Service API
 """
 
+import copy
 import httpx
+import json
+import logging
 import os
-from typing import Dict, List
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 from dotenv import load_dotenv
+from backend_service.src.services.single_flight import SingleFlight, normalize_query
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 AI_SERVICE_URL = os.getenv("AI_SERVICE_URL", "http://localhost:8000")
 
+# Connection pool settings
+AI_SERVICE_MAX_CONNECTIONS = int(os.getenv("AI_SERVICE_MAX_CONNECTIONS", "100"))
+AI_SERVICE_MAX_KEEPALIVE = int(os.getenv("AI_SERVICE_MAX_KEEPALIVE", "20"))
+AI_SERVICE_KEEPALIVE_EXPIRY = float(os.getenv("AI_SERVICE_KEEPALIVE_EXPIRY", "30"))
+AI_SERVICE_HTTP2 = os.getenv("AI_SERVICE_HTTP2", "true").lower() == "true"
+
+# HTTP/2 requires the optional h2 package (httpx[http2])
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Бюджет запроса для AI Service: повторы LLM-вызовов не выходят за наш таймаут
+REQUEST_BUDGET_HEADER = "X-Request-Budget"
+
+# Общий для всех экземпляров клиента: роутер и фоновые задачи дедуплицируются вместе
+_single_flight = SingleFlight()
+
 
 class AIServiceClient:
-    
+
     def __init__(self, base_url: str = AI_SERVICE_URL):
         self.base_url = base_url
-        self.timeout = 300.0  
-    
+        self.timeout = 300.0
+        self._client: Optional[httpx.AsyncClient] = None
+
+    async def start(self):
+        """
+        Create the pooled HTTP client (called from the FastAPI lifespan)
+        """
+        self._get_client()
+
+    async def close(self):
+        """
+        Close the pooled HTTP client and its keep-alive connections
+        """
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            logger.info("AI Service HTTP client closed")
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # Created lazily as well, so callers outside the lifespan still share one pool
+        if self._client is None:
+            http2 = AI_SERVICE_HTTP2 and HTTP2_AVAILABLE
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                http2=http2,
+                limits=httpx.Limits(
+                    max_connections=AI_SERVICE_MAX_CONNECTIONS,
+                    max_keepalive_connections=AI_SERVICE_MAX_KEEPALIVE,
+                    keepalive_expiry=AI_SERVICE_KEEPALIVE_EXPIRY
+                )
+            )
+            logger.info(f"AI Service HTTP client started (http2={http2}, max_connections={AI_SERVICE_MAX_CONNECTIONS})")
+        return self._client
+
+    async def health_check(self) -> bool:
+        response = await self._get_client().get("/health", timeout=5.0)
+        return response.status_code == 200
+
     async def generate_course(self, query: str) -> Dict:
+        """
+        Одинаковые (после нормализации) одновременные запросы делят один вызов AI Service
+        """
+        result = await _single_flight.do(
+            f"{self.base_url}|{normalize_query(query)}",
+            lambda: self._generate_course(query)
+        )
+        return copy.deepcopy(result)
+
+    async def _generate_course(self, query: str) -> Dict:
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    f"{self.base_url}/api/v1/generate_main/generate",
-                    json={"query": query}
-                )
-                response.raise_for_status()
-                return response.json()
+            response = await self._get_client().post(
+                "/api/v1/generate_main/generate",
+                json={"query": query},
+                headers={REQUEST_BUDGET_HEADER: str(self.timeout)}
+            )
+            response.raise_for_status()
+            return response.json()
         except httpx.HTTPError as e:
             raise Exception(f"AI Service error: {str(e)}")
         except Exception as e:
             raise Exception(f"Failed to generate course: {str(e)}")
 
+    async def stream_course(self, query: str) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Потоковая генерация: отдает (event, data) из SSE-потока AI Service
+        """
+        try:
+            async with self._get_client().stream(
+                "POST",
+                "/api/v1/generate_main/generate/stream",
+                json={"query": query},
+                headers={REQUEST_BUDGET_HEADER: str(self.timeout)}
+            ) as response:
+                response.raise_for_status()
+                event = "message"
+                async for line in response.aiter_lines():
+                    if line.startswith("event:"):
+                        event = line[len("event:"):].strip()
+                    elif line.startswith("data:"):
+                        yield event, json.loads(line[len("data:"):].strip())
+                    elif not line:
+                        event = "message"
+        except httpx.HTTPError as e:
+            raise Exception(f"AI Service error: {str(e)}")
+
+
+# Global client instance (pool lifecycle is managed by the FastAPI lifespan)
+ai_client = AIServiceClient()
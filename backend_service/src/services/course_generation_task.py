@@ -2,16 +2,20 @@
 Background task for course generation
 """
 import logging
-from sqlalchemy.orm import Session
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from sqlalchemy import select
 from backend_service.src.models.course import Course, CourseTest, CourseVideo, CourseCategory
-from backend_service.src.services.ai_service_client import AIServiceClient
-from backend_service.src.services.neo4j_service import Neo4jService
-from backend_service.src.database.postgres_db import SessionLocal
+from backend_service.src.services.ai_service_client import ai_client
+from backend_service.src.services.graph_outbox import graph_outbox, enqueue_course_upsert
+from backend_service.src.database.postgres_db import AsyncSessionLocal
 
 logger = logging.getLogger(__name__)
 
-ai_client = AIServiceClient()
-neo4j_service = Neo4jService()
+ProgressCallback = Callable[[str], Awaitable[None]]
+
+
+class CourseGenerationRejected(Exception):
+    """Generation finished but produced no course (e.g. chat intent); retrying won't help"""
 
 
 def extract_category_from_topic(topic: str) -> str:
@@ -35,95 +39,163 @@ def extract_category_from_topic(topic: str) -> str:
     return "Uncategorized"
 
 
-async def generate_course_task(course_id: int, query: str, user_id: int):
+MIN_SUMMARY_LENGTH = 50
+# AI Service puts its stage failure into the summary field (see course_generation_agent)
+GENERATION_ERROR_PREFIX = "Ошибка"
+
+
+def summary_placeholder(query: str) -> str:
+    return f"Конспект по теме '{query}'. К сожалению, не удалось сгенерировать полный конспект."
+
+
+def is_generation_error(summary: Optional[str]) -> bool:
+    """Summary is an AI Service error message rather than content"""
+    return bool(summary) and summary.strip().startswith(GENERATION_ERROR_PREFIX)
+
+
+def validate_generated_content(query: str, ai_response: Dict) -> Tuple[str, List[Dict], List[str]]:
+    """
+    Validated (summary, tests, videos) from an AI Service response
+
+    A too short summary is replaced with a placeholder, tests without text and
+    non-URL videos are dropped. Error summaries are left to the caller
+    (see is_generation_error).
+    """
+    summary = ai_response.get("summary") or ""
+    tests_data = ai_response.get("tests") or []
+    videos_data = ai_response.get("videos") or []
+
+    if len(summary.strip()) < MIN_SUMMARY_LENGTH:
+        logger.warning(f"Summary too short or empty for query: {query}")
+        summary = summary_placeholder(query)
+
+    valid_tests = []
+    if isinstance(tests_data, list):
+        valid_tests = [t for t in tests_data if isinstance(t, dict) and t.get("text")]
+
+    if isinstance(videos_data, str):
+        videos_data = [videos_data]
+    valid_videos = [v for v in videos_data if isinstance(v, str) and v.startswith("http")]
+
+    return summary, valid_tests, valid_videos
+
+
+async def _report(progress: Optional[ProgressCallback], stage: str):
+    if progress is not None:
+        await progress(stage)
+
+
+async def generate_course_task(
+    course_id: int,
+    query: str,
+    user_id: int,
+    progress: Optional[ProgressCallback] = None
+):
     """
     Background task for generating course content
     
-    This runs asynchronously and updates the course when generation is complete
+    This runs asynchronously and updates the course when generation is complete.
+    Errors are raised to the caller (the job queue decides about retries);
+    CourseGenerationRejected marks a permanent failure.
+
+    No database session is held while the AI Service works (up to its 300s
+    timeout): the course is checked in one short session and the result is
+    persisted in another.
     """
-    db: Session = SessionLocal()
-    try:
-        # Get course
-        course = db.query(Course).filter(Course.id == course_id).first()
-        if not course:
-            logger.error(f"Course {course_id} not found")
-            return
-        
-        logger.info(f"Starting background generation for course {course_id}")
-        
-        # Generate course content via AI Service
-        ai_response = await ai_client.generate_course(query)
-        
-        # Check intent
-        intent = ai_response.get("intent")
-        if intent == "chat":
-            logger.warning(f"Course {course_id} generation skipped - chat intent detected")
-            return
+    async with AsyncSessionLocal() as db:
+        course_exists = await db.scalar(select(Course.id).where(Course.id == course_id))
+    if not course_exists:
+        raise CourseGenerationRejected(f"Course {course_id} not found")
+
+    logger.info(f"Starting background generation for course {course_id}")
+
+    # Generate course content via AI Service
+    await _report(progress, "generating")
+    ai_response = await ai_client.generate_course(query)
+
+    # Check intent
+    intent = ai_response.get("intent")
+    if intent == "chat":
+        logger.warning(f"Course {course_id} generation skipped - chat intent detected")
+        raise CourseGenerationRejected(
+            "This request was identified as a chat query, not a course generation request"
+        )
+
+    summary, tests_data, videos_data = validate_generated_content(query, ai_response)
+    if is_generation_error(summary):
+        # Regular exception: the job queue retries and marks the course failed when attempts run out
+        raise RuntimeError(f"AI Service failed to generate the course: {summary}")
+
+    await _report(progress, "saving")
+
+    topic = ai_response.get("topic") or query
+    group = ai_response.get("group")
+
+    async with AsyncSessionLocal() as db:
+        try:
+            course = await db.scalar(select(Course).where(Course.id == course_id))
+            if not course:
+                raise CourseGenerationRejected(f"Course {course_id} was deleted during generation")
         
-        # Extract data
-        summary = ai_response.get("summary", "")
-        tests_data = ai_response.get("tests", [])
-        videos_data = ai_response.get("videos", [])
-        topic = ai_response.get("topic") or query
-        group = ai_response.get("group")
+            # Update course
+            course.title = topic
+            course.topic = topic
+            course.summary = summary
+            course.status = "completed"
         
-        # Update course
-        course.title = topic
-        course.topic = topic
-        course.summary = summary
+            # Add tests
+            if tests_data:
+                existing_test = await db.scalar(select(CourseTest).where(CourseTest.course_id == course_id))
+                if existing_test:
+                    existing_test.questions = tests_data
+                else:
+                    course_test = CourseTest(course_id=course_id, questions=tests_data)
+                    db.add(course_test)
         
-        # Add tests
-        if tests_data:
-            existing_test = db.query(CourseTest).filter(CourseTest.course_id == course_id).first()
-            if existing_test:
-                existing_test.questions = tests_data
-            else:
-                course_test = CourseTest(course_id=course_id, questions=tests_data)
-                db.add(course_test)
+            # Add videos
+            if videos_data:
+                existing_video = await db.scalar(select(CourseVideo).where(CourseVideo.course_id == course_id))
+                if existing_video:
+                    existing_video.video_urls = videos_data
+                else:
+                    course_video = CourseVideo(course_id=course_id, video_urls=videos_data)
+                    db.add(course_video)
         
-        # Add videos
-        if videos_data:
-            if isinstance(videos_data, str):
-                videos_data = [videos_data]
-            
-            existing_video = db.query(CourseVideo).filter(CourseVideo.course_id == course_id).first()
-            if existing_video:
-                existing_video.video_urls = videos_data
+            # Add category
+            category = group if group else extract_category_from_topic(topic)
+            existing_category = await db.scalar(select(CourseCategory).where(
+                CourseCategory.course_id == course_id
+            ))
+            if existing_category:
+                existing_category.category_name = category
             else:
-                course_video = CourseVideo(course_id=course_id, video_urls=videos_data)
-                db.add(course_video)
-        
-        # Add category
-        category = group if group else extract_category_from_topic(topic)
-        existing_category = db.query(CourseCategory).filter(
-            CourseCategory.course_id == course_id
-        ).first()
-        if existing_category:
-            existing_category.category_name = category
-        else:
-            course_category = CourseCategory(course_id=course_id, category_name=category)
-            db.add(course_category)
+                course_category = CourseCategory(course_id=course_id, category_name=category)
+                db.add(course_category)
         
-        db.commit()
-        logger.info(f"Course {course_id} updated successfully")
+            # Graph sync is committed with the course and applied by the outbox drainer
+            enqueue_course_upsert(db, course.id, course.title, course.topic, user_id=user_id, category=category)
         
-        # Update Neo4j
-        try:
-            neo4j_service.create_course_node(
-                course_id=course.id,
-                title=course.title,
-                topic=course.topic,
-                category=category
-            )
-            neo4j_service.create_category_relationship(course_id=course.id, category=category)
-            neo4j_service.create_user_course_relationship(user_id=user_id, course_id=course.id)
-            logger.info(f"Course {course_id} added to Neo4j graph")
-        except Exception as e:
-            logger.error(f"Neo4j error for course {course_id}: {e}", exc_info=True)
+            await db.commit()
+            graph_outbox.notify()
+            logger.info(f"Course {course_id} updated successfully")
     
-    except Exception as e:
-        logger.error(f"Error in generate_course_task for course {course_id}: {e}", exc_info=True)
-        db.rollback()
-    finally:
-        db.close()
+        except Exception as e:
+            logger.error(f"Error in generate_course_task for course {course_id}: {e}", exc_info=True)
+            await db.rollback()
+            raise
 
+
+async def mark_course_failed(course_id: int, error: str):
+    """
+    Mark a course as failed once its generation job is dead-lettered
+    """
+    async with AsyncSessionLocal() as db:
+        try:
+            course = await db.scalar(select(Course).where(Course.id == course_id))
+            if course:
+                course.status = "failed"
+                await db.commit()
+                logger.warning(f"Course {course_id} marked as failed: {error}")
+        except Exception as e:
+            logger.error(f"Error marking course {course_id} as failed: {e}", exc_info=True)
+            await db.rollback()
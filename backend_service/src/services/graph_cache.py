@@ -0,0 +1,173 @@
+"""
+Versioned snapshots of the knowledge graph
+
+Every Neo4jService write bumps a graph version and appends the affected
+course ids to a capped change log. Graph responses are materialized once
+per version and served from memory/Redis, with the version doubling as
+ETag; clients that already hold version N can ask for the changes since
+N instead of the whole graph.
+
+With Redis the version lives only in Redis: a failed bump raises so the
+outbox retries the mutation, and an unreadable version disables caching
+for the request instead of falling back to a per-process counter.
+"""
+import json
+import logging
+import os
+from collections import OrderedDict, deque
+from typing import Dict, Iterable, Optional, Set, Tuple
+from dotenv import load_dotenv
+from backend_service.src.database.redis_db import get_redis_client
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+GRAPH_SNAPSHOT_TTL = int(os.getenv("GRAPH_SNAPSHOT_TTL", "3600"))
+GRAPH_SNAPSHOT_MAX_ENTRIES = int(os.getenv("GRAPH_SNAPSHOT_MAX_ENTRIES", "64"))
+GRAPH_CHANGELOG_SIZE = int(os.getenv("GRAPH_CHANGELOG_SIZE", "1000"))
+
+VERSION_KEY = "graph:version"
+CHANGES_KEY = "graph:changes"
+SNAPSHOT_KEY_PREFIX = "graph:snapshot:"
+
+
+class GraphChanges:
+    """Net effect of the mutations after some version"""
+
+    __slots__ = ("upserted", "deleted")
+
+    def __init__(self):
+        self.upserted: Set[int] = set()
+        self.deleted: Set[int] = set()
+
+    def apply(self, change: Dict):
+        for course_id in change.get("upserted", []):
+            self.upserted.add(course_id)
+            self.deleted.discard(course_id)
+        for course_id in change.get("deleted", []):
+            self.deleted.add(course_id)
+            self.upserted.discard(course_id)
+
+
+class GraphCache:
+    """Graph version counter, change log and snapshot store (Redis, or in-memory without Redis)"""
+
+    def __init__(self):
+        self._version = 0
+        self._changes: deque = deque(maxlen=GRAPH_CHANGELOG_SIZE)
+        # key -> (version, payload); порядок = LRU
+        self._snapshots: "OrderedDict[str, Tuple[int, Dict]]" = OrderedDict()
+
+    async def bump(self, upserted: Iterable[int] = (), deleted: Iterable[int] = ()) -> int:
+        """
+        Register a graph mutation and return the new version
+
+        Raises the Redis error instead of counting locally: a local counter
+        would diverge from the shared one and keep stale snapshots and
+        ETags valid once Redis recovers.
+        """
+        change = {"upserted": list(upserted), "deleted": list(deleted)}
+        client = get_redis_client()
+        if client is not None:
+            try:
+                version = await client.incr(VERSION_KEY)
+                change["version"] = version
+                async with client.pipeline(transaction=True) as pipe:
+                    pipe.rpush(CHANGES_KEY, json.dumps(change))
+                    pipe.ltrim(CHANGES_KEY, -GRAPH_CHANGELOG_SIZE, -1)
+                    await pipe.execute()
+                return version
+            except Exception as e:
+                logger.error(f"Redis error bumping graph version: {e}")
+                raise
+
+        self._version += 1
+        change["version"] = self._version
+        self._changes.append(change)
+        return self._version
+
+    async def current_version(self) -> Optional[int]:
+        """
+        Current graph version, or None when Redis is unreachable (do not cache)
+        """
+        client = get_redis_client()
+        if client is not None:
+            try:
+                return int(await client.get(VERSION_KEY) or 0)
+            except Exception as e:
+                logger.warning(f"Redis error reading graph version: {e}")
+                return None
+        return self._version
+
+    async def changes_since(self, since: int, version: int) -> Optional[GraphChanges]:
+        """
+        Net changes between `since` and `version`, or None when the change
+        log no longer covers that range (the client needs a full snapshot)
+        """
+        changes = GraphChanges()
+        if since == version:
+            return changes
+        if since > version:
+            return None
+
+        log = await self._load_changes()
+        # Versions since+1..version must all be in the log: an INCR whose
+        # log append failed leaves a gap, and the delta would miss it
+        in_range = [change for change in log if since < change["version"] <= version]
+        if len({change["version"] for change in in_range}) != version - since:
+            return None
+        for change in in_range:
+            changes.apply(change)
+        return changes
+
+    async def get_snapshot(self, key: str, version: int) -> Optional[Dict]:
+        entry = self._snapshots.get(key)
+        if entry is not None and entry[0] == version:
+            self._snapshots.move_to_end(key)
+            return entry[1]
+
+        client = get_redis_client()
+        if client is not None:
+            try:
+                raw = await client.get(SNAPSHOT_KEY_PREFIX + key)
+                if raw:
+                    cached = json.loads(raw)
+                    if cached["version"] == version:
+                        self._remember(key, version, cached["payload"])
+                        return cached["payload"]
+            except Exception as e:
+                logger.warning(f"Redis error reading graph snapshot: {e}")
+        return None
+
+    async def set_snapshot(self, key: str, version: int, payload: Dict):
+        self._remember(key, version, payload)
+        client = get_redis_client()
+        if client is not None:
+            try:
+                await client.set(
+                    SNAPSHOT_KEY_PREFIX + key,
+                    json.dumps({"version": version, "payload": payload}, ensure_ascii=False, default=str),
+                    ex=GRAPH_SNAPSHOT_TTL
+                )
+            except Exception as e:
+                logger.warning(f"Redis error writing graph snapshot: {e}")
+
+    def _remember(self, key: str, version: int, payload: Dict):
+        self._snapshots[key] = (version, payload)
+        self._snapshots.move_to_end(key)
+        while len(self._snapshots) > GRAPH_SNAPSHOT_MAX_ENTRIES:
+            self._snapshots.popitem(last=False)
+
+    async def _load_changes(self):
+        client = get_redis_client()
+        if client is not None:
+            try:
+                return [json.loads(raw) for raw in await client.lrange(CHANGES_KEY, 0, -1)]
+            except Exception as e:
+                logger.warning(f"Redis error reading graph change log: {e}")
+        return list(self._changes)
+
+
+# Global graph cache instance
+graph_cache = GraphCache()
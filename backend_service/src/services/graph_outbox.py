@@ -0,0 +1,245 @@
+"""
+Transactional outbox for Neo4j graph sync
+
+Request handlers add graph mutations to the graph_outbox table in the same
+transaction as the course itself, so a mutation is recorded if and only if
+the course change is committed. A background drainer claims pending rows
+with SELECT ... FOR UPDATE SKIP LOCKED (several backend replicas can drain
+concurrently) and leases them by moving available_at GRAPH_OUTBOX_LEASE
+seconds ahead in a short transaction. It then applies them to Neo4j with no
+transaction open and, in a second short transaction, deletes the applied
+rows and reschedules failed ones with exponential backoff. A row whose lease
+expires (the replica died mid-batch) is claimed again. Graph writes are
+idempotent MERGE/DETACH DELETE statements, so replaying a row is harmless.
+
+Rows of one course are applied strictly in order: only the oldest pending
+row of a course can be claimed, so a delete never overtakes an upsert that
+is waiting for a retry (the retried upsert would MERGE the node back).
+Rows that exhausted their attempts no longer block the course.
+"""
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+from sqlalchemy import delete, exists, select
+from sqlalchemy.orm import aliased
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend_service.src.database.postgres_db import AsyncSessionLocal
+from backend_service.src.models.graph_outbox import GraphOutbox
+from backend_service.src.services.neo4j_service import Neo4jService
+from backend_service.src.services.similarity import similarity_engine
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_BATCH_SIZE = int(os.getenv("GRAPH_OUTBOX_BATCH_SIZE", "100"))
+OUTBOX_POLL_INTERVAL = float(os.getenv("GRAPH_OUTBOX_POLL_INTERVAL", "2"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("GRAPH_OUTBOX_MAX_ATTEMPTS", "10"))
+OUTBOX_RETRY_DELAY = float(os.getenv("GRAPH_OUTBOX_RETRY_DELAY", "5"))
+OUTBOX_MAX_RETRY_DELAY = float(os.getenv("GRAPH_OUTBOX_MAX_RETRY_DELAY", "600"))
+# How long claimed rows stay invisible to other drainers; must exceed a batch's Neo4j time
+OUTBOX_LEASE = float(os.getenv("GRAPH_OUTBOX_LEASE", "60"))
+
+# Operations
+UPSERT_COURSE = "upsert_course"
+DELETE_COURSE = "delete_course"
+
+
+def enqueue_course_upsert(
+    db: AsyncSession,
+    course_id: int,
+    title: str,
+    topic: str,
+    user_id: Optional[int] = None,
+    category: Optional[str] = None
+):
+    """
+    Record a course node upsert; committed together with the caller's transaction
+    """
+    db.add(GraphOutbox(
+        operation=UPSERT_COURSE,
+        course_id=course_id,
+        payload={
+            "course_id": course_id,
+            "title": title,
+            "topic": topic,
+            "user_id": user_id,
+            "category": category,
+        }
+    ))
+
+
+def enqueue_course_delete(db: AsyncSession, course_id: int):
+    """
+    Record a course node deletion; committed together with the caller's transaction
+    """
+    db.add(GraphOutbox(operation=DELETE_COURSE, course_id=course_id, payload={"course_id": course_id}))
+
+
+class GraphOutboxDrainer:
+    """Background task that applies outbox rows to Neo4j"""
+
+    def __init__(self, neo4j_service: Optional[Neo4jService] = None):
+        self._neo4j = neo4j_service or Neo4jService()
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+
+    async def start(self):
+        """
+        Start draining (called from the FastAPI lifespan)
+        """
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="graph-outbox-drainer")
+            logger.info("Graph outbox drainer started")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+            logger.info("Graph outbox drainer stopped")
+
+    def notify(self):
+        """
+        Wake the drainer right after a commit instead of waiting for the next poll
+        """
+        self._wakeup.set()
+
+    async def _run(self):
+        while True:
+            try:
+                drained = await self.drain_once()
+                if drained >= OUTBOX_BATCH_SIZE:
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Graph outbox drainer error: {e}", exc_info=True)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=OUTBOX_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def drain_once(self) -> int:
+        """
+        Claim one batch of due rows and apply it to Neo4j
+
+        Returns:
+            Number of rows claimed
+        """
+        rows = await self._claim()
+        if not rows:
+            return 0
+
+        # Consecutive rows with the same operation are sent as one UNWIND
+        # statement. A batch holds at most one row per course, so a failed
+        # run doesn't hold back the runs after it
+        applied: List[GraphOutbox] = []
+        failed: List[Tuple[List[GraphOutbox], Exception]] = []
+        for run in _split_runs(rows):
+            try:
+                await self._apply(run[0].operation, [row.payload for row in run])
+            except Exception as e:
+                failed.append((run, e))
+                continue
+            applied.extend(run)
+
+        await self._finish(applied, failed)
+
+        # SIMILAR_TO edges only after the rows are released: the similarity
+        # engine reads PostgreSQL and writes Neo4j on its own
+        upserted = [row.course_id for row in applied if row.operation == UPSERT_COURSE]
+        if upserted:
+            await self._update_similarity(upserted)
+        return len(rows)
+
+    async def _claim(self) -> List[GraphOutbox]:
+        """
+        Lease a batch of due rows; the row locks are held only for this transaction
+        """
+        earlier = aliased(GraphOutbox)
+        now = datetime.now(timezone.utc)
+        async with AsyncSessionLocal() as db:
+            async with db.begin():
+                result = await db.scalars(
+                    select(GraphOutbox)
+                    .where(
+                        GraphOutbox.available_at <= now,
+                        GraphOutbox.attempts < OUTBOX_MAX_ATTEMPTS,
+                        # Only the head of each course's queue; a leased row stays
+                        # in the table and keeps blocking the rows behind it
+                        ~exists().where(
+                            earlier.course_id == GraphOutbox.course_id,
+                            earlier.id < GraphOutbox.id,
+                            earlier.attempts < OUTBOX_MAX_ATTEMPTS
+                        )
+                    )
+                    .order_by(GraphOutbox.id)
+                    .limit(OUTBOX_BATCH_SIZE)
+                    .with_for_update(skip_locked=True)
+                )
+                rows = result.all()
+                lease_until = now + timedelta(seconds=OUTBOX_LEASE)
+                for row in rows:
+                    row.available_at = lease_until
+        return rows
+
+    async def _finish(self, applied: List[GraphOutbox], failed: List[Tuple[List[GraphOutbox], Exception]]):
+        """
+        Delete applied rows and reschedule failed ones
+        """
+        async with AsyncSessionLocal() as db:
+            async with db.begin():
+                if applied:
+                    await db.execute(
+                        delete(GraphOutbox).where(GraphOutbox.id.in_([row.id for row in applied]))
+                    )
+                for run, error in failed:
+                    self._reschedule([await db.merge(row, load=False) for row in run], error)
+
+    async def _apply(self, operation: str, payloads: List[Dict]):
+        course_ids = [payload["course_id"] for payload in payloads]
+        if operation == UPSERT_COURSE:
+            await self._neo4j.create_course_graphs(payloads)
+        elif operation == DELETE_COURSE:
+            await self._neo4j.delete_course_nodes(course_ids)
+            await similarity_engine.remove_courses(course_ids)
+        else:
+            raise ValueError(f"Unknown graph outbox operation: {operation}")
+
+    async def _update_similarity(self, course_ids: List[int]):
+        # SIMILAR_TO edges are derived data: a failure here must not hold back
+        # graph sync, and recompute_similarity rebuilds them anyway
+        try:
+            await similarity_engine.update_courses(course_ids)
+        except Exception as e:
+            logger.error(f"Similarity update failed for courses {course_ids}: {e}", exc_info=True)
+
+    def _reschedule(self, rows: List[GraphOutbox], error: Exception):
+        now = datetime.now(timezone.utc)
+        for row in rows:
+            row.attempts += 1
+            row.last_error = str(error) or error.__class__.__name__
+            delay = min(OUTBOX_RETRY_DELAY * 2 ** (row.attempts - 1), OUTBOX_MAX_RETRY_DELAY)
+            row.available_at = now + timedelta(seconds=delay)
+            if row.attempts >= OUTBOX_MAX_ATTEMPTS:
+                logger.error(f"Graph outbox row {row.id} ({row.operation}) gave up after {row.attempts} attempts: {row.last_error}")
+        logger.warning(f"Graph sync of {len(rows)} outbox rows failed, will retry: {error}")
+
+
+def _split_runs(rows: List[GraphOutbox]) -> List[List[GraphOutbox]]:
+    runs: List[List[GraphOutbox]] = []
+    for row in rows:
+        if runs and runs[-1][0].operation == row.operation:
+            runs[-1].append(row)
+        else:
+            runs.append([row])
+    return runs
+
+
+# Global drainer instance
+graph_outbox = GraphOutboxDrainer()
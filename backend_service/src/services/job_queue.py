@@ -0,0 +1,277 @@
+"""
+Durable job queue for background course generation
+
+Redis backend (reliable queue: BLMOVE queue -> processing, then ack)
+with an in-process asyncio fallback. A fixed pool of worker tasks runs
+generate_course_task with bounded concurrency, retries with backoff and
+dead-letters jobs that keep failing.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from typing import Dict, List, Optional
+from dotenv import load_dotenv
+from backend_service.src.database.redis_db import get_redis_client
+from backend_service.src.services.course_generation_task import (
+    CourseGenerationRejected,
+    generate_course_task,
+    mark_course_failed
+)
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKERS = int(os.getenv("COURSE_JOB_WORKERS", "4"))
+JOB_MAX_ATTEMPTS = int(os.getenv("COURSE_JOB_MAX_ATTEMPTS", "3"))
+JOB_RETRY_DELAY = float(os.getenv("COURSE_JOB_RETRY_DELAY", "10"))
+JOB_TIMEOUT = float(os.getenv("COURSE_JOB_TIMEOUT", "300"))
+JOB_TTL = int(os.getenv("COURSE_JOB_TTL", "86400"))
+# Jobs left in "processing" longer than this are considered orphaned on startup
+JOB_LEASE = float(os.getenv("COURSE_JOB_LEASE", str(JOB_TIMEOUT * 2)))
+
+QUEUE_KEY = "course_jobs:queue"
+PROCESSING_KEY = "course_jobs:processing"
+DEAD_KEY = "course_jobs:dead"
+JOB_KEY_PREFIX = "course_job:"
+
+# Job statuses
+QUEUED = "queued"
+PROCESSING = "processing"
+RETRYING = "retrying"
+COMPLETED = "completed"
+FAILED = "failed"
+
+
+class _MemoryJobBackend:
+    """In-process fallback: jobs are lost on restart"""
+
+    name = "memory"
+
+    def __init__(self):
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._jobs: Dict[str, Dict] = {}
+        self._dead: List[str] = []
+
+    async def save(self, job: Dict):
+        self._jobs[job["id"]] = job
+
+    async def load(self, job_id: str) -> Optional[Dict]:
+        job = self._jobs.get(job_id)
+        return dict(job) if job else None
+
+    async def push(self, job_id: str):
+        await self._queue.put(job_id)
+
+    async def pop(self, timeout: float) -> Optional[str]:
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def ack(self, job_id: str):
+        pass
+
+    async def requeue(self, job_id: str):
+        await self.push(job_id)
+
+    async def dead_letter(self, job_id: str):
+        self._dead.append(job_id)
+
+    async def recover(self) -> int:
+        return 0
+
+
+class _RedisJobBackend:
+    """Durable backend: a job stays in the processing list until acked"""
+
+    name = "redis"
+
+    def __init__(self, client):
+        self._redis = client
+
+    async def save(self, job: Dict):
+        await self._redis.set(JOB_KEY_PREFIX + job["id"], json.dumps(job), ex=JOB_TTL)
+
+    async def load(self, job_id: str) -> Optional[Dict]:
+        raw = await self._redis.get(JOB_KEY_PREFIX + job_id)
+        return json.loads(raw) if raw else None
+
+    async def push(self, job_id: str):
+        await self._redis.lpush(QUEUE_KEY, job_id)
+
+    async def pop(self, timeout: float) -> Optional[str]:
+        return await self._redis.blmove(QUEUE_KEY, PROCESSING_KEY, timeout, "RIGHT", "LEFT")
+
+    async def ack(self, job_id: str):
+        await self._redis.lrem(PROCESSING_KEY, 0, job_id)
+
+    async def requeue(self, job_id: str):
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.lrem(PROCESSING_KEY, 0, job_id)
+            pipe.lpush(QUEUE_KEY, job_id)
+            await pipe.execute()
+
+    async def dead_letter(self, job_id: str):
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.lrem(PROCESSING_KEY, 0, job_id)
+            pipe.lpush(DEAD_KEY, job_id)
+            await pipe.execute()
+
+    async def recover(self) -> int:
+        """
+        Requeue jobs orphaned in the processing list by a crashed worker
+        """
+        recovered = 0
+        now = time.time()
+        for job_id in await self._redis.lrange(PROCESSING_KEY, 0, -1):
+            job = await self.load(job_id)
+            if job is None:
+                await self.ack(job_id)
+                continue
+            if now - job.get("updated_at", 0) > JOB_LEASE:
+                job["status"] = QUEUED
+                job["updated_at"] = now
+                await self.save(job)
+                await self.requeue(job_id)
+                recovered += 1
+        return recovered
+
+
+class CourseJobQueue:
+    """Queue and worker pool for course generation jobs"""
+
+    def __init__(self):
+        self._backend = None
+        self._workers: List[asyncio.Task] = []
+        self._pending: set = set()
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            self._backend = _MemoryJobBackend()
+        return self._backend
+
+    async def start(self):
+        """
+        Pick a backend and start the worker pool (called from the FastAPI lifespan)
+        """
+        client = get_redis_client()
+        self._backend = _RedisJobBackend(client) if client is not None else _MemoryJobBackend()
+
+        recovered = await self._backend.recover()
+        if recovered:
+            logger.warning(f"Requeued {recovered} orphaned course generation jobs")
+
+        self._workers = [
+            asyncio.create_task(self._worker(n), name=f"course-job-worker-{n}")
+            for n in range(JOB_WORKERS)
+        ]
+        logger.info(f"Course job queue started ({self._backend.name} backend, {JOB_WORKERS} workers)")
+
+    async def stop(self):
+        """
+        Stop workers; unfinished Redis jobs are recovered on next startup
+        """
+        for task in [*self._workers, *self._pending]:
+            task.cancel()
+        await asyncio.gather(*self._workers, *self._pending, return_exceptions=True)
+        self._workers = []
+        self._pending = set()
+        logger.info("Course job queue stopped")
+
+    async def enqueue(self, course_id: int, user_id: int, query: str) -> Dict:
+        """
+        Create a job for an existing 'processing' course row
+        """
+        now = time.time()
+        job = {
+            "id": uuid.uuid4().hex,
+            "course_id": course_id,
+            "user_id": user_id,
+            "query": query,
+            "status": QUEUED,
+            "stage": None,
+            "attempts": 0,
+            "max_attempts": JOB_MAX_ATTEMPTS,
+            "error": None,
+            "created_at": now,
+            "updated_at": now,
+        }
+        await self.backend.save(job)
+        await self.backend.push(job["id"])
+        logger.info(f"Queued course generation job {job['id']} for course {course_id}")
+        return job
+
+    async def get(self, job_id: str) -> Optional[Dict]:
+        return await self.backend.load(job_id)
+
+    async def _update(self, job: Dict, **fields):
+        job.update(fields, updated_at=time.time())
+        await self.backend.save(job)
+
+    async def _worker(self, worker_id: int):
+        while True:
+            try:
+                job_id = await self.backend.pop(timeout=5)
+                if job_id is None:
+                    continue
+                job = await self.backend.load(job_id)
+                if job is None:
+                    logger.warning(f"Job {job_id} expired before processing")
+                    await self.backend.ack(job_id)
+                    continue
+                await self._run(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Course job worker {worker_id} error: {e}", exc_info=True)
+                await asyncio.sleep(1)
+
+    async def _run(self, job: Dict):
+        await self._update(job, status=PROCESSING, attempts=job["attempts"] + 1, error=None)
+
+        async def progress(stage: str):
+            await self._update(job, stage=stage)
+
+        try:
+            await asyncio.wait_for(
+                generate_course_task(job["course_id"], job["query"], job["user_id"], progress=progress),
+                timeout=JOB_TIMEOUT
+            )
+        except CourseGenerationRejected as e:
+            await self._fail(job, str(e))
+        except Exception as e:
+            error = str(e) or e.__class__.__name__
+            if job["attempts"] >= job["max_attempts"]:
+                await self._fail(job, error)
+            else:
+                delay = JOB_RETRY_DELAY * 2 ** (job["attempts"] - 1)
+                logger.warning(f"Job {job['id']} attempt {job['attempts']} failed, retrying in {delay:.0f}s: {error}")
+                await self._update(job, status=RETRYING, error=error)
+                # The job stays in the processing list until requeued, so a crash
+                # during the delay is picked up by recover()
+                task = asyncio.create_task(self._requeue_later(job["id"], delay))
+                self._pending.add(task)
+                task.add_done_callback(self._pending.discard)
+        else:
+            await self._update(job, status=COMPLETED, stage=None)
+            await self.backend.ack(job["id"])
+            logger.info(f"Job {job['id']} completed")
+
+    async def _requeue_later(self, job_id: str, delay: float):
+        await asyncio.sleep(delay)
+        await self.backend.requeue(job_id)
+
+    async def _fail(self, job: Dict, error: str):
+        logger.error(f"Job {job['id']} moved to dead letter after {job['attempts']} attempts: {error}")
+        await self._update(job, status=FAILED, error=error)
+        await self.backend.dead_letter(job["id"])
+        await mark_course_failed(job["course_id"], error)
+
+
+# Global job queue instance
+course_job_queue = CourseJobQueue()
@@ -2,13 +2,202 @@
 Service for Neo4j knowledge graph operations
 """
 
-from typing import List, Dict, Optional
+from typing import Any, AsyncIterator, List, Dict, Iterable, Optional, Tuple
 from backend_service.src.database.neo4j_db import get_neo4j_session
+from backend_service.src.services.graph_cache import graph_cache
+
+# Course node, category and author links in one statement. MERGE keeps it
+# idempotent, so a retried job or a repeated backfill doesn't duplicate nodes.
+CREATE_COURSE_GRAPH_QUERY = """
+UNWIND $courses AS course
+MERGE (c:Course {id: course.course_id})
+SET c.title = course.title,
+    c.topic = course.topic,
+    c.category = COALESCE(course.category, 'Uncategorized')
+MERGE (cat:Category {name: COALESCE(course.category, 'Uncategorized')})
+MERGE (c)-[:BELONGS_TO]->(cat)
+WITH c, course
+WHERE course.user_id IS NOT NULL
+MERGE (u:User {id: course.user_id})
+MERGE (u)-[:CREATED]->(c)
+"""
+
+BULK_BATCH_SIZE = 500
+
+# Graph extraction bounds
+DEFAULT_GRAPH_DEPTH = 2
+MAX_GRAPH_DEPTH = 3
+DEFAULT_GRAPH_LIMIT = 100
+GRAPH_EDGE_LIMIT = 200  # outgoing edges returned per node
+
+# The full graph is paged label by label on indexed keys (see GRAPH_INDEX_QUERIES):
+# each page is an index range scan in key order, so its cost is bounded by the
+# page size rather than by the total node count. Cursor: "<Label>:<key>".
+GRAPH_PAGE_SECTIONS = (
+    ("Course", "id"),
+    ("User", "id"),
+    ("Category", "name"),
+)
+
+GRAPH_INDEX_QUERIES = [
+    f"CREATE INDEX {label.lower()}_{key} IF NOT EXISTS FOR (n:{label}) ON (n.{key})"
+    for label, key in GRAPH_PAGE_SECTIONS
+]
+
+
+def _full_graph_section_query(label: str, key: str, resume: bool) -> str:
+    # Labels and keys come from GRAPH_PAGE_SECTIONS, not from the request
+    condition = f"n.{key} > $after" if resume else f"n.{key} IS NOT NULL"
+    return f"""
+    MATCH (n:{label})
+    WHERE {condition}
+    WITH n ORDER BY n.{key} LIMIT $fetch
+    RETURN n, n.{key} AS node_key,
+           [(n)-[r]->(m) | {{type: type(r), target: m}}][..$edge_limit] AS rels
+    """
+
+
+def parse_graph_cursor(cursor: Optional[str]) -> Tuple[int, Any]:
+    """
+    (section index, last key) of a full-graph cursor; (0, None) for the first page
+    """
+    if not cursor:
+        return 0, None
+    if not isinstance(cursor, str):
+        raise ValueError(f"Invalid graph cursor: {cursor!r}")
+    label, _, raw_key = cursor.partition(":")
+    for index, (section_label, key) in enumerate(GRAPH_PAGE_SECTIONS):
+        if section_label == label:
+            if key == "id":
+                try:
+                    return index, int(raw_key)
+                except ValueError:
+                    break
+            return index, raw_key
+    raise ValueError(f"Invalid graph cursor: {cursor}")
+
+
+def _course_subgraph_query(depth: int) -> str:
+    # Variable-length bounds can't be parameters; depth is a validated int
+    return f"""
+    MATCH (root:Course {{id: $course_id}})
+    MATCH (root)-[*0..{depth}]-(n)
+    WITH collect(DISTINCT n) AS scope
+    UNWIND scope AS n
+    WITH n, scope
+    WHERE $cursor IS NULL OR elementId(n) > $cursor
+    WITH n, scope ORDER BY elementId(n) LIMIT $fetch
+    RETURN n, elementId(n) AS node_key,
+           [(n)-[r]->(m) WHERE m IN scope | {{type: type(r), target: m}}][..$edge_limit] AS rels
+    ORDER BY node_key
+    """
+
+
+def _node_type(node) -> str:
+    return next(iter(node.labels), "Node")
+
+
+def _node_id(node) -> str:
+    if "id" in node:
+        return f"{_node_type(node).lower()}_{node['id']}"
+    if "name" in node:
+        return f"{_node_type(node).lower()}_{node['name']}"
+    return node.element_id
+
+
+def _node_payload(node) -> Dict:
+    node_id = _node_id(node)
+    return {
+        "id": node_id,
+        "label": node.get("title") or node.get("name") or node_id,
+        "type": _node_type(node),
+        "data": dict(node)
+    }
+
+
+def _record_items(record) -> Iterable[Tuple[str, Dict]]:
+    node = record["n"]
+    node_id = _node_id(node)
+    yield "node", _node_payload(node)
+    for rel in record["rels"]:
+        yield "edge", {
+            "source": node_id,
+            "target": _node_id(rel["target"]),
+            "type": rel["type"]
+        }
 
 
 class Neo4jService:
     
-    def create_course_node(self, course_id: int, title: str, topic: str, category: Optional[str] = None):
+    async def ensure_indexes(self):
+        """
+        Create the indexes graph paging and MERGE lookups rely on (idempotent)
+        """
+        async with get_neo4j_session() as session:
+            for query in GRAPH_INDEX_QUERIES:
+                result = await session.run(query)
+                await result.consume()
+    
+    async def create_course_graph(
+        self,
+        course_id: int,
+        title: str,
+        topic: str,
+        user_id: Optional[int] = None,
+        category: Optional[str] = None
+    ):
+        """
+        Create a course node with its category and author relationships
+        in a single managed write transaction
+        
+        Args:
+            course_id: Course ID from PostgreSQL
+            title: Course title
+            topic: Course topic
+            user_id: Optional author ID
+            category: Optional category name
+        """
+        await self.create_course_graphs([{
+            "course_id": course_id,
+            "title": title,
+            "topic": topic,
+            "user_id": user_id,
+            "category": category,
+        }])
+    
+    async def create_course_graphs(self, courses: Iterable[Dict], batch_size: int = BULK_BATCH_SIZE) -> int:
+        """
+        Bulk variant for backfills: one UNWIND transaction per batch
+        
+        Args:
+            courses: Dicts with course_id, title, topic, user_id, category
+            batch_size: Courses per transaction
+            
+        Returns:
+            Number of courses written
+        """
+        written = 0
+        batch: List[Dict] = []
+        async with get_neo4j_session() as session:
+            for course in courses:
+                batch.append(course)
+                if len(batch) >= batch_size:
+                    await session.execute_write(self._write_course_graphs, batch)
+                    await graph_cache.bump(upserted=[c["course_id"] for c in batch])
+                    written += len(batch)
+                    batch = []
+            if batch:
+                await session.execute_write(self._write_course_graphs, batch)
+                await graph_cache.bump(upserted=[c["course_id"] for c in batch])
+                written += len(batch)
+        return written
+    
+    @staticmethod
+    async def _write_course_graphs(tx, courses: List[Dict]):
+        result = await tx.run(CREATE_COURSE_GRAPH_QUERY, courses=courses)
+        await result.consume()
+    
+    async def create_course_node(self, course_id: int, title: str, topic: str, category: Optional[str] = None):
         """
         Create a course node in Neo4j graph
         
@@ -18,7 +207,7 @@ class Neo4jService:
             topic: Course topic
             category: Optional category name
         """
-        with get_neo4j_session() as session:
+        async with get_neo4j_session() as session:
             query = """
             CREATE (c:Course {
                 id: $course_id,
@@ -27,9 +216,11 @@ class Neo4jService:
                 category: COALESCE($category, 'Uncategorized')
             })
             """
-            session.run(query, course_id=course_id, title=title, topic=topic, category=category)
+            result = await session.run(query, course_id=course_id, title=title, topic=topic, category=category)
+            await result.consume()
+        await graph_cache.bump(upserted=[course_id])
     
-    def create_category_relationship(self, course_id: int, category: str):
+    async def create_category_relationship(self, course_id: int, category: str):
         """
         Create BELONGS_TO relationship between course and category
         
@@ -37,16 +228,18 @@ class Neo4jService:
             course_id: Course ID
             category: Category name
         """
-        with get_neo4j_session() as session:
+        async with get_neo4j_session() as session:
             query = """
             MERGE (cat:Category {name: $category})
             WITH cat
             MATCH (c:Course {id: $course_id})
             MERGE (c)-[:BELONGS_TO]->(cat)
             """
-            session.run(query, course_id=course_id, category=category)
+            result = await session.run(query, course_id=course_id, category=category)
+            await result.consume()
+        await graph_cache.bump(upserted=[course_id])
     
-    def create_user_course_relationship(self, user_id: int, course_id: int):
+    async def create_user_course_relationship(self, user_id: int, course_id: int):
         """
         Create CREATED relationship between user and course
         
@@ -54,129 +247,262 @@ class Neo4jService:
             user_id: User ID
             course_id: Course ID
         """
-        with get_neo4j_session() as session:
+        async with get_neo4j_session() as session:
             query = """
             MERGE (u:User {id: $user_id})
             WITH u
             MATCH (c:Course {id: $course_id})
             MERGE (u)-[:CREATED]->(c)
             """
-            session.run(query, user_id=user_id, course_id=course_id)
+            result = await session.run(query, user_id=user_id, course_id=course_id)
+            await result.consume()
+        await graph_cache.bump(upserted=[course_id])
     
-    def create_similar_relationship(self, course_id1: int, course_id2: int, similarity_score: float = 0.7):
+    async def create_similar_relationship(self, course_id1: int, course_id2: int, similarity_score: float):
         """
-        Create SIMILAR_TO relationship between courses
+        Create or update the SIMILAR_TO relationship between two courses
         
         Args:
             course_id1: First course ID
             course_id2: Second course ID
             similarity_score: Similarity score (0-1)
         """
-        with get_neo4j_session() as session:
-            query = """
-            MATCH (c1:Course {id: $course_id1})
-            MATCH (c2:Course {id: $course_id2})
-            WHERE c1 <> c2
-            MERGE (c1)-[r:SIMILAR_TO {score: $score}]->(c2)
+        await self.replace_similar_relationships(
+            [{"course_id": course_id1, "similar": [{"course_id": course_id2, "score": similarity_score}]}],
+            replace=False
+        )
+    
+    async def replace_similar_relationships(self, rows: List[Dict], replace: bool = True):
+        """
+        Write SIMILAR_TO edges for several courses in one transaction
+        
+        Args:
+            rows: Dicts with course_id and similar: [{course_id, score}, ...]
+            replace: Drop the course's existing SIMILAR_TO edges (either direction) first
+        """
+        async with get_neo4j_session() as session:
+            await session.execute_write(self._write_similar_relationships, rows, replace)
+        touched = {row["course_id"] for row in rows}
+        touched.update(similar["course_id"] for row in rows for similar in row["similar"])
+        await graph_cache.bump(upserted=touched)
+    
+    @staticmethod
+    async def _write_similar_relationships(tx, rows: List[Dict], replace: bool):
+        if replace:
+            # Undirected like the MERGE below: an edge to c may have been created
+            # from either side, incoming ones would otherwise survive a recompute
+            result = await tx.run(
+                """
+                UNWIND $rows AS row
+                MATCH (c:Course {id: row.course_id})-[old:SIMILAR_TO]-()
+                DELETE old
+                """,
+                rows=rows
+            )
+            await result.consume()
+        # Undirected MERGE keeps a single edge per pair; the score is a
+        # property, not part of the match, so updates don't duplicate edges
+        result = await tx.run(
             """
-            session.run(query, course_id1=course_id1, course_id2=course_id2, score=similarity_score)
+            UNWIND $rows AS row
+            MATCH (c:Course {id: row.course_id})
+            UNWIND row.similar AS similar
+            MATCH (other:Course {id: similar.course_id})
+            WHERE other <> c
+            MERGE (c)-[r:SIMILAR_TO]-(other)
+            SET r.score = similar.score
+            """,
+            rows=rows
+        )
+        await result.consume()
     
-    def get_course_graph(self, course_id: Optional[int] = None) -> Dict:
+    async def iter_course_graph(
+        self,
+        course_id: Optional[int] = None,
+        depth: int = DEFAULT_GRAPH_DEPTH,
+        limit: int = DEFAULT_GRAPH_LIMIT,
+        cursor: Optional[str] = None
+    ) -> AsyncIterator[Tuple[str, Dict]]:
+        """
+        Stream one page of the knowledge graph as ("node" | "edge" | "page", data)
+        
+        Nodes and their outgoing edges come from projection queries. The full
+        graph is paged on indexed keys (Course.id, User.id, Category.name), a
+        course neighbourhood by node elementId within the bounded subgraph.
+        Every edge is reported once, with the page of its source node; the
+        final "page" item holds next_cursor.
+        
+        Args:
+            course_id: Optional course ID to limit the graph to its neighbourhood
+            depth: Neighbourhood depth around the course (1..MAX_GRAPH_DEPTH)
+            limit: Maximum number of nodes per page
+            cursor: next_cursor of the previous page
+        """
+        if course_id is None:
+            async for item in self._iter_full_graph(limit, cursor):
+                yield item
+            return
+        
+        params = {
+            "cursor": cursor,
+            "fetch": limit + 1,
+            "edge_limit": GRAPH_EDGE_LIMIT,
+            "course_id": course_id
+        }
+        query = _course_subgraph_query(max(1, min(depth, MAX_GRAPH_DEPTH)))
+        
+        next_cursor = None
+        async with get_neo4j_session() as session:
+            result = await session.run(query, **params)
+            count = 0
+            last_key = None
+            async for record in result:
+                count += 1
+                if count > limit:
+                    next_cursor = last_key
+                    break
+                last_key = record["node_key"]
+                for item in _record_items(record):
+                    yield item
+        
+        yield "page", {"next_cursor": next_cursor}
+    
+    async def _iter_full_graph(self, limit: int, cursor: Optional[str]) -> AsyncIterator[Tuple[str, Dict]]:
+        """
+        Page of the whole graph: sections of GRAPH_PAGE_SECTIONS in order,
+        each read from its index starting after the cursor key
+        """
+        section, after = parse_graph_cursor(cursor)
+        remaining = limit
+        next_cursor = None
+        async with get_neo4j_session() as session:
+            while section < len(GRAPH_PAGE_SECTIONS) and remaining > 0:
+                label, key = GRAPH_PAGE_SECTIONS[section]
+                result = await session.run(
+                    _full_graph_section_query(label, key, resume=after is not None),
+                    after=after,
+                    fetch=remaining + 1,
+                    edge_limit=GRAPH_EDGE_LIMIT
+                )
+                count = 0
+                last_key = None
+                async for record in result:
+                    count += 1
+                    if count > remaining:
+                        next_cursor = f"{label}:{last_key}"
+                        break
+                    last_key = record["node_key"]
+                    for item in _record_items(record):
+                        yield item
+                await result.consume()
+                if next_cursor is not None:
+                    break
+                remaining -= count
+                if remaining == 0 and section + 1 < len(GRAPH_PAGE_SECTIONS):
+                    # Page filled exactly at the end of a section: resume from there
+                    next_cursor = f"{label}:{last_key}"
+                section += 1
+                after = None
+        
+        yield "page", {"next_cursor": next_cursor}
+    
+    async def get_course_graph(
+        self,
+        course_id: Optional[int] = None,
+        depth: int = DEFAULT_GRAPH_DEPTH,
+        limit: int = DEFAULT_GRAPH_LIMIT,
+        cursor: Optional[str] = None
+    ) -> Dict:
         """
         Get knowledge graph data for visualization
         
         Args:
             course_id: Optional course ID to get graph for specific course
+            depth: Neighbourhood depth around the course
+            limit: Maximum number of nodes per page
+            cursor: next_cursor of the previous page
             
         Returns:
-            Dictionary with nodes and edges
+            Dictionary with nodes, edges and next_cursor
         """
-        with get_neo4j_session() as session:
-            if course_id:
-                query = """
-                MATCH (c:Course {id: $course_id})
-                OPTIONAL MATCH path = (c)-[*1..2]-(connected)
-                RETURN c, collect(DISTINCT path) as paths
-                """
-                result = session.run(query, course_id=course_id)
+        graph = {"nodes": [], "edges": [], "next_cursor": None}
+        async for kind, data in self.iter_course_graph(course_id, depth, limit, cursor):
+            if kind == "node":
+                graph["nodes"].append(data)
+            elif kind == "edge":
+                graph["edges"].append(data)
             else:
-                query = """
-                MATCH (n)
-                OPTIONAL MATCH (n)-[r]->(m)
-                RETURN n, collect(DISTINCT {type: type(r), target: m}) as relationships
-                LIMIT 100
-                """
-                result = session.run(query)
-            
-            nodes = []
-            edges = []
-            node_ids = set()
-            
-            for record in result:
-                if course_id:
-                    course = record["c"]
-                    if course:
-                        node_id = f"course_{course['id']}"
-                        if node_id not in node_ids:
-                            nodes.append({
-                                "id": node_id,
-                                "label": course.get("title", ""),
-                                "type": "Course",
-                                "data": dict(course)
-                            })
-                            node_ids.add(node_id)
-                else:
-                    node = record["n"]
-                    if node:
-                        node_type = list(node.labels)[0] if node.labels else "Node"
-                        node_id = f"{node_type.lower()}_{node['id']}" if 'id' in node else str(node.id)
-                        
-                        if node_id not in node_ids:
-                            nodes.append({
-                                "id": node_id,
-                                "label": node.get("title") or node.get("name") or str(node_id),
-                                "type": node_type,
-                                "data": dict(node)
-                            })
-                            node_ids.add(node_id)
+                graph["next_cursor"] = data["next_cursor"]
+        return graph
+    
+    async def get_courses_neighbourhood(self, course_ids: Iterable[int]) -> Dict:
+        """
+        Course nodes with their direct neighbours and relationships,
+        used to build graph deltas
+        
+        Args:
+            course_ids: Course IDs
             
-            query_edges = """
-            MATCH (a)-[r]->(b)
-            RETURN a, type(r) as rel_type, b
-            LIMIT 200
+        Returns:
+            Dictionary with nodes and edges
+        """
+        nodes: Dict[str, Dict] = {}
+        edges: List[Dict] = []
+        async with get_neo4j_session() as session:
+            result = await session.run(
+                """
+                MATCH (c:Course) WHERE c.id IN $course_ids
+                RETURN c, [(c)-[r]-(m) | {type: type(r), node: m, outgoing: startNode(r) = c}][..$edge_limit] AS rels
+                """,
+                course_ids=list(course_ids),
+                edge_limit=GRAPH_EDGE_LIMIT
+            )
+            async for record in result:
+                course_id = _node_id(record["c"])
+                nodes[course_id] = _node_payload(record["c"])
+                for rel in record["rels"]:
+                    other_id = _node_id(rel["node"])
+                    nodes.setdefault(other_id, _node_payload(rel["node"]))
+                    source, target = (course_id, other_id) if rel["outgoing"] else (other_id, course_id)
+                    edges.append({"source": source, "target": target, "type": rel["type"]})
+        return {"nodes": list(nodes.values()), "edges": edges}
+    
+    async def delete_course_nodes(self, course_ids: List[int]):
+        """
+        Delete several course nodes and their relationships in one transaction
+        
+        Args:
+            course_ids: Course IDs
+        """
+        async with get_neo4j_session() as session:
+            await session.execute_write(self._delete_course_nodes, course_ids)
+        await graph_cache.bump(deleted=course_ids)
+    
+    @staticmethod
+    async def _delete_course_nodes(tx, course_ids: List[int]):
+        result = await tx.run(
             """
-            result_edges = session.run(query_edges)
-            
-            for record in result_edges:
-                source = record["a"]
-                target = record["b"]
-                rel_type = record["rel_type"]
-                
-                source_type = list(source.labels)[0] if source.labels else "Node"
-                target_type = list(target.labels)[0] if target.labels else "Node"
-                
-                source_id = f"{source_type.lower()}_{source['id']}" if 'id' in source else str(source.id)
-                target_id = f"{target_type.lower()}_{target['id']}" if 'id' in target else str(target.id)
-                
-                edges.append({
-                    "source": source_id,
-                    "target": target_id,
-                    "type": rel_type
-                })
-            
-            return {"nodes": nodes, "edges": edges}
+            UNWIND $course_ids AS course_id
+            MATCH (c:Course {id: course_id})
+            DETACH DELETE c
+            """,
+            course_ids=course_ids
+        )
+        await result.consume()
     
-    def delete_course_node(self, course_id: int):
+    async def delete_course_node(self, course_id: int):
         """
         Delete course node and its relationships
         
         Args:
             course_id: Course ID
         """
-        with get_neo4j_session() as session:
+        async with get_neo4j_session() as session:
             query = """
             MATCH (c:Course {id: $course_id})
             DETACH DELETE c
             """
-            session.run(query, course_id=course_id)
+            result = await session.run(query, course_id=course_id)
+            await result.consume()
+        await graph_cache.bump(deleted=[course_id])
 
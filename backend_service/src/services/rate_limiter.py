@@ -1,111 +1,333 @@
 """
 Rate limiting service using Redis or in-memory fallback
+
+Each check is a single atomic Redis call: the whole read-modify-write runs
+inside a Lua script, so concurrent requests cannot slip past the limit
+between a read and a write. Two algorithms are available:
+
+- sliding_window: exact log of request timestamps in a sorted set
+- gcra: generic cell rate algorithm (token bucket with one timestamp per key)
+
+Redis is reached through the shared asyncio client from redis_db, behind a
+circuit breaker: after consecutive failures the limiter stays on the
+in-memory fallback for a cooldown instead of waiting on a dead Redis for
+every request.
 """
+import asyncio
 import logging
+import math
 import os
-from typing import Optional
-from datetime import timedelta
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import NamedTuple, Optional, Union
+from dotenv import load_dotenv
+from backend_service.src.database.redis_db import get_redis_client
+
+load_dotenv()
 
 logger = logging.getLogger(__name__)
 
-# Try to import Redis
-try:
-    import redis
-    REDIS_AVAILABLE = True
-except ImportError:
-    REDIS_AVAILABLE = False
-    logger.warning("Redis not available, using in-memory rate limiter")
+RATE_LIMIT_MEMORY_MAX_KEYS = int(os.getenv("RATE_LIMIT_MEMORY_MAX_KEYS", "10000"))
+RATE_LIMIT_MEMORY_SWEEP_INTERVAL = float(os.getenv("RATE_LIMIT_MEMORY_SWEEP_INTERVAL", "60"))
+RATE_LIMIT_REDIS_TIMEOUT = float(os.getenv("RATE_LIMIT_REDIS_TIMEOUT", "0.2"))
+RATE_LIMIT_BREAKER_THRESHOLD = int(os.getenv("RATE_LIMIT_BREAKER_THRESHOLD", "3"))
+RATE_LIMIT_BREAKER_COOLDOWN = float(os.getenv("RATE_LIMIT_BREAKER_COOLDOWN", "30"))
+
+SLIDING_WINDOW = "sliding_window"
+GCRA = "gcra"
+
+RATE_LIMIT_KEY_PREFIX = "ratelimit:"
+
+# KEYS[1] - sorted set of request timestamps (ms)
+# ARGV[1] - limit, ARGV[2] - window (ms), ARGV[3] - unique member for this request
+# Returns {allowed, remaining, retry_after_ms, reset_after_ms}
+SLIDING_WINDOW_SCRIPT = """
+if redis.replicate_commands then redis.replicate_commands() end
+local key = KEYS[1]
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+
+redis.call('ZREMRANGEBYSCORE', key, '-inf', now - window)
+local count = redis.call('ZCARD', key)
+local allowed = 0
+if count < limit then
+    redis.call('ZADD', key, now, ARGV[3])
+    redis.call('PEXPIRE', key, window)
+    count = count + 1
+    allowed = 1
+end
+
+local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
+local reset_after = tonumber(oldest[2]) + window - now
+if allowed == 1 then
+    return {1, limit - count, 0, reset_after}
+end
+return {0, 0, reset_after, reset_after}
+"""
+
+# KEYS[1] - theoretical arrival time (ms)
+# ARGV[1] - limit (burst), ARGV[2] - emission interval (ms per request)
+# Returns {allowed, remaining, retry_after_ms, reset_after_ms}
+GCRA_SCRIPT = """
+if redis.replicate_commands then redis.replicate_commands() end
+local key = KEYS[1]
+local limit = tonumber(ARGV[1])
+local interval = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+
+local tat = tonumber(redis.call('GET', key)) or now
+if tat < now then
+    tat = now
+end
+local new_tat = tat + interval
+local allow_at = new_tat - limit * interval
+if allow_at > now then
+    return {0, 0, allow_at - now, tat - now}
+end
+
+redis.call('SET', key, new_tat, 'PX', new_tat - now)
+return {1, math.floor((now - allow_at) / interval + 1e-9), 0, new_tat - now}
+"""
+
+
+class RateLimitResult(NamedTuple):
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: float  # seconds until the next request may be allowed (0 if allowed)
+    reset_after: float  # seconds until the quota is fully or partially replenished
+
+
+class _MemoryEntry:
+    """Rate limit state of one key: timestamps log (sliding window) or TAT (GCRA)"""
+
+    __slots__ = ("state", "expires_at")
+
+    def __init__(self, state: Union[deque, float], expires_at: float):
+        self.state = state
+        self.expires_at = expires_at
+
+
+class MemoryRateLimitStore:
+    """
+    Bounded in-memory fallback storage
+
+    Entries expire lazily on access and in a sweep that runs at most every
+    RATE_LIMIT_MEMORY_SWEEP_INTERVAL seconds; beyond max_keys the least
+    recently used key is evicted, so a flood of distinct IPs cannot grow
+    memory without bound. Callers hold `lock` for the whole read-modify-write.
+    """
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MEMORY_MAX_KEYS,
+                 sweep_interval: float = RATE_LIMIT_MEMORY_SWEEP_INTERVAL):
+        self.max_keys = max_keys
+        self.sweep_interval = sweep_interval
+        self.lock = threading.Lock()
+        self._entries: "OrderedDict[str, _MemoryEntry]" = OrderedDict()
+        self._next_sweep = time.monotonic() + sweep_interval
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str, now: float) -> Optional[Union[deque, float]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= now:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry.state
+
+    def set(self, key: str, state: Union[deque, float], expires_at: float, now: float):
+        entry = self._entries.get(key)
+        if entry is None:
+            self._entries[key] = _MemoryEntry(state, expires_at)
+        else:
+            entry.state = state
+            entry.expires_at = expires_at
+            self._entries.move_to_end(key)
+
+        if now >= self._next_sweep:
+            self.sweep(now)
+        while len(self._entries) > self.max_keys:
+            self._entries.popitem(last=False)
+
+    def sweep(self, now: float):
+        expired = [key for key, entry in self._entries.items() if entry.expires_at <= now]
+        for key in expired:
+            del self._entries[key]
+        self._next_sweep = now + self.sweep_interval
+        if expired:
+            logger.debug(f"Rate limiter swept {len(expired)} expired keys")
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker
+
+    closed -> open after `threshold` failures in a row; while open, allow()
+    is False until `cooldown` passes, then a single probe is let through
+    (half-open) and the cooldown restarts; a successful probe closes the
+    circuit.
+    """
+
+    def __init__(self, threshold: int = RATE_LIMIT_BREAKER_THRESHOLD,
+                 cooldown: float = RATE_LIMIT_BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: Optional[float] = None
 
-# In-memory fallback storage
-_memory_store: dict = {}
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+        now = time.monotonic()
+        if now - self.opened_at < self.cooldown:
+            return False
+        # Half-open: only this caller probes, the rest wait out a new cooldown
+        self.opened_at = now
+        return True
+
+    def record_success(self):
+        if self.opened_at is not None:
+            logger.info("Rate limiter Redis circuit closed")
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.opened_at is not None or self.failures >= self.threshold:
+            if self.opened_at is None:
+                logger.warning(
+                    f"Rate limiter Redis circuit opened after {self.failures} failures, "
+                    f"using in-memory limits for {self.cooldown}s"
+                )
+            self.opened_at = time.monotonic()
 
 
 class RateLimiter:
     """Rate limiter with Redis backend and in-memory fallback"""
     
     def __init__(self):
-        self.redis_client: Optional[redis.Redis] = None
-        self.use_redis = False
-        
-        if REDIS_AVAILABLE:
-            try:
-                redis_host = os.getenv("REDIS_HOST", "localhost")
-                redis_port = int(os.getenv("REDIS_PORT", "6379"))
-                redis_db = int(os.getenv("REDIS_DB", "0"))
-                
-                self.redis_client = redis.Redis(
-                    host=redis_host,
-                    port=redis_port,
-                    db=redis_db,
-                    decode_responses=True,
-                    socket_connect_timeout=2
-                )
-                # Test connection
-                self.redis_client.ping()
-                self.use_redis = True
-                logger.info("Rate limiter using Redis")
-            except Exception as e:
-                logger.warning(f"Redis connection failed, using in-memory: {e}")
-                self.use_redis = False
+        self._scripts = {}
+        self._scripts_client = None
+        self._memory = MemoryRateLimitStore()
+        self.breaker = CircuitBreaker()
     
-    def is_allowed(self, key: str, limit: int, window: int) -> bool:
+    async def check(self, key: str, limit: int, window: int, algorithm: str = SLIDING_WINDOW) -> RateLimitResult:
         """
-        Check if request is allowed
+        Count a request against the limit
         
         Args:
             key: Unique identifier (e.g., user_id or ip)
             limit: Maximum number of requests
             window: Time window in seconds
+            algorithm: SLIDING_WINDOW or GCRA
             
         Returns:
-            True if allowed, False if rate limited
+            RateLimitResult with the decision, remaining quota and retry-after
         """
-        if self.use_redis and self.redis_client:
+        if algorithm not in (SLIDING_WINDOW, GCRA):
+            raise ValueError(f"Unknown rate limit algorithm: {algorithm}")
+        
+        client = get_redis_client()
+        if client is not None and self.breaker.allow():
             try:
-                current = self.redis_client.get(key)
-                if current is None:
-                    # First request in window
-                    self.redis_client.setex(key, window, "1")
-                    return True
-                
-                count = int(current)
-                if count < limit:
-                    self.redis_client.incr(key)
-                    return True
-                else:
-                    return False
+                result = await asyncio.wait_for(
+                    self._check_redis(client, key, limit, window, algorithm),
+                    timeout=RATE_LIMIT_REDIS_TIMEOUT
+                )
+                self.breaker.record_success()
+                return result
             except Exception as e:
-                logger.error(f"Redis error in rate limiter: {e}")
+                logger.error(f"Redis error in rate limiter: {e!r}")
+                self.breaker.record_failure()
                 # Fallback to in-memory
-                return self._is_allowed_memory(key, limit, window)
-        else:
-            return self._is_allowed_memory(key, limit, window)
+        return self._check_memory(key, limit, window, algorithm)
     
-    def _is_allowed_memory(self, key: str, limit: int, window: int) -> bool:
-        """In-memory rate limiter (fallback)"""
-        import time
-        
-        current_time = time.time()
-        
-        if key not in _memory_store:
-            _memory_store[key] = {"count": 1, "window_start": current_time}
-            return True
-        
-        store = _memory_store[key]
-        time_passed = current_time - store["window_start"]
-        
-        if time_passed > window:
-            # New window
-            _memory_store[key] = {"count": 1, "window_start": current_time}
-            return True
+    async def is_allowed(self, key: str, limit: int, window: int, algorithm: str = SLIDING_WINDOW) -> bool:
+        """
+        Check if request is allowed
         
-        if store["count"] < limit:
-            store["count"] += 1
-            return True
+        Returns:
+            True if allowed, False if rate limited
+        """
+        return (await self.check(key, limit, window, algorithm)).allowed
+    
+    def _get_scripts(self, client):
+        # register_script runs EVALSHA and reloads the script on NOSCRIPT
+        if self._scripts_client is not client:
+            self._scripts = {
+                SLIDING_WINDOW: client.register_script(SLIDING_WINDOW_SCRIPT),
+                GCRA: client.register_script(GCRA_SCRIPT),
+            }
+            self._scripts_client = client
+        return self._scripts
+    
+    async def _check_redis(self, client, key: str, limit: int, window: int, algorithm: str) -> RateLimitResult:
+        window_ms = window * 1000
+        redis_key = f"{RATE_LIMIT_KEY_PREFIX}{algorithm}:{key}"
+        if algorithm == SLIDING_WINDOW:
+            args = [limit, window_ms, uuid.uuid4().hex]
+        else:
+            args = [limit, max(1, window_ms // limit)]
+        allowed, remaining, retry_after_ms, reset_after_ms = await self._get_scripts(client)[algorithm](
+            keys=[redis_key], args=args
+        )
+        return RateLimitResult(
+            allowed=bool(allowed),
+            limit=limit,
+            remaining=int(remaining),
+            retry_after=int(retry_after_ms) / 1000,
+            reset_after=max(0, int(reset_after_ms)) / 1000
+        )
+    
+    def _check_memory(self, key: str, limit: int, window: int, algorithm: str) -> RateLimitResult:
+        """In-memory rate limiter (fallback), same semantics as the Lua scripts"""
+        store_key = f"{algorithm}:{key}"
         
-        return False
+        with self._memory.lock:
+            # monotonic: expiry must not jump with wall-clock adjustments
+            now = time.monotonic()
+            
+            if algorithm == SLIDING_WINDOW:
+                hits = self._memory.get(store_key, now)
+                if hits is None:
+                    hits = deque()
+                while hits and hits[0] <= now - window:
+                    hits.popleft()
+                allowed = len(hits) < limit
+                if allowed:
+                    hits.append(now)
+                self._memory.set(store_key, hits, hits[-1] + window, now)
+                reset_after = hits[0] + window - now
+                return RateLimitResult(
+                    allowed=allowed,
+                    limit=limit,
+                    remaining=limit - len(hits),
+                    retry_after=0 if allowed else reset_after,
+                    reset_after=reset_after
+                )
+            
+            interval = window / limit
+            tat = max(self._memory.get(store_key, now) or now, now)
+            new_tat = tat + interval
+            allow_at = new_tat - limit * interval
+            if allow_at > now:
+                return RateLimitResult(False, limit, 0, allow_at - now, tat - now)
+            self._memory.set(store_key, new_tat, new_tat, now)
+            return RateLimitResult(True, limit, math.floor((now - allow_at) / interval + 1e-9), 0, new_tat - now)
 
 
 # Global rate limiter instance
 rate_limiter = RateLimiter()
-
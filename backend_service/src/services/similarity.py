@@ -0,0 +1,477 @@
+"""
+Course similarity engine maintaining SIMILAR_TO edges in the knowledge graph
+
+Each completed course is embedded from its topic + summary and kept in an
+in-memory NumPy index (int64 ids + float32 L2-normalized vectors), so
+nearest neighbours are a single matrix-vector product with a top-k
+partition. The default embedder is a hashed TF-IDF that works offline;
+a local sentence-transformers model can be plugged in via env.
+
+The outbox drainer calls update_courses() after a course reaches Neo4j,
+which only touches the given courses. Changes made by other replicas are
+picked up by reconcile() at startup and every SIMILARITY_RECONCILE_INTERVAL
+seconds; rebuild() recomputes the index and all edges for backfills.
+The index file (SIMILARITY_INDEX_PATH) is written off the event loop by
+reconcile(), rebuild() and on shutdown, not on every update.
+"""
+import asyncio
+import logging
+import os
+import re
+import zlib
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from dotenv import load_dotenv
+from sqlalchemy import select
+from backend_service.src.database.postgres_db import AsyncSessionLocal
+from backend_service.src.models.course import Course
+from backend_service.src.services.neo4j_service import Neo4jService
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+try:
+    from sentence_transformers import SentenceTransformer
+    SENTENCE_TRANSFORMERS_AVAILABLE = True
+except ImportError:
+    SENTENCE_TRANSFORMERS_AVAILABLE = False
+
+SIMILARITY_ENABLED = os.getenv("SIMILARITY_ENABLED", "true").lower() == "true"
+SIMILARITY_EMBEDDER = os.getenv("SIMILARITY_EMBEDDER", "tfidf")  # tfidf, sentence-transformers
+SIMILARITY_MODEL = os.getenv("SIMILARITY_MODEL", "paraphrase-multilingual-MiniLM-L12-v2")
+SIMILARITY_DIM = int(os.getenv("SIMILARITY_DIM", "1024"))
+SIMILARITY_TOP_K = int(os.getenv("SIMILARITY_TOP_K", "5"))
+SIMILARITY_THRESHOLD = float(os.getenv("SIMILARITY_THRESHOLD", "0.2"))
+# Optional .npz file to keep the index across restarts (empty = rebuild from PostgreSQL)
+SIMILARITY_INDEX_PATH = os.getenv("SIMILARITY_INDEX_PATH", "")
+# Full comparison of the index with PostgreSQL, seconds (0 = only at startup)
+SIMILARITY_RECONCILE_INTERVAL = float(os.getenv("SIMILARITY_RECONCILE_INTERVAL", "600"))
+
+# Rows per matrix product during rebuild, bounds peak memory to CHUNK x N scores
+REBUILD_CHUNK_SIZE = 256
+EDGE_BATCH_SIZE = 500
+
+_TOKEN_RE = re.compile(r"\w{2,}")
+
+
+def course_text(topic: Optional[str], summary: Optional[str]) -> str:
+    return f"{topic or ''}\n{summary or ''}"
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32, copy=False)
+
+
+class HashingTfidfEmbedder:
+    """Offline fallback: hashed word uni/bigrams weighted by TF-IDF"""
+
+    name = "tfidf"
+
+    def __init__(self, dim: int = SIMILARITY_DIM):
+        self.dim = dim
+        self.doc_freq = np.zeros(dim, dtype=np.float32)
+        self.docs = 0
+
+    def fit(self, texts: Sequence[str]):
+        self.doc_freq[:] = 0
+        self.docs = 0
+        self.partial_fit(texts)
+
+    def partial_fit(self, texts: Sequence[str]):
+        """
+        Update document frequencies; vectors embedded earlier keep their old
+        IDF weights until the next rebuild
+        """
+        for text in texts:
+            self.doc_freq += self._term_counts(text) > 0
+            self.docs += 1
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        tf = np.log1p(np.stack([self._term_counts(text) for text in texts]))
+        idf = np.log((1 + self.docs) / (1 + self.doc_freq)) + 1
+        return _normalize_rows(tf * idf)
+
+    def state(self) -> Dict[str, np.ndarray]:
+        return {"doc_freq": self.doc_freq, "docs": np.array(self.docs)}
+
+    def load_state(self, state: Dict[str, np.ndarray]):
+        self.doc_freq = state["doc_freq"].astype(np.float32)
+        self.docs = int(state["docs"])
+
+    def _term_counts(self, text: str) -> np.ndarray:
+        tokens = _TOKEN_RE.findall(text.lower().replace("ё", "е"))
+        features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+        counts = np.zeros(self.dim, dtype=np.float32)
+        if features:
+            # crc32 is stable across processes, unlike hash()
+            buckets = [zlib.crc32(feature.encode("utf-8")) % self.dim for feature in features]
+            np.add.at(counts, buckets, 1.0)
+        return counts
+
+
+class SentenceTransformerEmbedder:
+    """Local dense embeddings (requires the sentence-transformers package)"""
+
+    name = "sentence-transformers"
+
+    def __init__(self, model_name: str = SIMILARITY_MODEL):
+        self._model = SentenceTransformer(model_name)
+
+    def fit(self, texts: Sequence[str]):
+        pass
+
+    def partial_fit(self, texts: Sequence[str]):
+        pass
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = self._model.encode(list(texts), convert_to_numpy=True, normalize_embeddings=True)
+        return vectors.astype(np.float32, copy=False)
+
+    def state(self) -> Dict[str, np.ndarray]:
+        return {}
+
+    def load_state(self, state: Dict[str, np.ndarray]):
+        pass
+
+
+def create_embedder():
+    if SIMILARITY_EMBEDDER == "sentence-transformers":
+        if SENTENCE_TRANSFORMERS_AVAILABLE:
+            return SentenceTransformerEmbedder()
+        logger.warning("sentence-transformers not installed, using TF-IDF embedder")
+    return HashingTfidfEmbedder()
+
+
+class CourseVectorIndex:
+    """Course vectors as contiguous NumPy arrays with exact top-k cosine search"""
+
+    def __init__(self):
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.vectors: Optional[np.ndarray] = None
+        self._positions: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, course_id: int) -> bool:
+        return course_id in self._positions
+
+    def reset(self, ids: Sequence[int], vectors: np.ndarray):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.vectors = vectors.astype(np.float32, copy=False)
+        self._reindex()
+
+    def upsert(self, ids: Sequence[int], vectors: np.ndarray):
+        new_rows = []
+        for course_id, vector in zip(ids, vectors):
+            position = self._positions.get(course_id)
+            if position is None:
+                new_rows.append((course_id, vector))
+            else:
+                self.vectors[position] = vector
+        if new_rows:
+            new_ids = np.array([course_id for course_id, _ in new_rows], dtype=np.int64)
+            new_vectors = np.stack([vector for _, vector in new_rows]).astype(np.float32)
+            if self.vectors is None:
+                self.ids, self.vectors = new_ids, new_vectors
+            else:
+                self.ids = np.concatenate([self.ids, new_ids])
+                self.vectors = np.concatenate([self.vectors, new_vectors])
+            self._reindex()
+
+    def remove(self, ids: Iterable[int]):
+        keep = ~np.isin(self.ids, np.fromiter(ids, dtype=np.int64))
+        if not keep.all():
+            self.ids = self.ids[keep]
+            self.vectors = self.vectors[keep]
+            self._reindex()
+
+    def vector(self, course_id: int) -> np.ndarray:
+        return self.vectors[self._positions[course_id]]
+
+    def top_k(
+        self,
+        queries: np.ndarray,
+        query_ids: Sequence[int],
+        k: int = SIMILARITY_TOP_K,
+        threshold: float = SIMILARITY_THRESHOLD
+    ) -> List[List[Tuple[int, float]]]:
+        """
+        Nearest courses for each query vector (excluding the course itself)
+        """
+        if self.vectors is None or not len(self.ids):
+            return [[] for _ in query_ids]
+        scores = queries @ self.vectors.T
+        # A course is never similar to itself
+        for row, course_id in enumerate(query_ids):
+            position = self._positions.get(course_id)
+            if position is not None:
+                scores[row, position] = -1.0
+
+        k = min(k, scores.shape[1])
+        candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        results = []
+        for row, columns in enumerate(candidates):
+            ordered = columns[np.argsort(-scores[row, columns])]
+            results.append([
+                (int(self.ids[column]), round(float(scores[row, column]), 4))
+                for column in ordered
+                if scores[row, column] >= threshold
+            ])
+        return results
+
+    def _reindex(self):
+        self._positions = {int(course_id): position for position, course_id in enumerate(self.ids)}
+
+
+class SimilarityEngine:
+    """Keeps the vector index in sync with PostgreSQL and SIMILAR_TO edges in Neo4j"""
+
+    def __init__(self, embedder=None, neo4j_service: Optional[Neo4jService] = None):
+        self._embedder = embedder
+        self._neo4j = neo4j_service or Neo4jService()
+        self._index = CourseVectorIndex()
+        self._lock = asyncio.Lock()
+        self._loaded = False
+        self._reconcile_task: Optional[asyncio.Task] = None
+        # Index changed since the last save
+        self._dirty = False
+        self._save_lock = asyncio.Lock()
+
+    @property
+    def embedder(self):
+        if self._embedder is None:
+            self._embedder = create_embedder()
+        return self._embedder
+
+    async def start(self):
+        """
+        Load or build the index (called from the FastAPI lifespan)
+        """
+        if not SIMILARITY_ENABLED:
+            return
+        async with self._lock:
+            if self._load():
+                # The saved index may predate courses created or deleted since
+                self._dirty = bool(await self._reconcile())
+            else:
+                await self._build_index()
+                self._dirty = True
+            self._loaded = True
+            snapshot = self._snapshot()
+        await self._save(snapshot)
+        logger.info(f"Similarity index ready ({len(self._index)} courses, {self.embedder.name} embedder)")
+        if SIMILARITY_RECONCILE_INTERVAL > 0 and self._reconcile_task is None:
+            self._reconcile_task = asyncio.create_task(self._reconcile_loop(), name="similarity-reconcile")
+
+    async def stop(self):
+        if self._reconcile_task is not None:
+            self._reconcile_task.cancel()
+            await asyncio.gather(self._reconcile_task, return_exceptions=True)
+            self._reconcile_task = None
+        async with self._lock:
+            snapshot = self._snapshot()
+        await self._save(snapshot)
+
+    async def reconcile(self) -> int:
+        """
+        Bring the index up to date with all completed courses in PostgreSQL
+        (other replicas may have created or deleted courses)
+
+        Returns:
+            Number of courses added or removed
+        """
+        if not SIMILARITY_ENABLED:
+            return 0
+        async with self._lock:
+            if not self._loaded:
+                await self._build_index()
+                self._loaded = True
+                changed = len(self._index)
+            else:
+                changed = await self._reconcile()
+            self._dirty = self._dirty or bool(changed)
+            snapshot = self._snapshot()
+        await self._save(snapshot)
+        return changed
+
+    async def _reconcile_loop(self):
+        while True:
+            await asyncio.sleep(SIMILARITY_RECONCILE_INTERVAL)
+            try:
+                changed = await self.reconcile()
+                if changed:
+                    logger.info(f"Similarity index reconciled: {changed} courses added or removed")
+            except Exception as e:
+                logger.error(f"Similarity index reconcile failed: {e}", exc_info=True)
+
+    async def update_courses(self, course_ids: Iterable[int]) -> int:
+        """
+        Embed new/changed courses and replace their SIMILAR_TO edges
+
+        Returns:
+            Number of courses whose edges were updated
+        """
+        if not SIMILARITY_ENABLED:
+            return 0
+        course_ids = list(course_ids)
+        async with self._lock:
+            if not self._loaded:
+                await self._build_index()
+                self._loaded = True
+            await self._upsert(course_ids)
+            present = [course_id for course_id in course_ids if course_id in self._index]
+            if not present:
+                return 0
+            queries = np.stack([self._index.vector(course_id) for course_id in present])
+            neighbours = self._index.top_k(queries, present)
+            # Persisted by the next reconcile/rebuild or on shutdown
+            self._dirty = True
+
+        await self._write_edges(present, neighbours)
+        return len(present)
+
+    async def remove_courses(self, course_ids: Iterable[int]):
+        async with self._lock:
+            self._index.remove(course_ids)
+            self._dirty = True
+
+    async def rebuild(self) -> int:
+        """
+        Re-fit the embedder, re-embed every course and recompute all edges
+
+        Returns:
+            Number of courses in the index
+        """
+        async with self._lock:
+            await self._build_index()
+            self._loaded = True
+            ids = [int(course_id) for course_id in self._index.ids]
+            neighbours: List[List[Tuple[int, float]]] = []
+            for start in range(0, len(ids), REBUILD_CHUNK_SIZE):
+                chunk = ids[start:start + REBUILD_CHUNK_SIZE]
+                queries = self._index.vectors[start:start + REBUILD_CHUNK_SIZE]
+                neighbours.extend(self._index.top_k(queries, chunk))
+            self._dirty = True
+            snapshot = self._snapshot()
+
+        await self._save(snapshot)
+        await self._write_edges(ids, neighbours)
+        return len(ids)
+
+    async def _build_index(self):
+        courses = await _load_course_texts()
+        ids = [course_id for course_id, _ in courses]
+        texts = [text for _, text in courses]
+        self.embedder.fit(texts)
+        vectors = await asyncio.to_thread(self.embedder.embed, texts)
+        self._index.reset(ids, vectors)
+
+    async def _upsert(self, course_ids: Iterable[int]):
+        """
+        (Re-)embed the given courses; ones that are not completed anymore leave the index
+        """
+        course_ids = set(course_ids)
+        if not course_ids:
+            return
+        courses = await _load_course_texts(course_ids)
+        gone = course_ids - {course_id for course_id, _ in courses}
+        if gone:
+            self._index.remove(gone)
+        if not courses:
+            return
+        texts = [text for _, text in courses]
+        self.embedder.partial_fit(texts)
+        vectors = await asyncio.to_thread(self.embedder.embed, texts)
+        self._index.upsert([course_id for course_id, _ in courses], vectors)
+
+    async def _reconcile(self) -> int:
+        # Full id scan: only at startup and from the periodic job, never per course
+        async with AsyncSessionLocal() as db:
+            result = await db.scalars(select(Course.id).where(Course.status == "completed"))
+            known = set(result.all())
+        indexed = {int(course_id) for course_id in self._index.ids}
+        stale = indexed - known
+        if stale:
+            self._index.remove(stale)
+        missing = known - indexed
+        await self._upsert(missing)
+        return len(stale) + len(missing)
+
+    async def _write_edges(self, course_ids: List[int], neighbours: List[List[Tuple[int, float]]]):
+        rows = [
+            {
+                "course_id": course_id,
+                "similar": [{"course_id": other_id, "score": score} for other_id, score in similar]
+            }
+            for course_id, similar in zip(course_ids, neighbours)
+        ]
+        for start in range(0, len(rows), EDGE_BATCH_SIZE):
+            await self._neo4j.replace_similar_relationships(rows[start:start + EDGE_BATCH_SIZE])
+
+    def _load(self) -> bool:
+        if not SIMILARITY_INDEX_PATH or not os.path.exists(SIMILARITY_INDEX_PATH):
+            return False
+        try:
+            with np.load(SIMILARITY_INDEX_PATH) as data:
+                if str(data["embedder"]) != self.embedder.name:
+                    return False
+                self._index.reset(data["ids"], data["vectors"])
+                self.embedder.load_state({key: data[key] for key in data.files if key not in ("ids", "vectors", "embedder")})
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to load similarity index, rebuilding: {e}")
+            return False
+
+    def _snapshot(self) -> Optional[Dict[str, np.ndarray]]:
+        """
+        Copy of the index to save, or None if there is nothing new (call under self._lock)
+        """
+        if not SIMILARITY_INDEX_PATH or not self._dirty or self._index.vectors is None:
+            return None
+        self._dirty = False
+        return {
+            "ids": self._index.ids.copy(),
+            "vectors": self._index.vectors.copy(),
+            "embedder": np.array(self.embedder.name),
+            **{key: np.copy(value) for key, value in self.embedder.state().items()},
+        }
+
+    async def _save(self, snapshot: Optional[Dict[str, np.ndarray]]):
+        if snapshot is None:
+            return
+        async with self._save_lock:
+            try:
+                await asyncio.to_thread(_write_index, SIMILARITY_INDEX_PATH, snapshot)
+            except Exception as e:
+                self._dirty = True
+                logger.warning(f"Failed to save similarity index: {e}")
+
+
+def _write_index(path: str, arrays: Dict[str, np.ndarray]):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # Readers never see a half-written file
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez_compressed(f, **arrays)
+    os.replace(tmp_path, path)
+
+
+async def _load_course_texts(course_ids: Optional[Iterable[int]] = None) -> List[Tuple[int, str]]:
+    async with AsyncSessionLocal() as db:
+        query = select(Course.id, Course.topic, Course.summary).where(Course.status == "completed")
+        if course_ids is not None:
+            query = query.where(Course.id.in_(list(course_ids)))
+        result = await db.execute(query.order_by(Course.id))
+        return [(course_id, course_text(topic, summary)) for course_id, topic, summary in result.all()]
+
+
+# Global similarity engine instance
+similarity_engine = SimilarityEngine()
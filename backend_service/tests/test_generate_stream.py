@@ -0,0 +1,83 @@
+"""
+Streamed generation: the saved course is relayed as a `course` SSE event
+"""
+import asyncio
+import json
+from datetime import datetime, timezone
+from backend_service.src.api import courses
+from backend_service.src.models.course import Course
+
+
+class FakeSession:
+    """AsyncSession stand-in: assigns ids on flush, no database"""
+
+    def __init__(self):
+        self.added = []
+        self.committed = False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def add(self, obj):
+        self.added.append(obj)
+
+    async def flush(self):
+        for obj in self.added:
+            if isinstance(obj, Course) and obj.id is None:
+                obj.id = 1
+
+    async def commit(self):
+        self.committed = True
+
+    async def refresh(self, obj):
+        obj.created_at = datetime.now(timezone.utc)
+
+
+def _parse_sse(chunks):
+    events = []
+    for chunk in chunks:
+        event = data = None
+        for line in chunk.strip().splitlines():
+            if line.startswith("event:"):
+                event = line.split(":", 1)[1].strip()
+            elif line.startswith("data:"):
+                data = json.loads(line.split(":", 1)[1])
+        events.append((event, data))
+    return events
+
+
+def test_relay_generation_saves_and_returns_course(monkeypatch):
+    done = {
+        "intent": "course_generation",
+        "topic": "Python",
+        "group": "Programming",
+        "summary": "Python - язык программирования общего назначения. " * 3,
+        "tests": [{"text": "Что такое list?", "options": ["A", "B"], "correct_answer": "A"}, {"options": []}],
+        "videos": ["https://www.youtube.com/watch?v=abc", "not a url"],
+    }
+
+    async def stream_course(query):
+        yield "summary_token", {"token": "Python"}
+        yield "done", done
+
+    session = FakeSession()
+    monkeypatch.setattr(courses.ai_client, "stream_course", stream_course)
+    monkeypatch.setattr(courses, "AsyncSessionLocal", lambda: session)
+    monkeypatch.setattr(courses.graph_outbox, "notify", lambda: None)
+
+    async def collect():
+        return [chunk async for chunk in courses._relay_generation("Python", user_id=7)]
+
+    events = _parse_sse(asyncio.run(collect()))
+
+    assert [event for event, _ in events] == ["summary_token", "done", "course"]
+    course = events[-1][1]
+    assert course["id"] == 1
+    assert course["user_id"] == 7
+    assert course["tests"] == [done["tests"][0]]
+    assert course["videos"] == ["https://www.youtube.com/watch?v=abc"]
+    assert course["categories"] == ["Programming"]
+    assert session.committed
@@ -0,0 +1,43 @@
+"""
+Graph version counter: no silent fallback when Redis fails
+"""
+import asyncio
+import pytest
+from backend_service.src.services import graph_cache as graph_cache_module
+from backend_service.src.services.graph_cache import GraphCache
+
+
+class BrokenRedis:
+    async def incr(self, key):
+        raise ConnectionError("redis down")
+
+    async def get(self, key):
+        raise ConnectionError("redis down")
+
+
+def test_bump_raises_instead_of_counting_locally(monkeypatch):
+    cache = GraphCache()
+    monkeypatch.setattr(graph_cache_module, "get_redis_client", lambda: BrokenRedis())
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(cache.bump(upserted=[1]))
+    assert asyncio.run(cache.current_version()) is None
+
+
+def test_changes_since_needs_every_version(monkeypatch):
+    cache = GraphCache()
+    monkeypatch.setattr(graph_cache_module, "get_redis_client", lambda: None)
+
+    async def scenario():
+        await cache.bump(upserted=[1])
+        await cache.bump(deleted=[1])
+        await cache.bump(upserted=[2])
+        full = await cache.changes_since(0, 3)
+        # Version 2 lost from the log (e.g. INCR succeeded, append failed)
+        cache._changes.remove(next(c for c in cache._changes if c["version"] == 2))
+        gap = await cache.changes_since(0, 3)
+        return full, gap
+
+    full, gap = asyncio.run(scenario())
+    assert full.upserted == {2} and full.deleted == {1}
+    assert gap is None
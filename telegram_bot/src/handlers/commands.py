@@ -2,7 +2,10 @@
 Command handlers for Telegram bot
 """
 import logging
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+import time
+from typing import Optional
+from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, Message
+from telegram.error import TelegramError
 from telegram.ext import ContextTypes
 import sys
 import os
@@ -16,13 +19,83 @@ from telegram_bot.src.utils.storage import (
     get_state, save_state, clear_state,
     is_processing, set_processing
 )
-from telegram_bot.src.utils.formatters import format_course, format_course_list, format_tests, format_videos, split_message
+from telegram_bot.src.utils.formatters import (
+    format_course, format_course_list, format_search_results, format_tests, format_videos, split_message,
+    SAFE_MESSAGE_LENGTH
+)
 
 logger = logging.getLogger(__name__)
 
 backend_client = BackendClient()
 ai_client = AIServiceClient()
 
+# Telegram ограничивает частоту редактирования сообщений
+STREAM_EDIT_INTERVAL = 1.5
+
+MY_COURSES_PAGE_SIZE = 10
+
+
+async def _safe_edit(message: Message, text: str, parse_mode: str = None):
+    """Edit a message, ignoring 'not modified' and markup errors of partial text"""
+    try:
+        await message.edit_text(text, parse_mode=parse_mode)
+    except TelegramError as e:
+        if parse_mode:
+            await _safe_edit(message, text)
+        else:
+            logger.debug(f"Message edit skipped: {e}")
+
+
+async def _generate_course_streaming(update: Update, token: str, text: str):
+    """Generate a course and show each stage as soon as the backend streams it"""
+    status_message = await update.message.reply_text(
+        f" Генерирую курс по теме: *{text}*...",
+        parse_mode="Markdown"
+    )
+    
+    summary_text = ""
+    last_edit = 0.0
+    course = None
+    
+    async for event, data in backend_client.stream_generate_course(token, text):
+        if event == "coordinator":
+            topic = data.get("topic") or text
+            await _safe_edit(status_message, f" Тема: *{topic}*\nПишу конспект...", parse_mode="Markdown")
+        
+        elif event == "summary_token":
+            summary_text += data
+            now = time.monotonic()
+            if now - last_edit >= STREAM_EDIT_INTERVAL:
+                last_edit = now
+                await _safe_edit(status_message, summary_text[:SAFE_MESSAGE_LENGTH])
+        
+        elif event == "summary":
+            summary_chunks = split_message(f" *Конспект:*\n\n{data}")
+            await _safe_edit(status_message, summary_chunks[0], parse_mode="Markdown")
+            for chunk in summary_chunks[1:]:
+                await update.message.reply_text(chunk, parse_mode="Markdown")
+        
+        elif event == "tests":
+            if data:
+                for msg in format_tests(data):
+                    await update.message.reply_text(msg, parse_mode="Markdown")
+        
+        elif event == "videos":
+            if data:
+                await update.message.reply_text(format_videos(data), parse_mode="Markdown")
+        
+        elif event == "course":
+            course = data
+        
+        elif event == "error":
+            logger.error(f"Streamed course generation failed: {data}")
+            break
+    
+    if course:
+        await update.message.reply_text(format_course(course)[0], parse_mode="Markdown")
+    else:
+        await update.message.reply_text(" Ошибка при генерации курса. Попробуйте позже.")
+
 
 async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /start command"""
@@ -69,6 +142,7 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         "/profile - Мой профиль\n"
         "/generate - Создать курс\n"
         "/my_courses - Мои курсы\n"
+        "/search <тема> - Найти готовый курс\n"
         "/chat - Чат с AI\n"
         "/logout - Выйти из системы\n\n"
         " *Совет:* Просто отправьте тему курса, и я создам его для вас!"
@@ -163,11 +237,43 @@ async def my_courses_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
         return
     
     await update.message.reply_text("⏳ Загружаю ваши курсы...")
+    await send_my_courses_page(update.message, token)
+
+
+async def send_my_courses_page(message, token: str, cursor: Optional[str] = None, offset: int = 0):
+    """
+    Send one page of user's courses; the next page is fetched only when
+    the "Ещё" button is pressed (callback_data: my_courses:<offset>:<cursor>)
+    """
+    page = await backend_client.get_my_courses(token, cursor=cursor, limit=MY_COURSES_PAGE_SIZE)
+    courses = page.get("items", [])
+    text = format_course_list(courses, start=offset + 1)
     
-    courses = await backend_client.get_my_courses(token)
-    text = format_course_list(courses)
+    reply_markup = None
+    next_cursor = page.get("next_cursor")
+    if next_cursor:
+        callback_data = f"my_courses:{offset + len(courses)}:{next_cursor}"
+        # Telegram limits callback_data to 64 bytes
+        if len(callback_data.encode("utf-8")) <= 64:
+            reply_markup = InlineKeyboardMarkup([
+                [InlineKeyboardButton("Ещё ▶", callback_data=callback_data)]
+            ])
     
-    await update.message.reply_text(text, parse_mode="Markdown")
+    await message.reply_text(text, parse_mode="Markdown", reply_markup=reply_markup)
+
+
+async def search_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handle /search command: find existing courses before generating a new one"""
+    query = " ".join(context.args or []).strip()
+    if len(query) < 2:
+        await update.message.reply_text(
+            " *Поиск курсов*\n\nИспользование: /search <тема>\nНапример: /search Present Simple",
+            parse_mode="Markdown"
+        )
+        return
+    
+    courses = await backend_client.search_courses(query)
+    await update.message.reply_text(format_search_results(courses, query), parse_mode="Markdown")
 
 
 async def chat_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -251,27 +357,7 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
             clear_state(user_id)
             set_processing(user_id, True)
             try:
-                await update.message.reply_text(f" Генерирую курс по теме: *{text}*...\nЭто может занять 30-60 секунд.", parse_mode="Markdown")
-                
-                course = await backend_client.generate_course(token, text)
-                
-                if course:
-                    course_messages = format_course(course)
-                    for msg in course_messages:
-                        await update.message.reply_text(msg, parse_mode="Markdown")
-                    
-                    tests = course.get("tests", [])
-                    if tests:
-                        tests_messages = format_tests(tests)
-                        for msg in tests_messages:
-                            await update.message.reply_text(msg, parse_mode="Markdown")
-                    
-                    videos = course.get("videos", [])
-                    if videos:
-                        videos_text = format_videos(videos)
-                        await update.message.reply_text(videos_text, parse_mode="Markdown")
-                else:
-                    await update.message.reply_text(" Ошибка при генерации курса. Попробуйте позже.")
+                await _generate_course_streaming(update, token, text)
             finally:
                 set_processing(user_id, False)
         
@@ -306,27 +392,7 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
             
             set_processing(user_id, True)
             try:
-                await update.message.reply_text(f" Генерирую курс по теме: *{text}*...\nЭто может занять 30-60 секунд.", parse_mode="Markdown")
-                
-                course = await backend_client.generate_course(token, text)
-                
-                if course:
-                    course_messages = format_course(course)
-                    for msg in course_messages:
-                        await update.message.reply_text(msg, parse_mode="Markdown")
-                    
-                    tests = course.get("tests", [])
-                    if tests:
-                        tests_messages = format_tests(tests)
-                        for msg in tests_messages:
-                            await update.message.reply_text(msg, parse_mode="Markdown")
-                    
-                    videos = course.get("videos", [])
-                    if videos:
-                        videos_text = format_videos(videos)
-                        await update.message.reply_text(videos_text, parse_mode="Markdown")
-                else:
-                    await update.message.reply_text(" Ошибка при генерации курса. Попробуйте позже.")
+                await _generate_course_streaming(update, token, text)
             finally:
                 set_processing(user_id, False)
         else:
@@ -8,6 +8,8 @@ from telegram.ext import Application, CommandHandler, MessageHandler, CallbackQu
 from dotenv import load_dotenv
 
 from telegram_bot.src.handlers.commands import (
+    backend_client,
+    ai_client,
     start_command,
     help_command,
     register_command,
@@ -15,6 +17,8 @@ from telegram_bot.src.handlers.commands import (
     profile_command,
     generate_command,
     my_courses_command,
+    send_my_courses_page,
+    search_command,
     chat_command,
     logout_command,
     handle_message
@@ -62,12 +66,17 @@ async def callback_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
             await query.message.reply_text(" Вы не авторизованы.\nИспользуйте /login для входа.")
             return
         await query.message.reply_text(" Загружаю ваши курсы...")
-        from telegram_bot.src.services.backend_client import BackendClient
-        backend = BackendClient()
-        courses = await backend.get_my_courses(token)
-        from telegram_bot.src.utils.formatters import format_course_list
-        text = format_course_list(courses)
-        await query.message.reply_text(text, parse_mode="Markdown")
+        await send_my_courses_page(query.message, token)
+    elif data.startswith("my_courses:"):
+        from telegram_bot.src.utils.storage import get_token
+        token = get_token(user_id)
+        if not token:
+            await query.message.reply_text(" Вы не авторизованы.\nИспользуйте /login для входа.")
+            return
+        _, offset, cursor = data.split(":", 2)
+        # Убираем кнопку, чтобы следующую страницу не запросили повторно
+        await query.edit_message_reply_markup(reply_markup=None)
+        await send_my_courses_page(query.message, token, cursor=cursor, offset=int(offset))
     elif data == "chat":
         from telegram_bot.src.utils.storage import save_state
         save_state(user_id, {"action": "chat", "step": "query"})
@@ -91,11 +100,29 @@ async def error_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
             logger.error(f"Error sending error message: {e}")
 
 
+async def on_startup(application: Application):
+    """Create pooled HTTP clients once per bot process"""
+    await backend_client.start()
+    await ai_client.start()
+
+
+async def on_shutdown(application: Application):
+    """Close pooled HTTP clients"""
+    await backend_client.close()
+    await ai_client.close()
+
+
 def main():
     """Main function to run the bot"""
     logger.info("Starting Telegram Bot...")
     
-    application = Application.builder().token(TOKEN).build()
+    application = (
+        Application.builder()
+        .token(TOKEN)
+        .post_init(on_startup)
+        .post_shutdown(on_shutdown)
+        .build()
+    )
     
     application.add_handler(CommandHandler("start", start_command))
     application.add_handler(CommandHandler("help", help_command))
@@ -104,6 +131,7 @@ def main():
     application.add_handler(CommandHandler("profile", profile_command))
     application.add_handler(CommandHandler("generate", generate_command))
     application.add_handler(CommandHandler("my_courses", my_courses_command))
+    application.add_handler(CommandHandler("search", search_command))
     application.add_handler(CommandHandler("chat", chat_command))
     application.add_handler(CommandHandler("logout", logout_command))
     
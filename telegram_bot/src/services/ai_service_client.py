@@ -6,6 +6,7 @@ import httpx
 import os
 from typing import Optional, Dict
 from dotenv import load_dotenv
+from telegram_bot.src.services.http_pool import create_http_client
 
 load_dotenv()
 
@@ -20,21 +21,35 @@ class AIServiceClient:
     def __init__(self, base_url: str = AI_SERVICE_URL):
         self.base_url = base_url
         self.timeout = 300.0  
+        self._client: Optional[httpx.AsyncClient] = None
+    
+    async def start(self):
+        """Create the pooled HTTP client (called on bot startup)"""
+        self._get_client()
+    
+    async def close(self):
+        """Close the pooled HTTP client"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = create_http_client(self.base_url, self.timeout)
+        return self._client
     
     async def generate_or_chat(self, query: str) -> Optional[Dict]:
         """Generate course or chat response"""
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    f"{self.base_url}/api/v1/generate_main/generate",
-                    json={"query": query}
-                )
-                response.raise_for_status()
-                return response.json()
+            response = await self._get_client().post(
+                "/api/v1/generate_main/generate",
+                json={"query": query}
+            )
+            response.raise_for_status()
+            return response.json()
         except httpx.HTTPStatusError as e:
             logger.error(f"AI service error: {e.response.text}")
             return None
         except Exception as e:
             logger.error(f"AI service error: {e}")
             return None
-
@@ -1,11 +1,13 @@
 """
 Backend Service Client
 """
+import json
 import logging
 import httpx
 import os
-from typing import Optional, Dict, List
+from typing import Any, AsyncIterator, Optional, Dict, List, Tuple
 from dotenv import load_dotenv
+from telegram_bot.src.services.http_pool import create_http_client
 
 load_dotenv()
 
@@ -20,21 +22,37 @@ class BackendClient:
     def __init__(self, base_url: str = BACKEND_URL):
         self.base_url = base_url
         self.timeout = 30.0
+        self.generation_timeout = 300.0
+        self._client: Optional[httpx.AsyncClient] = None
+    
+    async def start(self):
+        """Create the pooled HTTP client (called on bot startup)"""
+        self._get_client()
+    
+    async def close(self):
+        """Close the pooled HTTP client"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = create_http_client(self.base_url, self.timeout)
+        return self._client
     
     async def register(self, username: str, email: str, password: str) -> Optional[Dict]:
         """Register a new user"""
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    f"{self.base_url}/api/v1/users/register",
-                    json={
-                        "username": username,
-                        "email": email,
-                        "password": password
-                    }
-                )
-                response.raise_for_status()
-                return response.json()
+            response = await self._get_client().post(
+                "/api/v1/users/register",
+                json={
+                    "username": username,
+                    "email": email,
+                    "password": password
+                }
+            )
+            response.raise_for_status()
+            return response.json()
         except httpx.HTTPStatusError as e:
             logger.error(f"Registration failed: {e.response.text}")
             return None
@@ -45,17 +63,16 @@ class BackendClient:
     async def login(self, email: str, password: str) -> Optional[str]:
         """Login and get access token"""
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    f"{self.base_url}/api/v1/users/login",
-                    data={
-                        "username": email, 
-                        "password": password
-                    }
-                )
-                response.raise_for_status()
-                data = response.json()
-                return data.get("access_token")
+            response = await self._get_client().post(
+                "/api/v1/users/login",
+                data={
+                    "username": email, 
+                    "password": password
+                }
+            )
+            response.raise_for_status()
+            data = response.json()
+            return data.get("access_token")
         except httpx.HTTPStatusError as e:
             logger.error(f"Login failed: {e.response.text}")
             return None
@@ -66,28 +83,27 @@ class BackendClient:
     async def get_profile(self, token: str) -> Optional[Dict]:
         """Get user profile"""
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(
-                    f"{self.base_url}/api/v1/users/me",
-                    headers={"Authorization": f"Bearer {token}"}
-                )
-                response.raise_for_status()
-                return response.json()
+            response = await self._get_client().get(
+                "/api/v1/users/me",
+                headers={"Authorization": f"Bearer {token}"}
+            )
+            response.raise_for_status()
+            return response.json()
         except Exception as e:
             logger.error(f"Get profile error: {e}")
             return None
     
     async def generate_course(self, token: str, query: str) -> Optional[Dict]:
-        """Generate a course"""
+        """Queue course generation, returns the job (poll it with get_generation_job)"""
         try:
-            async with httpx.AsyncClient(timeout=300.0) as client:  
-                response = await client.post(
-                    f"{self.base_url}/api/v1/courses/generate",
-                    headers={"Authorization": f"Bearer {token}"},
-                    json={"query": query}
-                )
-                response.raise_for_status()
-                return response.json()
+            response = await self._get_client().post(
+                "/api/v1/courses/generate",
+                headers={"Authorization": f"Bearer {token}"},
+                json={"query": query},
+                timeout=self.generation_timeout
+            )
+            response.raise_for_status()
+            return response.json()
         except httpx.HTTPStatusError as e:
             logger.error(f"Course generation failed: {e.response.text}")
             return None
@@ -95,29 +111,84 @@ class BackendClient:
             logger.error(f"Course generation error: {e}")
             return None
     
-    async def get_my_courses(self, token: str) -> List[Dict]:
-        """Get user's courses"""
+    async def get_generation_job(self, token: str, job_id: str) -> Optional[Dict]:
+        """Get course generation job status"""
+        try:
+            response = await self._get_client().get(
+                f"/api/v1/courses/jobs/{job_id}",
+                headers={"Authorization": f"Bearer {token}"}
+            )
+            response.raise_for_status()
+            return response.json()
+        except Exception as e:
+            logger.error(f"Get generation job error: {e}")
+            return None
+    
+    async def stream_generate_course(self, token: str, query: str) -> AsyncIterator[Tuple[str, Any]]:
+        """Generate a course, yielding (event, data) pairs as stages complete"""
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(
-                    f"{self.base_url}/api/v1/courses/user/my-courses",
-                    headers={"Authorization": f"Bearer {token}"}
-                )
-                response.raise_for_status()
-                return response.json()
+            async with self._get_client().stream(
+                "POST",
+                "/api/v1/courses/generate/stream",
+                headers={"Authorization": f"Bearer {token}"},
+                json={"query": query},
+                timeout=self.generation_timeout
+            ) as response:
+                if response.is_error:
+                    await response.aread()
+                    logger.error(f"Course generation failed: {response.text}")
+                    yield "error", {"message": response.text}
+                    return
+                event = "message"
+                async for line in response.aiter_lines():
+                    if line.startswith("event:"):
+                        event = line[len("event:"):].strip()
+                    elif line.startswith("data:"):
+                        yield event, json.loads(line[len("data:"):].strip())
+                    elif not line:
+                        event = "message"
+        except Exception as e:
+            logger.error(f"Course generation error: {e}")
+            yield "error", {"message": str(e)}
+    
+    async def get_my_courses(self, token: str, cursor: Optional[str] = None, limit: int = 10) -> Dict:
+        """Get a page of user's courses: {"items": [...], "next_cursor": ...}"""
+        params = {"limit": limit}
+        if cursor:
+            params["cursor"] = cursor
+        try:
+            response = await self._get_client().get(
+                "/api/v1/courses/user/my-courses",
+                params=params,
+                headers={"Authorization": f"Bearer {token}"}
+            )
+            response.raise_for_status()
+            return response.json()
         except Exception as e:
             logger.error(f"Get courses error: {e}")
+            return {"items": [], "next_cursor": None}
+    
+    async def search_courses(self, query: str, limit: int = 10) -> List[Dict]:
+        """Full-text search over existing courses"""
+        try:
+            response = await self._get_client().get(
+                "/api/v1/courses/search",
+                params={"q": query, "limit": limit}
+            )
+            response.raise_for_status()
+            return response.json().get("items", [])
+        except Exception as e:
+            logger.error(f"Search courses error: {e}")
             return []
     
     async def get_course(self, course_id: int) -> Optional[Dict]:
         """Get course by ID"""
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(
-                    f"{self.base_url}/api/v1/courses/{course_id}"
-                )
-                response.raise_for_status()
-                return response.json()
+            response = await self._get_client().get(
+                f"/api/v1/courses/{course_id}"
+            )
+            response.raise_for_status()
+            return response.json()
         except Exception as e:
             logger.error(f"Get course error: {e}")
             return None
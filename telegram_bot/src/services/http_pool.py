@@ -0,0 +1,39 @@
+"""
+Shared pooled HTTP client factory for service clients
+"""
+import logging
+import os
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "50"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "10"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+HTTP_HTTP2 = os.getenv("HTTP_HTTP2", "true").lower() == "true"
+
+# HTTP/2 requires the optional h2 package (httpx[http2])
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+def create_http_client(base_url: str, timeout: float) -> httpx.AsyncClient:
+    """Create a keep-alive client with pool limits from the environment"""
+    http2 = HTTP_HTTP2 and HTTP2_AVAILABLE
+    logger.info(f"HTTP client for {base_url} started (http2={http2}, max_connections={HTTP_MAX_CONNECTIONS})")
+    return httpx.AsyncClient(
+        base_url=base_url,
+        timeout=timeout,
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY
+        )
+    )
@@ -67,19 +67,32 @@ def format_course(course: Dict) -> List[str]:
     return messages
 
 
-def format_course_list(courses: List[Dict]) -> str:
-    """Format list of courses"""
+def format_course_list(courses: List[Dict], start: int = 1) -> str:
+    """Format a page of courses, numbering from start"""
     if not courses:
+        if start > 1:
+            return " Больше курсов нет."
         return " У вас пока нет курсов.\n\nИспользуйте /generate для создания нового курса."
     
-    text = f" *Ваши курсы ({len(courses)}):*\n\n"
-    for i, course in enumerate(courses[:10], 1):  # Limit to 10
+    text = " *Ваши курсы:*\n\n"
+    for i, course in enumerate(courses, start):
         title = course.get("title", "Без названия")
         course_id = course.get("id", "")
         text += f"{i}. {title} (ID: {course_id})\n"
     
-    if len(courses) > 10:
-        text += f"\n... и еще {len(courses) - 10} курсов"
+    return text
+
+
+def format_search_results(courses: List[Dict], query: str) -> str:
+    """Format course search results"""
+    if not courses:
+        return f" По запросу «{query}» курсов не найдено.\n\nИспользуйте /generate, чтобы создать новый курс."
+    
+    text = f" *Найденные курсы ({len(courses)}):*\n\n"
+    for i, course in enumerate(courses, 1):
+        title = course.get("title", "Без названия")
+        course_id = course.get("id", "")
+        text += f"{i}. {title} (ID: {course_id})\n"
     
     return text
 